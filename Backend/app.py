@@ -2,9 +2,11 @@
 Flask Backend for AI-powered Research Methodology & IP Compliance Assistant
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import os
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 import logging
 
@@ -30,6 +32,14 @@ gemini_service = GeminiService()
 prompt_templates = PromptTemplates()
 validator = Validator()
 
+# Gemini calls of /api/analyze-questions/batch run on this pool; its size caps
+# the concurrent upstream calls across all batches
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '500'))
+# Question sets answered per Gemini call in a batch (1 = one call per set)
+BATCH_PACK_SIZE = max(1, int(os.getenv('BATCH_PACK_SIZE', '1')))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix='batch-gemini')
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -40,6 +50,20 @@ def health_check():
     }), 200
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Expose runtime statistics for the Gemini client"""
+    return jsonify({
+        "http_pool": gemini_service.get_pool_stats(),
+        "response_cache": gemini_service.get_cache_stats(),
+        "coalescing": gemini_service.get_coalescing_stats(),
+        "packing": gemini_service.get_packing_stats(),
+        "retries": gemini_service.get_retry_stats(),
+        "rate_limit": gemini_service.get_rate_limit_stats(),
+        "json_parsing": gemini_service.get_parse_stats()
+    }), 200
+
+
 @app.route('/api/routes', methods=['GET'])
 def list_routes():
     """List all available API routes for debugging"""
@@ -207,7 +231,8 @@ def ask_question():
         
         # Call Gemini API
         logger.info("Calling Gemini API for general question")
-        response = gemini_service.call_gemini(prompt, is_json=False)
+        # Free-form answers are not cached so repeated questions get fresh replies
+        response = gemini_service.call_gemini(prompt, is_json=False, use_cache=False, lane="interactive")
         
         if not response:
             return jsonify({
@@ -227,6 +252,87 @@ def ask_question():
         }), 500
 
 
+def analyze_question_set(main_question, sub_questions, lane="default"):
+    """
+    Run the questions-based methodology analysis for one question set
+    
+    Args:
+        main_question: The main research question
+        sub_questions: List of sub-questions
+        lane: Gemini rate limiter lane ("batch" for batch items)
+    
+    Returns:
+        The "data" part of an /api/analyze-questions response, or None if
+        the AI service did not answer
+    """
+    # Build prompt
+    prompt = prompt_templates.get_questions_methodology_prompt(
+        main_question=main_question,
+        sub_questions=sub_questions
+    )
+    
+    # Call Gemini API
+    logger.info("Calling Gemini API for questions-based methodology analysis")
+    methodology_response = gemini_service.call_gemini(prompt, is_json=True, lane=lane)
+    
+    return _questions_response_data(main_question, sub_questions, methodology_response)
+
+
+def stream_question_set(main_question, sub_questions, lane="default"):
+    """
+    Run the questions-based methodology analysis with a streamed Gemini answer
+    
+    Args:
+        main_question: The main research question
+        sub_questions: List of sub-questions
+        lane: Gemini rate limiter lane, as for analyze_question_set
+    
+    Yields:
+        NDJSON lines: {"field": ..., "value": ...} for each methodology field
+        as soon as Gemini has written it, then the /api/analyze-questions
+        response body
+    """
+    prompt = prompt_templates.get_questions_methodology_prompt(
+        main_question=main_question,
+        sub_questions=sub_questions
+    )
+    
+    logger.info("Streaming Gemini API answer for questions-based methodology analysis")
+    methodology_response = {}
+    for key, value in gemini_service.stream_gemini_json(prompt, lane=lane):
+        methodology_response[key] = value
+        yield json.dumps({"field": key, "value": value}) + "\n"
+    
+    response_data = _questions_response_data(main_question, sub_questions, methodology_response)
+    if not response_data:
+        yield json.dumps({
+            "success": False,
+            "message": "Failed to get response from AI service",
+            "data": None
+        }) + "\n"
+        return
+    yield json.dumps({
+        "success": True,
+        "message": "Methodology analysis completed successfully",
+        "data": response_data
+    }) + "\n"
+
+
+def _questions_response_data(main_question, sub_questions, methodology_response):
+    """Build the "data" part of an /api/analyze-questions response (None without a methodology)"""
+    if not methodology_response:
+        return None
+    
+    # Build response in the specified format
+    return {
+        "questions": {
+            "main_question": main_question,
+            "sub_questions": sub_questions
+        },
+        "methodology": methodology_response
+    }
+
+
 @app.route('/api/analyze-questions', methods=['POST'])
 def analyze_questions():
     """
@@ -256,6 +362,12 @@ def analyze_questions():
             }
         }
     }
+    
+    With ?stream=ndjson (or an "Accept: application/x-ndjson" header) the
+    methodology is streamed instead: one {"field": "...", "value": ...}
+    line per methodology field as soon as Gemini has written it (e.g.
+    recommended_methodology before justification), then the response
+    above as the last line.
     """
     try:
         # Get JSON data from request
@@ -281,32 +393,20 @@ def analyze_questions():
         main_question = data.get('main_question', '')
         sub_questions = data.get('sub_questions', [])
         
-        # Build prompt
-        prompt = prompt_templates.get_questions_methodology_prompt(
-            main_question=main_question,
-            sub_questions=sub_questions
-        )
+        stream = request.args.get('stream') == 'ndjson' or \
+            'application/x-ndjson' in request.headers.get('Accept', '')
+        if stream:
+            return Response(stream_question_set(main_question, sub_questions), mimetype='application/x-ndjson')
         
-        # Call Gemini API
-        logger.info("Calling Gemini API for questions-based methodology analysis")
-        methodology_response = gemini_service.call_gemini(prompt, is_json=True)
+        response_data = analyze_question_set(main_question, sub_questions)
         
-        if not methodology_response:
+        if not response_data:
             return jsonify({
                 "success": False,
                 "message": "Failed to get response from AI service",
                 "data": None
             }), 500
         
-        # Build response in the specified format
-        response_data = {
-            "questions": {
-                "main_question": main_question,
-                "sub_questions": sub_questions
-            },
-            "methodology": methodology_response
-        }
-        
         return jsonify({
             "success": True,
             "message": "Methodology analysis completed successfully",
@@ -322,6 +422,164 @@ def analyze_questions():
         }), 500
 
 
+def _batch_item_result(index, response_data):
+    """Result entry of one batch item, shaped like the single-item response body"""
+    if not response_data:
+        return {"index": index, "success": False,
+                "message": "Failed to get response from AI service", "data": None}
+    return {"index": index, "success": True,
+            "message": "Methodology analysis completed successfully", "data": response_data}
+
+
+def _analyze_batch_group(group):
+    """
+    Analyze a group of batch items with one Gemini call (packed when the
+    group has several items); never raises
+    
+    Args:
+        group: List of (index, item) pairs
+    
+    Returns:
+        Per-item results: {"index", "success", "message", "data"}
+    """
+    try:
+        if len(group) == 1:
+            index, item = group[0]
+            return [_batch_item_result(index, analyze_question_set(
+                item['main_question'], item['sub_questions'], lane="batch"
+            ))]
+        
+        question_sets = {f"item_{index}": item for index, item in group}
+        item_prompts = {
+            key: prompt_templates.get_questions_methodology_prompt(
+                main_question=item['main_question'],
+                sub_questions=item['sub_questions']
+            )
+            for key, item in question_sets.items()
+        }
+        logger.info(f"Calling Gemini API for {len(group)} packed question sets")
+        methodologies = gemini_service.call_gemini_packed(
+            item_prompts,
+            lambda keys: prompt_templates.get_packed_questions_methodology_prompt(
+                {key: question_sets[key] for key in keys}
+            ),
+            required_keys=("recommended_methodology", "justification", "study_design"),
+            lane="batch"
+        )
+        return [
+            _batch_item_result(index, _questions_response_data(
+                item['main_question'], item['sub_questions'], methodologies.get(f"item_{index}")
+            ))
+            for index, item in group
+        ]
+    except Exception as e:
+        logger.error(f"Error in batch items {[index for index, _ in group]}: {str(e)}")
+        return [{"index": index, "success": False,
+                 "message": f"Internal server error: {str(e)}", "data": None}
+                for index, _ in group]
+
+
+def _batch_summary(results):
+    """Total, succeeded and failed counts of a batch's results"""
+    succeeded = sum(1 for result in results if result["success"])
+    return {"total": len(results), "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+@app.route('/api/analyze-questions/batch', methods=['POST'])
+def analyze_questions_batch():
+    """
+    Analyze many question sets in one request
+    
+    Expected input: an array of /api/analyze-questions bodies, either bare
+    or as {"items": [...]}
+    [
+        {"main_question": "string", "sub_questions": ["q1", "q2"]},
+        ...
+    ]
+    
+    Every item is validated on its own; valid items are analyzed
+    concurrently (at most BATCH_CONCURRENCY Gemini calls at once), packed
+    BATCH_PACK_SIZE to a call, and one failing item does not fail the batch.
+    
+    Response format:
+    {
+        "success": true,
+        "message": "Batch analysis completed",
+        "summary": {"total": 2, "succeeded": 1, "failed": 1},
+        "results": [
+            {"index": 0, "success": true, "message": "...", "data": {...}},
+            {"index": 1, "success": false, "message": "main_question cannot be empty", "data": null}
+        ]
+    }
+    
+    results are in input order. With ?stream=ndjson (or an
+    "Accept: application/x-ndjson" header) each result is instead written
+    as one JSON line as soon as it finishes, followed by a final
+    {"summary": {...}} line.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        
+        validation_error = validator.validate_batch_input(items, BATCH_MAX_ITEMS)
+        if validation_error:
+            return jsonify({
+                "success": False,
+                "message": validation_error,
+                "data": None
+            }), 400
+        
+        # Invalid items are answered straight away; the rest go to Gemini
+        results = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            item_error = validator.validate_questions_input(item)
+            if item_error:
+                results[index] = {"index": index, "success": False, "message": item_error, "data": None}
+            else:
+                valid.append((index, item))
+        
+        futures = [
+            batch_executor.submit(_analyze_batch_group, valid[start:start + BATCH_PACK_SIZE])
+            for start in range(0, len(valid), BATCH_PACK_SIZE)
+        ]
+        logger.info(f"Batch analysis of {len(items)} question sets ({len(valid)} valid, {len(futures)} groups)")
+        
+        stream = request.args.get('stream') == 'ndjson' or \
+            'application/x-ndjson' in request.headers.get('Accept', '')
+        if stream:
+            def generate():
+                for result in results:
+                    if result is not None:
+                        yield json.dumps(result) + "\n"
+                for future in as_completed(futures):
+                    for result in future.result():
+                        results[result["index"]] = result
+                        yield json.dumps(result) + "\n"
+                yield json.dumps({"summary": _batch_summary(results)}) + "\n"
+            
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        for future in as_completed(futures):
+            for result in future.result():
+                results[result["index"]] = result
+        
+        return jsonify({
+            "success": True,
+            "message": "Batch analysis completed",
+            "summary": _batch_summary(results),
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error in analyze_questions_batch: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Internal server error: {str(e)}",
+            "data": None
+        }), 500
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -0,0 +1,72 @@
+"""
+Benchmark: N separate /api/analyze-questions requests vs. one
+/api/analyze-questions/batch request (JSON and NDJSON streaming).
+
+Gemini is replaced by a stub that sleeps for a fixed latency (with some
+jitter), so the numbers only reflect how the calls are scheduled.
+
+    python benchmarks/bench_batch_analyze.py --items 100 --latency 0.5 --concurrency 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean stub Gemini latency (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="BATCH_CONCURRENCY")
+    args = parser.parse_args()
+
+    os.environ["GEMINI_API_KEY"] = "benchmark"
+    os.environ["GEMINI_CACHE_SIZE"] = "0"
+    os.environ["BATCH_CONCURRENCY"] = str(args.concurrency)
+    os.environ["BATCH_MAX_ITEMS"] = str(max(args.items, 500))
+    import app as backend
+
+    rng = random.Random(1)
+
+    def stub_send(payload, is_json, lane="default"):
+        time.sleep(args.latency * rng.uniform(0.5, 1.5))
+        return {"recommended_methodology": "Mixed-methods approach", "justification": "stub"}
+
+    backend.gemini_service._send_request = stub_send
+    client = backend.app.test_client()
+    items = [{"main_question": f"How does factor {i} affect outcomes?", "sub_questions": ["Why?", "How much?"]}
+             for i in range(args.items)]
+
+    start = time.perf_counter()
+    for item in items:
+        assert client.post("/api/analyze-questions", json=item).status_code == 200
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post("/api/analyze-questions/batch", json=items)
+    batch = time.perf_counter() - start
+    assert response.json["summary"]["succeeded"] == args.items
+
+    start = time.perf_counter()
+    response = client.post("/api/analyze-questions/batch?stream=ndjson", json=items, buffered=False)
+    first = None
+    lines = 0
+    for chunk in response.response:
+        if first is None:
+            first = time.perf_counter() - start
+        lines += chunk.count(b"\n")
+    streamed = time.perf_counter() - start
+    assert lines == args.items + 1
+
+    print(f"{args.items} question sets, stub latency {args.latency}s, BATCH_CONCURRENCY={args.concurrency}")
+    print(f"{'one request per item':>28}: {sequential:7.2f} s")
+    print(f"{'batch (JSON)':>28}: {batch:7.2f} s")
+    print(f"{'batch (NDJSON)':>28}: {streamed:7.2f} s, first result after {first:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
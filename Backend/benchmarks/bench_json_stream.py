@@ -0,0 +1,125 @@
+"""
+Benchmark: usable methodology answers and time to the first field when
+Gemini's JSON is sometimes malformed, buffered (strict or repaired parse)
+against streamed and parsed incrementally.
+
+Gemini is the HTTP stub from loadtest/stub_server.py with --malformed-rate:
+that fraction of answers arrives in ``` fences after a line of prose, with a
+trailing comma, or cut off at 90% of its length. The same methodology prompt
+is answered:
+
+  buffered, strict     the whole answer, fences stripped, then json.loads
+                       (how GeminiService parsed answers before)
+  buffered, repaired   the whole answer through json_stream.parse_json
+  streamed             stream_gemini_json, fields yielded as each one closes
+
+An answer is usable when recommended_methodology, justification and
+study_design are all present.
+
+    python benchmarks/bench_json_stream.py --calls 60 --malformed-rate 0.3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "loadtest"))
+
+import stub_server  # noqa: E402
+
+REQUIRED = ("recommended_methodology", "justification", "study_design")
+
+
+def strict_parse(text):
+    """The fence stripping and json.loads GeminiService used before json_stream"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    try:
+        return json.loads(text.strip())
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=60, help="calls per row")
+    parser.add_argument("--malformed-rate", type=float, default=0.3)
+    parser.add_argument("--latency", default="fixed:2000", help="stub latency, spread over the streamed chunks (ms)")
+    parser.add_argument("--port", type=int, default=8096)
+    args = parser.parse_args()
+
+    os.environ["GEMINI_API_KEY"] = "benchmark"
+    os.environ["GEMINI_CACHE_SIZE"] = "0"
+    os.environ["GEMINI_API_BASE"] = f"http://127.0.0.1:{args.port}"
+    import logging
+    logging.disable(logging.CRITICAL)
+    from services.gemini_service import GeminiService
+    from services.json_stream import parse_json
+    from services.prompt_templates import PromptTemplates
+
+    server = stub_server.make_server("127.0.0.1", args.port, latency=args.latency,
+                                     malformed_rate=args.malformed_rate, seed=7)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service = GeminiService()
+    prompt = PromptTemplates().get_questions_methodology_prompt(
+        main_question="How does remote work affect team productivity?",
+        sub_questions=["Which collaboration tools matter most?", "How is productivity measured?"]
+    )
+
+    def buffered(parse):
+        def run():
+            start = time.perf_counter()
+            text = service.call_gemini(prompt, is_json=False, use_cache=False)
+            answer = parse(text) if text else None
+            elapsed = (time.perf_counter() - start) * 1000
+            return answer, elapsed, elapsed
+        return run
+
+    def streamed():
+        start = time.perf_counter()
+        first = None
+        answer = {}
+        for key, value in service.stream_gemini_json(prompt, use_cache=False):
+            if first is None:
+                first = (time.perf_counter() - start) * 1000
+            answer[key] = value
+        elapsed = (time.perf_counter() - start) * 1000
+        return answer, first if first is not None else elapsed, elapsed
+
+    rows = [
+        ("buffered, strict", buffered(strict_parse)),
+        ("buffered, repaired", buffered(lambda text: parse_json(text)[0])),
+        ("streamed", streamed),
+    ]
+    print(f"{args.calls} calls per row, {args.malformed_rate:.0%} of answers malformed, stub {args.latency}\n")
+    print(f"{'mode':<20} {'usable':>7} {'first field p50 ms':>19} {'complete p50 ms':>16}")
+    for label, run in rows:
+        usable = 0
+        firsts = []
+        totals = []
+        for _ in range(args.calls):
+            answer, first, total = run()
+            if isinstance(answer, dict) and all(key in answer for key in REQUIRED):
+                usable += 1
+            firsts.append(first)
+            totals.append(total)
+        print(f"{label:<20} {usable / args.calls:>7.0%} {statistics.median(firsts):>19.0f} "
+              f"{statistics.median(totals):>16.0f}")
+
+    print(f"\nParsing: {service.get_parse_stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
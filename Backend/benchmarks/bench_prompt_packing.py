@@ -0,0 +1,82 @@
+"""
+Benchmark: Gemini calls and latency of /api/analyze-questions/batch for
+different BATCH_PACK_SIZE values.
+
+Gemini is replaced by a stub whose latency is a fixed per-call overhead plus
+a per-item generation time, so packing saves the overhead but a packed call
+takes longer. With --drop-rate the stub leaves some items out of packed
+answers, exercising the per-item fallback.
+
+    python benchmarks/bench_prompt_packing.py --items 64 --overhead 0.4 --per-item 0.15 --drop-rate 0.05
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+METHODOLOGY = {
+    "recommended_methodology": "Mixed-Methods Approach",
+    "justification": "stub",
+    "study_design": "Convergent Parallel Mixed Methods Design",
+    "data_collection_tools": {"qualitative_tools": ["Interviews: stub"], "quantitative_tools": ["Survey: stub"]}
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8, help="BATCH_CONCURRENCY")
+    parser.add_argument("--overhead", type=float, default=0.4, help="stub per-call latency (s)")
+    parser.add_argument("--per-item", type=float, default=0.15, help="stub generation time per question set (s)")
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="chance a packed item is missing")
+    parser.add_argument("--pack-sizes", default="1,2,4,8")
+    args = parser.parse_args()
+
+    os.environ["GEMINI_API_KEY"] = "benchmark"
+    os.environ["GEMINI_CACHE_SIZE"] = "0"
+    os.environ["BATCH_CONCURRENCY"] = str(args.concurrency)
+    import app as backend
+
+    rng = random.Random(3)
+    calls = {"count": 0}
+    lock = threading.Lock()
+
+    def stub_send(payload, is_json, lane="default"):
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        ids = re.findall(r"^ID: (\S+)$", prompt, flags=re.MULTILINE)
+        with lock:
+            calls["count"] += 1
+        time.sleep(args.overhead + args.per_item * max(len(ids), 1))
+        if not ids:
+            return dict(METHODOLOGY)
+        return [{"id": item_id, **METHODOLOGY} for item_id in ids if rng.random() >= args.drop_rate]
+
+    backend.gemini_service._send_request = stub_send
+    client = backend.app.test_client()
+    items = [{"main_question": f"How does factor {i} affect outcomes?", "sub_questions": ["Why?", "How much?"]}
+             for i in range(args.items)]
+
+    print(f"{args.items} question sets, BATCH_CONCURRENCY={args.concurrency}, stub {args.overhead}s/call "
+          f"+ {args.per_item}s/item, drop rate {args.drop_rate}")
+    print(f"{'pack size':>9} {'Gemini calls':>13} {'calls saved':>12} {'fallbacks':>10} {'batch s':>8}")
+    for pack_size in (int(size) for size in args.pack_sizes.split(",")):
+        backend.BATCH_PACK_SIZE = pack_size
+        before = backend.gemini_service.get_packing_stats()
+        calls["count"] = 0
+        start = time.perf_counter()
+        response = client.post("/api/analyze-questions/batch", json=items)
+        elapsed = time.perf_counter() - start
+        assert response.json["summary"]["succeeded"] == args.items
+        after = backend.gemini_service.get_packing_stats()
+        fallbacks = after["fallback_items"] - before["fallback_items"]
+        print(f"{pack_size:>9} {calls['count']:>13} {args.items - calls['count']:>12} {fallbacks:>10} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
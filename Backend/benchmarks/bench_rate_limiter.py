@@ -0,0 +1,119 @@
+"""
+Benchmark: 429s, batch throughput and interactive latency under a Gemini
+quota, without the rate limiter, with it, and with it plus priority lanes.
+
+Gemini is the HTTP stub from loadtest/stub_server.py with --rpm-limit, which
+answers 429 once a minute's quota is used up. --batch-threads threads send
+batch-lane calls back to back while one thread sends an /api/ask-style call
+every --ask-interval seconds. Each configuration runs for --duration seconds
+against a fresh quota.
+
+    python benchmarks/bench_rate_limiter.py --quota 600 --rpm 500 --duration 20
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "loadtest"))
+
+import stub_server  # noqa: E402
+
+
+def p50_p95(latencies):
+    """Median and 95th percentile as table cells; "-" when there are no samples"""
+    if not latencies:
+        return "-", "-"
+    p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+    return f"{statistics.median(latencies):.0f}", f"{p95:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quota", type=int, default=600, help="stub requests per minute before 429s")
+    parser.add_argument("--rpm", type=float, default=500, help="GEMINI_RPM for the limited runs")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--reserve", type=int, default=2, help="in-flight slots kept for interactive calls")
+    parser.add_argument("--batch-threads", type=int, default=16)
+    parser.add_argument("--ask-interval", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--latency", default="fixed:100", help="stub latency distribution (ms)")
+    parser.add_argument("--port", type=int, default=8098)
+    args = parser.parse_args()
+
+    os.environ["GEMINI_API_KEY"] = "benchmark"
+    os.environ["GEMINI_CACHE_SIZE"] = "0"
+    os.environ["GEMINI_API_BASE"] = f"http://127.0.0.1:{args.port}"
+    os.environ["GEMINI_POOL_SIZE"] = str(args.batch_threads + 2)
+    import logging
+    logging.disable(logging.CRITICAL)
+    from services.gemini_service import GeminiService
+    from services.rate_limiter import RateLimiter
+    from services.retry_policy import RetryBudget, RetryPolicy
+
+    server = stub_server.make_server("127.0.0.1", args.port, latency=args.latency, rpm_limit=args.quota)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_config = server.RequestHandlerClass.config
+    service = GeminiService()
+    prompts = itertools.count()
+
+    configs = [
+        ("no limiter", RateLimiter(max_in_flight=0), "interactive"),
+        ("limiter, one lane", RateLimiter(rpm=args.rpm, max_in_flight=args.max_in_flight,
+                                          interactive_reserve=0), "batch"),
+        ("limiter + lanes", RateLimiter(rpm=args.rpm, max_in_flight=args.max_in_flight,
+                                        interactive_reserve=args.reserve), "interactive"),
+    ]
+
+    print(f"stub quota {args.quota}/min, {args.batch_threads} batch threads, one ask every "
+          f"{args.ask_interval}s, {args.duration:.0f}s per run; limiter rpm {args.rpm}, "
+          f"{args.max_in_flight} in flight\n")
+    print(f"{'configuration':<20} {'429s':>6} {'batch ok':>9} {'batch fail':>11} "
+          f"{'ask ok':>7} {'ask p50 ms':>11} {'ask p95 ms':>11}")
+    for label, limiter, ask_lane in configs:
+        with stub_config.lock:
+            stub_config.recent.clear()
+            stub_config.stats.clear()
+        service.limiter = limiter
+        service.retry = RetryPolicy(budget=RetryBudget())
+        deadline = time.monotonic() + args.duration
+        batch = {"ok": 0, "fail": 0}
+        asks = []
+        lock = threading.Lock()
+
+        def batch_worker():
+            while time.monotonic() < deadline:
+                ok = service.call_gemini(f'Topic: "batch {next(prompts)}" "gaps"', lane="batch") is not None
+                with lock:
+                    batch["ok" if ok else "fail"] += 1
+
+        def ask_worker():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                answer = service.call_gemini(f"question {next(prompts)}", is_json=False, use_cache=False,
+                                             lane=ask_lane)
+                asks.append(((time.perf_counter() - start) * 1000, answer is not None))
+                time.sleep(args.ask_interval)
+
+        threads = [threading.Thread(target=batch_worker) for _ in range(args.batch_threads)]
+        threads.append(threading.Thread(target=ask_worker))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        throttled = stub_config.stats.get("generateContent", {}).get("throttled", 0)
+        p50, p95 = p50_p95([ms for ms, _ in asks])
+        print(f"{label:<20} {throttled:>6} {batch['ok']:>9} {batch['fail']:>11} "
+              f"{sum(ok for _, ok in asks):>3}/{len(asks):<3} {p50:>11} {p95:>11}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: success rate, upstream load and latency of Gemini calls under
+injected failures, with and without the retry policy and its budget.
+
+Gemini is the HTTP stub from loadtest/stub_server.py, failing a fraction of
+requests with 429 / 503 (which carry Retry-After: 1) or 500. For each error
+rate the same calls run with retries off, with retries and no budget, and
+with the default retry budget. Retry-After is honoured, so backoff delays
+are shortened to --scale of their value to keep the run quick.
+
+    python benchmarks/bench_retry_policy.py --calls 200 --concurrency 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "loadtest"))
+
+import stub_server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200, help="calls per error rate and policy")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="fixed:50", help="stub latency distribution (ms)")
+    parser.add_argument("--error-rates", default="0,0.05,0.2,0.5")
+    parser.add_argument("--scale", type=float, default=0.05, help="factor applied to every backoff sleep")
+    parser.add_argument("--port", type=int, default=8095)
+    args = parser.parse_args()
+
+    os.environ["GEMINI_API_KEY"] = "benchmark"
+    os.environ["GEMINI_CACHE_SIZE"] = "0"
+    os.environ["GEMINI_API_BASE"] = f"http://127.0.0.1:{args.port}"
+    os.environ["GEMINI_POOL_SIZE"] = str(args.concurrency)
+    import logging
+    logging.disable(logging.CRITICAL)
+    from services.gemini_service import GeminiService
+    from services.retry_policy import RetryBudget, RetryPolicy
+
+    server = stub_server.make_server("127.0.0.1", args.port, latency=args.latency, seed=11)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_config = server.RequestHandlerClass.config
+    service = GeminiService()
+    scaled_sleep = lambda seconds: time.sleep(seconds * args.scale)
+    policies = [
+        ("no retries", lambda: RetryPolicy(max_attempts=1)),
+        ("retries, no budget", lambda: RetryPolicy(sleep=scaled_sleep)),
+        ("retries + budget", lambda: RetryPolicy(sleep=scaled_sleep, budget=RetryBudget())),
+    ]
+
+    print(f"{args.calls} calls per row, concurrency {args.concurrency}, stub {args.latency}\n")
+    print(f"{'error rate':>10}  {'policy':<20} {'success':>8} {'attempts/call':>14} "
+          f"{'p50 ms':>8} {'p95 ms':>8}  outcomes")
+    for error_rate in [float(rate) for rate in args.error_rates.split(",")]:
+        for label, make_policy in policies:
+            stub_config.error_rate = error_rate
+            stub_config.rng.seed(11)
+            service.retry = make_policy()
+            latencies = []
+
+            def one_call(i):
+                start = time.perf_counter()
+                result = service.call_gemini(f'Topic: "retry benchmark {i}" return "gaps"')
+                latencies.append((time.perf_counter() - start) * 1000)
+                return result is not None
+
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                succeeded = sum(pool.map(one_call, range(args.calls)))
+
+            stats = service.get_retry_stats()
+            attempts = sum(stats["attempts"].values())
+            outcomes = ", ".join(f"{name} {count}" for name, count in sorted(stats["attempts"].items()))
+            print(f"{error_rate:>10.0%}  {label:<20} {succeeded / args.calls:>8.1%} "
+                  f"{attempts / args.calls:>14.2f} {statistics.median(latencies):>8.0f} "
+                  f"{statistics.quantiles(latencies, n=20)[18]:>8.0f}  {outcomes}")
+        print()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,17 @@ Service for interacting with Google Gemini API
 
 import os
 import json
+import threading
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable, Sequence, Iterator, Tuple
+
+from services.http_session import get_shared_session
+from services.json_stream import JSONStreamParser, parse_json
+from services.response_cache import ResponseCache, create_cache_from_env
+from services.retry_policy import get_shared_retry_policy
+from services.rate_limiter import RateLimitTimeout, estimate_tokens, get_shared_rate_limiter
+from services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -19,20 +27,50 @@ class GeminiService:
         self.api_key = os.getenv('GEMINI_API_KEY')
         # Available models: gemini-pro, gemini-1.5-pro, gemini-1.5-flash, gemini-2.0-flash-exp
         self.model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
-        self.base_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent"
+        # GEMINI_API_BASE points the service at a stand-in such as loadtest/stub_server.py
+        api_base = os.getenv('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com').rstrip('/')
+        self.base_url = f"{api_base}/v1beta/models/{self.model_name}:generateContent"
+        self.stream_url = f"{api_base}/v1beta/models/{self.model_name}:streamGenerateContent"
+        # Keep-alive connection pool shared by every GeminiService instance
+        self.http = get_shared_session()
+        # Retries 429/5xx/timeouts with backoff, within a process-wide retry budget
+        self.retry = get_shared_retry_policy()
+        # RPM / TPM buckets, in-flight cap and priority lanes, shared across processes
+        self.limiter = get_shared_rate_limiter()
+        # Expected answer tokens per call, for the TPM estimate before usage is known
+        self.answer_tokens = int(os.getenv('GEMINI_ANSWER_TOKENS_ESTIMATE', '1000'))
+        # Response cache (None when GEMINI_CACHE_SIZE=0)
+        self.cache = create_cache_from_env()
+        # Coalesces identical in-flight requests
+        self.flight = SingleFlight()
+        # Counters for call_gemini_packed
+        self.packing_stats = {"packed_calls": 0, "packed_items": 0, "unpacked_items": 0,
+                              "fallback_items": 0, "cached_items": 0}
+        self.packing_lock = threading.Lock()
+        # How JSON answers were parsed: strict, repaired, truncated (repaired) or failed
+        self.parse_stats = {"strict": 0, "repaired": 0, "truncated": 0, "failed": 0,
+                            "streams": 0, "streamed_fields": 0}
+        self.parse_lock = threading.Lock()
+        # How the calling thread's last _send_request answer was parsed
+        self.last_parse = threading.local()
         
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not set in environment variables")
         else:
             logger.info(f"Initialized Gemini service with model: {self.model_name}")
     
-    def call_gemini(self, prompt: str, is_json: bool = True) -> Optional[Any]:
+    def call_gemini(self, prompt: str, is_json: bool = True, use_cache: bool = True,
+                    lane: str = "default") -> Optional[Any]:
         """
         Call Google Gemini API with a prompt
         
         Args:
             prompt: The prompt to send to Gemini
             is_json: Whether to parse the response as JSON (default: True)
+            use_cache: Whether the response may be served from / stored in the
+                response cache and shared with identical concurrent calls
+                (disable for non-deterministic calls)
+            lane: Rate limiter priority lane ("interactive", "default" or "batch")
         
         Returns:
             Parsed JSON response if is_json=True, otherwise raw text response
@@ -42,22 +80,323 @@ class GeminiService:
             logger.error("GEMINI_API_KEY not configured")
             return None
         
+        payload = self._build_payload(prompt, is_json)
+        
+        if not use_cache:
+            return self._send_request(payload, is_json, lane=lane)
+        
+        request_key = self._request_key(prompt, is_json, payload)
+        
+        if self.cache is not None:
+            found, cached = self.cache.get(request_key)
+            if found:
+                logger.info(f"Serving Gemini response from cache (model: {self.model_name}, is_json={is_json})")
+                return cached
+        
+        # Identical concurrent requests wait for one upstream call and share its result,
+        # unless the answer was cut off; waiters then make their own call
+        result, _ = self.flight.do(
+            request_key,
+            lambda: self._fetch_and_store(request_key, payload, is_json, lane),
+            shareable=lambda outcome: not outcome[1]
+        )
+        return result
+    
+    def call_gemini_packed(self, item_prompts: Dict[str, str], pack_prompt: Callable[[List[str]], str],
+                           required_keys: Sequence[str] = (), lane: str = "default") -> Dict[str, Optional[Any]]:
+        """
+        Answer several independent JSON prompts with a single Gemini call
+        
+        Items already in the response cache are served from it. The rest are
+        sent as one packed prompt whose answer must be a JSON array of
+        objects tagged with the item's key in an "id" field. Each object is
+        cached as the answer to the item's own prompt. An item whose object
+        is missing, not an object or lacks a required key is retried with
+        its own call_gemini call.
+        
+        Args:
+            item_prompts: Mapping of item key -> the item's standalone prompt
+            pack_prompt: Builds the packed prompt for a list of item keys
+            required_keys: Keys every per-item object must contain
+            lane: Rate limiter priority lane
+        
+        Returns:
+            Mapping of item key -> parsed JSON result (None if even the
+            individual call failed)
+        """
+        results = {}
+        pending = []
+        for key, prompt in item_prompts.items():
+            found = False
+            if self.cache is not None:
+                found, cached = self.cache.get(self._request_key(prompt, True, self._build_payload(prompt, True)))
+                if found:
+                    results[key] = cached
+            if not found:
+                pending.append(key)
+        
+        self._count_packing("cached_items", len(item_prompts) - len(pending))
+        
+        if len(pending) > 1 and self.api_key:
+            logger.info(f"Packing {len(pending)} prompts into one Gemini call")
+            self.last_parse.how = None
+            answer = self._send_request(self._build_payload(pack_prompt(pending), True), True, lane=lane)
+            # Items of a cut-off answer are used but not cached
+            truncated = getattr(self.last_parse, "how", None) == "truncated"
+            self._count_packing("packed_calls")
+            self._count_packing("packed_items", len(pending))
+            
+            for key, item in self._split_packed_answer(answer).items():
+                if key not in pending or not isinstance(item, dict):
+                    continue
+                item = {k: v for k, v in item.items() if k != "id"}
+                if any(k not in item for k in required_keys):
+                    continue
+                results[key] = item
+                pending.remove(key)
+                self._count_packing("unpacked_items")
+                if self.cache is not None and not truncated:
+                    prompt = item_prompts[key]
+                    self.cache.set(self._request_key(prompt, True, self._build_payload(prompt, True)), item)
+            
+            if pending:
+                logger.warning(f"{len(pending)} packed items missing or malformed; calling them individually")
+                self._count_packing("fallback_items", len(pending))
+        
+        for key in pending:
+            results[key] = self.call_gemini(item_prompts[key], is_json=True, lane=lane)
+        
+        return results
+    
+    def stream_gemini_json(self, prompt: str, use_cache: bool = True,
+                           lane: str = "default") -> Iterator[Tuple[Any, Any]]:
+        """
+        Call Gemini for a JSON answer and yield its top-level fields as they arrive
+        
+        The answer is streamed (streamGenerateContent) and parsed
+        incrementally, so each field of the root object is yielded as soon as
+        it closes instead of after the whole answer. Fence noise, trailing
+        commas and a cut-off ending are repaired; a field that cannot be
+        repaired is skipped. The assembled answer is cached like the result
+        of call_gemini(prompt), and a cached answer is replayed at once.
+        
+        Args:
+            prompt: The prompt to send to Gemini
+            use_cache: Whether the answer may be served from / stored in the
+                response cache
+            lane: Rate limiter priority lane
+        
+        Yields:
+            (key, value) for each top-level field of the answer, or (index,
+            element) when the answer is an array; nothing if the call fails
+        """
+        if not self.api_key:
+            logger.error("GEMINI_API_KEY not configured")
+            return
+        
+        payload = self._build_payload(prompt, True)
+        request_key = self._request_key(prompt, True, payload)
+        if use_cache and self.cache is not None:
+            found, cached = self.cache.get(request_key)
+            if found:
+                logger.info(f"Serving streamed Gemini response from cache (model: {self.model_name})")
+                yield from cached.items() if isinstance(cached, dict) else enumerate(cached)
+                return
+        
+        parser = JSONStreamParser()
+        fields = []
+        try:
+            for chunk in self._stream_text(payload, lane):
+                for field in parser.feed(chunk):
+                    fields.append(field)
+                    yield field
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request exception when streaming from Gemini API: {str(e)}")
+        except RateLimitTimeout as e:
+            logger.error(str(e))
+        # A stream that ended early still yields its last field, repaired
+        for field in parser.close():
+            fields.append(field)
+            yield field
+        
+        self._count_parse("streams")
+        self._count_parse("streamed_fields", len(fields))
+        if parser.root is None:
+            self._count_parse("failed")
+            return
+        self._count_parse("truncated" if parser.truncated else "repaired" if parser.repaired_fields else "strict")
+        # A cut-off stream may just be a dropped connection, so only whole answers are cached
+        if use_cache and self.cache is not None and not parser.truncated and fields:
+            self.cache.set(request_key, dict(fields) if parser.root == "{" else [value for _, value in fields])
+    
+    def _stream_text(self, payload: Dict[str, Any], lane: str) -> Iterator[str]:
+        """
+        Send a payload to streamGenerateContent and yield the answer text as it arrives
+        
+        Only opening the stream is retried; once text has been yielded a
+        failure ends the stream.
+        
+        Args:
+            payload: generateContent request body
+            lane: Rate limiter priority lane
+        
+        Yields:
+            Text deltas of the first candidate
+        """
+        url = f"{self.stream_url}?alt=sse&key={self.api_key}"
+        headers = {
+            "Content-Type": "application/json"
+        }
+        tokens = estimate_tokens(payload["contents"][0]["parts"][0]["text"], self.answer_tokens)
+        leases = []
+        
+        def attempt() -> requests.Response:
+            # Each attempt holds its own lease; the successful one is kept until the stream ends
+            lease = self.limiter.acquire(lane, tokens)
+            try:
+                response = self.http.post(url, json=payload, headers=headers, stream=True)
+            except BaseException:
+                lease.release()
+                raise
+            if response.status_code == 200:
+                leases.append(lease)
+            else:
+                response.content  # read the error body so the connection goes back to the pool
+                lease.release()
+            return response
+        
+        logger.info(f"Streaming from Gemini API (model: {self.model_name})")
+        response = self.retry.call(attempt)
+        if response.status_code != 200:
+            logger.error(f"Gemini API returned status {response.status_code}")
+            logger.error(f"Error details: {response.text}")
+            return
+        
+        lease = leases[-1]
         try:
-            # Prepare request payload
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                try:
+                    event = json.loads(line[5:])
+                except ValueError:
+                    logger.warning("Skipping malformed event in Gemini stream")
+                    continue
+                if "usageMetadata" in event:
+                    lease.record_usage(event["usageMetadata"].get("totalTokenCount"))
+                for candidate in event.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+        finally:
+            response.close()
+            lease.release()
+    
+    @staticmethod
+    def _split_packed_answer(answer: Any) -> Dict[str, Any]:
+        """
+        Index a packed answer by item id
+        
+        Accepts the requested JSON array, or an object wrapping it (e.g.
+        {"results": [...]}) or keyed by id.
+        
+        Args:
+            answer: Parsed JSON answer to a packed prompt (None on failure)
+        
+        Returns:
+            Mapping of item id -> item object
+        """
+        if isinstance(answer, dict):
+            arrays = [value for value in answer.values() if isinstance(value, list)]
+            if len(arrays) == 1:
+                answer = arrays[0]
+            else:
+                return {str(key): value for key, value in answer.items()}
+        if not isinstance(answer, list):
+            return {}
+        return {
+            str(item["id"]): item
+            for item in answer
+            if isinstance(item, dict) and "id" in item
+        }
+    
+    def _count_packing(self, name: str, amount: int = 1):
+        with self.packing_lock:
+            self.packing_stats[name] += amount
+    
+    def _count_parse(self, name: str, amount: int = 1):
+        with self.parse_lock:
+            self.parse_stats[name] += amount
+    
+    def _build_payload(self, prompt: str, is_json: bool) -> Dict[str, Any]:
+        """
+        Build the generateContent request body for a prompt
+        
+        Args:
+            prompt: The prompt to send to Gemini
+            is_json: Whether to request a JSON response
+        
+        Returns:
+            Request payload dictionary
+        """
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
                 }]
+            }]
+        }
+        
+        # Add JSON response format if needed
+        if is_json:
+            payload["generationConfig"] = {
+                "response_mime_type": "application/json"
             }
-            
-            # Add JSON response format if needed
-            if is_json:
-                payload["generationConfig"] = {
-                    "response_mime_type": "application/json"
-                }
-            
+        
+        return payload
+    
+    def _request_key(self, prompt: str, is_json: bool, payload: Dict[str, Any]) -> str:
+        """Cache / coalescing key of a request"""
+        return ResponseCache.make_key(self.model_name, prompt, is_json, payload.get("generationConfig"))
+    
+    def _fetch_and_store(self, request_key: str, payload: Dict[str, Any], is_json: bool,
+                         lane: str = "default") -> Tuple[Optional[Any], bool]:
+        """
+        Call Gemini and cache a successful, complete result
+        
+        Args:
+            request_key: Cache key of the request
+            payload: generateContent request body
+            is_json: Whether to parse the response as JSON
+            lane: Rate limiter priority lane
+        
+        Returns:
+            (parsed JSON or raw text response, None if the call fails;
+            whether the JSON answer was cut off and repaired)
+        """
+        self.last_parse.how = None
+        result = self._send_request(payload, is_json, lane=lane)
+        truncated = getattr(self.last_parse, "how", None) == "truncated"
+        
+        # Failures and cut-off answers are never cached so the next call retries upstream
+        if self.cache is not None and result is not None and not truncated:
+            self.cache.set(request_key, result)
+        
+        return result, truncated
+    
+    def _send_request(self, payload: Dict[str, Any], is_json: bool, lane: str = "default") -> Optional[Any]:
+        """
+        Send a prepared payload to Gemini and extract the response
+        
+        Args:
+            payload: generateContent request body
+            is_json: Whether to parse the response as JSON
+            lane: Rate limiter priority lane
+        
+        Returns:
+            Parsed JSON or raw text response, None if the call fails
+        """
+        try:
             # Make API request
             url = f"{self.base_url}?key={self.api_key}"
             headers = {
@@ -67,7 +406,8 @@ class GeminiService:
             logger.info(f"Making request to Gemini API (model: {self.model_name}, is_json={is_json})")
             logger.debug(f"Request URL: {self.base_url.split('?')[0]}")  # Log without API key
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            tokens = estimate_tokens(payload["contents"][0]["parts"][0]["text"], self.answer_tokens)
+            response = self.retry.call(lambda: self._post(url, payload, headers, lane, tokens))
             
             # Check response status
             if response.status_code != 200:
@@ -96,25 +436,20 @@ class GeminiService:
                     text_content = candidate['content']['parts'][0].get('text', '')
                     
                     if is_json:
-                        # Try to parse as JSON
+                        # Markdown fences, trailing commas and a cut-off ending are repaired
                         try:
-                            # Remove markdown code blocks if present
-                            text_content = text_content.strip()
-                            if text_content.startswith('```json'):
-                                text_content = text_content[7:]
-                            if text_content.startswith('```'):
-                                text_content = text_content[3:]
-                            if text_content.endswith('```'):
-                                text_content = text_content[:-3]
-                            text_content = text_content.strip()
-                            
-                            parsed_json = json.loads(text_content)
-                            logger.info("Successfully parsed JSON response from Gemini")
-                            return parsed_json
-                        except json.JSONDecodeError as e:
+                            parsed_json, how = parse_json(text_content)
+                        except ValueError as e:
+                            self._count_parse("failed")
                             logger.error(f"Failed to parse JSON response: {e}")
                             logger.error(f"Response text: {text_content[:200]}")
                             return None
+                        self._count_parse(how)
+                        self.last_parse.how = how
+                        if how != "strict":
+                            logger.warning(f"Gemini returned malformed JSON ({how}); using the repaired answer")
+                        logger.info("Successfully parsed JSON response from Gemini")
+                        return parsed_json
                     else:
                         # Return raw text
                         return text_content
@@ -125,7 +460,106 @@ class GeminiService:
         except requests.exceptions.RequestException as e:
             logger.error(f"Request exception when calling Gemini API: {str(e)}")
             return None
+        except RateLimitTimeout as e:
+            logger.error(str(e))
+            return None
         except Exception as e:
             logger.error(f"Unexpected error when calling Gemini API: {str(e)}")
             return None
-
+    
+    def _post(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], lane: str,
+              tokens: int) -> requests.Response:
+        """
+        Send one attempt once the rate limiter admits it
+        
+        Args:
+            url: generateContent URL including the API key
+            payload: generateContent request body
+            headers: Request headers
+            lane: Rate limiter priority lane
+            tokens: Estimated tokens of the call
+        
+        Returns:
+            The requests Response object
+        """
+        with self.limiter.acquire(lane, tokens) as lease:
+            response = self.http.post(url, json=payload, headers=headers)
+            if response.status_code == 200:
+                try:
+                    lease.record_usage(response.json().get("usageMetadata", {}).get("totalTokenCount"))
+                except ValueError:
+                    pass
+            return response
+    
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """
+        Get rate limiter statistics
+        
+        Returns:
+            Dictionary with limits, calls in flight, bucket levels and per-lane waits
+        """
+        return self.limiter.get_stats()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for the Gemini endpoint
+        
+        Returns:
+            Dictionary with created vs. reused connection counts
+        """
+        return self.http.get_stats()
+    
+    def get_retry_stats(self) -> Dict[str, Any]:
+        """
+        Get retry statistics
+        
+        Returns:
+            Dictionary with attempt counts per outcome and retry decisions
+        """
+        return self.retry.get_stats()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get response cache statistics
+        
+        Returns:
+            Dictionary with hit/miss/eviction counters, or {"enabled": False}
+        """
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """
+        Get request coalescing statistics
+        
+        Returns:
+            Dictionary with upstream executions and coalesced waiter counts
+        """
+        return self.flight.get_stats()
+    
+    def get_parse_stats(self) -> Dict[str, Any]:
+        """
+        Get JSON answer parsing statistics
+        
+        Returns:
+            Dictionary with answers parsed strictly, repaired (fences, trailing
+            commas), truncated (a cut-off ending closed) and failed, plus
+            streamed calls and the fields they yielded
+        """
+        with self.parse_lock:
+            return dict(self.parse_stats)
+    
+    def get_packing_stats(self) -> Dict[str, Any]:
+        """
+        Get prompt packing statistics
+        
+        Returns:
+            Dictionary with packed calls, items answered from packed calls,
+            items retried individually and items served from the cache;
+            calls_saved is items answered minus packed calls made
+        """
+        with self.packing_lock:
+            stats = dict(self.packing_stats)
+        stats["calls_saved"] = stats["unpacked_items"] - stats["packed_calls"]
+        return stats
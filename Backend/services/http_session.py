@@ -0,0 +1,122 @@
+"""
+Shared keep-alive HTTP session for outbound API calls
+"""
+
+import os
+import threading
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class PooledHTTPSession:
+    """Thread-safe HTTP session backed by a bounded urllib3 connection pool"""
+
+    def __init__(self, pool_size: int = 10, connect_timeout: float = 5.0, read_timeout: float = 30.0):
+        """
+        Initialize the pooled session
+
+        Args:
+            pool_size: Maximum number of keep-alive connections kept per host
+            connect_timeout: Seconds to wait for the TCP/TLS connection
+            read_timeout: Seconds to wait for the response body
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # max_retries=0: retrying is a policy decision, not a transport one
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple understood by requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """
+        POST through the shared pool
+
+        Args:
+            url: Target URL
+            **kwargs: Extra arguments forwarded to requests
+
+        Returns:
+            The requests Response object
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Collect connection reuse statistics from the underlying pools
+
+        Returns:
+            Dictionary with per-host and total created/reused connection counts
+        """
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            created = pool.num_connections
+            requests_sent = pool.num_requests
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": requests_sent,
+                "connections_created": created,
+                "connections_reused": max(requests_sent - created, 0)
+            }
+
+        return {
+            "pool_size": self.pool_size,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "requests": sum(h["requests"] for h in hosts.values()),
+            "connections_created": sum(h["connections_created"] for h in hosts.values()),
+            "connections_reused": sum(h["connections_reused"] for h in hosts.values()),
+            "hosts": hosts
+        }
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+_shared_session: Optional[PooledHTTPSession] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_session() -> PooledHTTPSession:
+    """
+    Return the process-wide pooled session, creating it on first use
+
+    Pool size and timeouts are read from GEMINI_POOL_SIZE,
+    GEMINI_CONNECT_TIMEOUT and GEMINI_READ_TIMEOUT.
+
+    Returns:
+        The shared PooledHTTPSession instance
+    """
+    global _shared_session
+    if _shared_session is None:
+        with _shared_lock:
+            if _shared_session is None:
+                _shared_session = PooledHTTPSession(
+                    pool_size=int(os.getenv('GEMINI_POOL_SIZE', '10')),
+                    connect_timeout=float(os.getenv('GEMINI_CONNECT_TIMEOUT', '5')),
+                    read_timeout=float(os.getenv('GEMINI_READ_TIMEOUT', '30'))
+                )
+                logger.info(f"Created shared HTTP pool (size={_shared_session.pool_size})")
+    return _shared_session
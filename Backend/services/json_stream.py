@@ -0,0 +1,259 @@
+"""
+Incremental parsing and repair of JSON answers from Gemini
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# Half-written true / false / null at the end of a cut-off answer
+_PARTIAL_LITERAL = re.compile(r'(?<![\w"])(t|tr|tru|f|fa|fal|fals|n|nu|nul)$')
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+# Number cut off after its sign, decimal point or exponent marker
+_PARTIAL_NUMBER = re.compile(r'(?<=\d)[.eE+-]+$')
+# Cut-off \uXXXX escape at the end of an unterminated string
+_PARTIAL_UNICODE_ESCAPE = re.compile(r'\\u[0-9a-fA-F]{0,3}$')
+# Next character inside a string that ends it or starts an escape
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+def _drop_trailing_comma(out: List[str]):
+    """Remove a comma that is the last non-whitespace character of out"""
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i:]
+
+
+def _last_significant(out: List[str]) -> str:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    return out[i] if i >= 0 else ""
+
+
+def repair_json(text: str) -> Tuple[str, bool]:
+    """
+    Turn the JSON part of a model answer into valid JSON text
+
+    Skips anything before the first { or [ (prose, ``` fences) and after the
+    value it opens, and drops trailing commas. An answer that was cut off is
+    closed: an unterminated string is ended, a half-written literal or number
+    is completed, a key left without a value is dropped, and open objects
+    and arrays are closed.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        (repaired JSON text, whether the value was cut off); the text is ""
+        when the output holds no object or array
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return "", False
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    # Position in out of the last object key's opening quote, while it is the last thing written
+    key_start: Optional[int] = None
+    for ch in text[min(starts):]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            is_key = bool(stack) and stack[-1] == "{" and _last_significant(out) in ("{", ",")
+            key_start = len(out) if is_key else None
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            key_start = None
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            out.append("}" if stack.pop() == "{" else "]")
+            if not stack:
+                return "".join(out), False
+            key_start = None
+            continue
+        elif ch == "`":
+            # Fence noise inside the value
+            continue
+        elif not ch.isspace():
+            if ch != ":":
+                key_start = None
+        out.append(ch)
+
+    repaired = "".join(out)
+    if in_string:
+        if escape:
+            repaired = repaired[:-1]
+        repaired = _PARTIAL_UNICODE_ESCAPE.sub("", repaired) + '"'
+    tail = repaired.rstrip()
+    if key_start is not None:
+        # A key with no value yet ("key" or "key":) is dropped
+        tail = repaired[:key_start].rstrip()
+    if tail.endswith(","):
+        tail = tail[:-1].rstrip()
+    literal = _PARTIAL_LITERAL.search(tail)
+    if literal:
+        tail = tail[:literal.start()] + _LITERALS[literal.group(1)[0]]
+    tail = _PARTIAL_NUMBER.sub("", tail)
+    if tail.endswith("-"):
+        tail = tail[:-1] + "null"
+    closing = "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+    return tail + closing, True
+
+
+def parse_json(text: str) -> Tuple[Any, str]:
+    """
+    Parse a model answer as JSON, repairing it when the strict parse fails
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        (parsed value, how it was parsed: "strict", "repaired" or "truncated")
+
+    Raises:
+        ValueError: If no JSON object or array can be recovered
+    """
+    try:
+        return json.loads(text), "strict"
+    except ValueError:
+        pass
+    repaired, truncated = repair_json(text)
+    if not repaired:
+        raise ValueError("No JSON object or array in the answer")
+    # strict=False accepts raw newlines and tabs inside strings
+    return json.loads(repaired, strict=False), "truncated" if truncated else "repaired"
+
+
+class JSONStreamParser:
+    """
+    Incremental parser emitting the top-level fields of a streamed JSON answer
+
+    feed() takes the answer text as it arrives and returns the fields of the
+    root value that closed in it: (key, value) pairs for an object, (index,
+    element) for an array. Each field is parsed on its own as soon as the
+    comma or bracket after it arrives, so one malformed field is repaired
+    (or, failing that, skipped) without losing the others. Text before the
+    root value (prose, ``` fences) and after it is ignored. close() flushes
+    the field a cut-off answer ended in.
+    """
+
+    def __init__(self):
+        """Initialize a parser waiting for the root value"""
+        self.root: Optional[str] = None
+        self.complete = False
+        self.truncated = False
+        self.repaired_fields = 0
+        self.skipped_fields = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member: List[str] = []
+        self._index = 0
+
+    def feed(self, chunk: str) -> List[Tuple[Any, Any]]:
+        """
+        Parse the next piece of the answer
+
+        Args:
+            chunk: Answer text that arrived since the last call
+
+        Returns:
+            Fields completed by this chunk, in order
+        """
+        fields: List[Tuple[Any, Any]] = []
+        i = 0
+        n = len(chunk)
+        while i < n and not self.complete:
+            if self.root is None:
+                starts = [j for j in (chunk.find("{", i), chunk.find("[", i)) if j >= 0]
+                if not starts:
+                    break
+                i = min(starts)
+                self.root = chunk[i]
+                self._depth = 1
+                i += 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._member.append(chunk[i])
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, i)
+                end = match.start() if match else n
+                self._member.append(chunk[i:end])
+                if match:
+                    self._member.append(match.group())
+                    if match.group() == "\\":
+                        self._escape = True
+                    else:
+                        self._in_string = False
+                    end += 1
+                i = end
+                continue
+            ch = chunk[i]
+            i += 1
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_member(fields, cut_off=False)
+                    self.complete = True
+                    break
+            elif ch == "," and self._depth == 1:
+                self._finish_member(fields, cut_off=False)
+                continue
+            self._member.append(ch)
+        return fields
+
+    def close(self) -> List[Tuple[Any, Any]]:
+        """
+        End the stream
+
+        Returns:
+            The field the answer was cut off in, repaired, if it has a value
+        """
+        fields: List[Tuple[Any, Any]] = []
+        if self.root is not None and not self.complete:
+            self._finish_member(fields, cut_off=True)
+            self.complete = True
+            self.truncated = True
+        return fields
+
+    def _finish_member(self, fields: List[Tuple[Any, Any]], cut_off: bool):
+        """Parse the text collected since the last top-level comma and add its field(s)"""
+        text = "".join(self._member).strip()
+        self._member = []
+        if not text:
+            # Empty object or array, or a trailing comma
+            return
+        source = f"{self.root}{text}{'' if cut_off else ('}' if self.root == '{' else ']')}"
+        try:
+            value, how = parse_json(source)
+        except ValueError:
+            self.skipped_fields += 1
+            return
+        if how != "strict":
+            self.repaired_fields += 1
+        if self.root == "{":
+            fields.extend(value.items() if isinstance(value, dict) else [])
+        else:
+            for element in value if isinstance(value, list) else []:
+                fields.append((self._index, element))
+                self._index += 1
@@ -86,6 +86,61 @@ Analyze the questions and provide a comprehensive methodology recommendation:
   - qualitative_tools: Array of qualitative tools with detailed descriptions
   - quantitative_tools: Array of quantitative tools with detailed descriptions
 
+Each tool should include the tool name followed by a colon and detailed description of how it will be used."""
+        
+        return prompt
+    
+    @staticmethod
+    def get_packed_questions_methodology_prompt(question_sets: dict) -> str:
+        """
+        Generate one prompt answering several independent question sets
+        
+        The answer is a JSON array with one get_questions_methodology_prompt
+        style object per set, tagged with the set's id, so it can be split
+        back into per-set results.
+        
+        Args:
+            question_sets: Mapping of id -> {"main_question": str, "sub_questions": list}
+        
+        Returns:
+            Formatted prompt string
+        """
+        sets_text = "\n\n".join(
+            f"ID: {set_id}\nMAIN RESEARCH QUESTION:\n{question_set['main_question']}\nSUB-QUESTIONS:\n"
+            + "\n".join([f"  - {q}" for q in question_set['sub_questions']])
+            for set_id, question_set in question_sets.items()
+        )
+        
+        prompt = f"""You are an expert academic research supervisor specializing in research methodology.
+
+Below are {len(question_sets)} INDEPENDENT sets of research questions, each with an ID. For EACH set, recommend the most suitable research methodology exactly as you would if it were the only set. Do not let the sets influence each other.
+
+Return the answer strictly as a JSON array with exactly one object per set, each with this EXACT structure:
+[
+  {{
+    "id": "the ID of the set",
+    "recommended_methodology": "string",
+    "justification": "string",
+    "study_design": "string",
+    "data_collection_tools": {{
+      "qualitative_tools": ["tool1 with description", "tool2 with description"],
+      "quantitative_tools": ["tool1 with description", "tool2 with description"]
+    }}
+  }}
+]
+
+QUESTION SETS:
+
+{sets_text}
+
+For each set, analyze its questions and provide a comprehensive methodology recommendation:
+- recommended_methodology: Type of methodology (e.g., "Mixed-Methods Approach", "Qualitative", "Quantitative")
+- justification: Detailed explanation of why this methodology is appropriate for these questions
+- study_design: Specific design approach (e.g., "Convergent Parallel Mixed Methods Design", "Sequential Explanatory Design")
+- data_collection_tools: Object with two arrays:
+  - qualitative_tools: Array of qualitative tools with detailed descriptions
+  - quantitative_tools: Array of quantitative tools with detailed descriptions
+
 Each tool should include the tool name followed by a colon and detailed description of how it will be used."""
         
         return prompt
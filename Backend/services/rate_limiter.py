@@ -0,0 +1,357 @@
+"""
+Cross-process rate limiter for outbound Gemini calls
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower number = served first
+LANES = {"interactive": 0, "default": 1, "batch": 2}
+
+# Waiters that stop polling for this long (crashed or killed) no longer block lower lanes
+WAITER_STALE_SECONDS = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    lane TEXT NOT NULL,
+    acquired REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waiters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call is not admitted within the acquire timeout"""
+
+
+class Lease:
+    """Admission of one Gemini call; release it (or leave the with-block) when the call ends"""
+
+    def __init__(self, limiter: "RateLimiter", lease_id: Optional[int], estimated_tokens: float):
+        self.limiter = limiter
+        self.lease_id = lease_id
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens: Optional[float] = None
+
+    def record_usage(self, total_tokens: Optional[float]):
+        """Report the tokens the call really used, to correct the TPM estimate"""
+        self.used_tokens = total_tokens
+
+    def release(self):
+        if self.lease_id is not None:
+            self.limiter.release(self)
+            self.lease_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute plus a max-in-flight cap,
+    kept in SQLite so every process using the same db_path shares one budget
+
+    Callers wait in priority lanes: a call is admitted only when no live
+    waiter of a higher-priority lane is queued, and the last
+    `interactive_reserve` in-flight slots are kept for the interactive lane.
+    """
+
+    def __init__(self, db_path: str = ":memory:", rpm: float = 0, tpm: float = 0,
+                 max_in_flight: int = 32, interactive_reserve: int = 4,
+                 acquire_timeout: float = 30.0, lease_ttl: float = 300.0, poll_interval: float = 0.05,
+                 burst_seconds: float = 10.0):
+        """
+        Initialize the limiter
+
+        Args:
+            db_path: SQLite file shared by cooperating processes (":memory:" for this process only)
+            rpm: Requests per minute (0 for no limit)
+            tpm: Estimated tokens per minute (0 for no limit)
+            max_in_flight: Concurrent calls across all processes (0 for no limit)
+            interactive_reserve: In-flight slots only the interactive lane may use
+            acquire_timeout: Seconds a call may wait for admission
+            lease_ttl: Seconds after which an unreleased lease is considered leaked
+            poll_interval: Longest sleep between admission attempts
+            burst_seconds: Bucket capacity in seconds of refill; any 60 seconds admit
+                at most (60 + burst_seconds) / 60 times the per-minute limit
+        """
+        self.db_path = db_path
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_in_flight = max_in_flight
+        self.interactive_reserve = min(interactive_reserve, max(max_in_flight - 1, 0))
+        self.acquire_timeout = acquire_timeout
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.burst_seconds = burst_seconds
+        self.pid = os.getpid()
+
+        self.conn = sqlite3.connect(db_path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.conn_lock = threading.Lock()
+        with self.conn_lock:
+            if db_path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+        self.stats = {lane: {"acquired": 0, "waited": 0, "wait_ms": 0.0, "timeouts": 0} for lane in LANES}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm or self.max_in_flight)
+
+    def acquire(self, lane: str = "default", tokens: float = 0) -> Lease:
+        """
+        Wait until a call may be sent
+
+        Args:
+            lane: "interactive", "default" or "batch"
+            tokens: Estimated tokens of the call (prompt and answer)
+
+        Returns:
+            A Lease to release when the call ends
+
+        Raises:
+            RateLimitTimeout: when not admitted within acquire_timeout
+        """
+        priority = LANES.get(lane, LANES["default"])
+        if not self.enabled:
+            return Lease(self, None, tokens)
+
+        started = time.monotonic()
+        waiter_id = None
+        try:
+            while True:
+                lease_id, wait, waiter_id = self._try_acquire(lane, priority, tokens, waiter_id)
+                if lease_id is not None:
+                    self._count(lane, started)
+                    return Lease(self, lease_id, tokens)
+                if time.monotonic() - started + min(wait, self.poll_interval) > self.acquire_timeout:
+                    with self.stats_lock:
+                        self.stats[lane]["timeouts"] += 1
+                    raise RateLimitTimeout(f"Gemini rate limit: not admitted within {self.acquire_timeout}s")
+                time.sleep(min(wait, self.poll_interval))
+        finally:
+            if waiter_id is not None:
+                self._execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+
+    def _try_acquire(self, lane: str, priority: int, tokens: float, waiter_id: Optional[int]):
+        """One admission attempt: (lease id or None, seconds to wait, waiter id)"""
+        now = time.time()
+        with self.conn_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM waiters WHERE heartbeat < ?", (now - WAITER_STALE_SECONDS,))
+                ahead = self.conn.execute(
+                    "SELECT COUNT(*) FROM waiters WHERE priority < ?", (priority,)
+                ).fetchone()[0]
+
+                wait = 0.0
+                if ahead:
+                    wait = self.poll_interval
+                if not wait and self.max_in_flight:
+                    wait = self._in_flight_wait(priority, now)
+                rpm_tokens = tpm_tokens = None
+                if not wait and self.rpm:
+                    rpm_tokens, wait = self._bucket("rpm", self.rpm, 1, now)
+                if not wait and self.tpm:
+                    tpm_tokens, wait = self._bucket("tpm", self.tpm, self._tpm_cost(tokens), now)
+
+                if wait:
+                    if waiter_id is None:
+                        waiter_id = self.conn.execute(
+                            "INSERT INTO waiters (pid, priority, heartbeat) VALUES (?, ?, ?)",
+                            (self.pid, priority, now)
+                        ).lastrowid
+                    else:
+                        self.conn.execute("UPDATE waiters SET heartbeat = ? WHERE id = ?", (now, waiter_id))
+                    self.conn.execute("COMMIT")
+                    return None, wait, waiter_id
+
+                if rpm_tokens is not None:
+                    self._store("rpm", rpm_tokens - 1, now)
+                if tpm_tokens is not None:
+                    self._store("tpm", tpm_tokens - self._tpm_cost(tokens), now)
+                lease_id = self.conn.execute(
+                    "INSERT INTO leases (pid, lane, acquired) VALUES (?, ?, ?)", (self.pid, lane, now)
+                ).lastrowid
+                if waiter_id is not None:
+                    self.conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+                self.conn.execute("COMMIT")
+                return lease_id, 0.0, None
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _in_flight_wait(self, priority: int, now: float) -> float:
+        self.conn.execute("DELETE FROM leases WHERE acquired < ?", (now - self.lease_ttl,))
+        in_flight = self.conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+        limit = self.max_in_flight
+        if priority > LANES["interactive"]:
+            limit -= self.interactive_reserve
+        if in_flight < limit:
+            return 0.0
+        # Leases of processes that died without releasing free up their slots
+        for (pid,) in self.conn.execute("SELECT DISTINCT pid FROM leases").fetchall():
+            if not _pid_alive(pid):
+                self.conn.execute("DELETE FROM leases WHERE pid = ?", (pid,))
+        in_flight = self.conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+        return 0.0 if in_flight < limit else self.poll_interval
+
+    def _capacity(self, per_minute: float) -> float:
+        return max(1.0, per_minute * self.burst_seconds / 60.0)
+
+    def _tpm_cost(self, tokens: float) -> float:
+        # A call larger than the bucket would never be admitted; it takes the whole bucket
+        return min(tokens, self._capacity(self.tpm))
+
+    def _bucket(self, name: str, per_minute: float, cost: float, now: float):
+        """(tokens after refill, seconds until `cost` is available)"""
+        row = self.conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        rate = per_minute / 60.0
+        capacity = self._capacity(per_minute)
+        if row is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+        if tokens >= cost:
+            return tokens, 0.0
+        return tokens, (cost - tokens) / rate
+
+    def _store(self, name: str, tokens: float, now: float):
+        self.conn.execute(
+            "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+            (name, tokens, now)
+        )
+
+    def release(self, lease: Lease):
+        """Free the lease's in-flight slot and settle its TPM estimate against real usage"""
+        with self.conn_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM leases WHERE id = ?", (lease.lease_id,))
+                if self.tpm and lease.used_tokens is not None:
+                    now = time.time()
+                    tokens, _ = self._bucket("tpm", self.tpm, 0, now)
+                    # Over-estimates are refunded; under-estimates become debt
+                    refund = self._tpm_cost(lease.estimated_tokens) - lease.used_tokens
+                    self._store("tpm", min(self._capacity(self.tpm), tokens + refund), now)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _execute(self, sql: str, params=()):
+        with self.conn_lock:
+            self.conn.execute(sql, params)
+
+    def _count(self, lane: str, started: float):
+        waited = (time.monotonic() - started) * 1000
+        with self.stats_lock:
+            stats = self.stats[lane]
+            stats["acquired"] += 1
+            if waited >= 1:
+                stats["waited"] += 1
+                stats["wait_ms"] += waited
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get limiter configuration, shared state and per-lane counters
+
+        Returns:
+            Dictionary with limits, calls in flight, bucket levels and per-lane
+            acquired / waited / average wait / timeouts of this process
+        """
+        with self.conn_lock:
+            in_flight = self.conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+            waiting = self.conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0]
+            buckets = dict(self.conn.execute("SELECT name, tokens FROM buckets").fetchall())
+        with self.stats_lock:
+            lanes = {
+                lane: {**stats, "wait_ms": round(stats["wait_ms"], 1),
+                       "avg_wait_ms": round(stats["wait_ms"] / stats["waited"], 1) if stats["waited"] else 0.0}
+                for lane, stats in self.stats.items()
+            }
+        return {
+            "db_path": self.db_path,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "max_in_flight": self.max_in_flight,
+            "interactive_reserve": self.interactive_reserve,
+            "in_flight": in_flight,
+            "waiting": waiting,
+            "buckets": {name: round(tokens, 1) for name, tokens in buckets.items()},
+            "lanes": lanes
+        }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def estimate_tokens(prompt: str, answer_tokens: int) -> int:
+    """Rough token count of a call: ~4 characters per prompt token plus the expected answer"""
+    return len(prompt) // 4 + answer_tokens
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide rate limiter, creating it on first use
+
+    Configured from GEMINI_RPM, GEMINI_TPM and GEMINI_MAX_IN_FLIGHT (each
+    0 = no limit, the default; with all three 0 calls skip SQLite),
+    GEMINI_INTERACTIVE_RESERVE, GEMINI_RATE_LIMIT_TIMEOUT and
+    GEMINI_RATE_LIMIT_DB. Processes (e.g. gunicorn workers, or Backend and
+    rg-backend on one API key) that point GEMINI_RATE_LIMIT_DB at the same
+    file share one budget; unset, the budget is per process.
+
+    Returns:
+        The shared RateLimiter instance
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_lock:
+            if _shared_limiter is None:
+                _shared_limiter = RateLimiter(
+                    db_path=os.getenv('GEMINI_RATE_LIMIT_DB') or ":memory:",
+                    rpm=float(os.getenv('GEMINI_RPM', '0')),
+                    tpm=float(os.getenv('GEMINI_TPM', '0')),
+                    max_in_flight=int(os.getenv('GEMINI_MAX_IN_FLIGHT', '0')),
+                    interactive_reserve=int(os.getenv('GEMINI_INTERACTIVE_RESERVE', '0')),
+                    acquire_timeout=float(os.getenv('GEMINI_RATE_LIMIT_TIMEOUT', '30'))
+                )
+                logger.info(f"Created Gemini rate limiter (rpm={_shared_limiter.rpm}, "
+                            f"tpm={_shared_limiter.tpm}, max_in_flight={_shared_limiter.max_in_flight})")
+    return _shared_limiter
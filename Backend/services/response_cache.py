@@ -0,0 +1,195 @@
+"""
+Content-addressed cache for Gemini responses
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Two-tier (in-memory LRU + optional SQLite) cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, db_path: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of entries held in memory
+            ttl: Default time-to-live for entries, in seconds
+            db_path: Path of the SQLite file backing the disk tier (None disables it)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "stores": 0
+        }
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS gemini_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, is_json: bool,
+                 generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build a cache key from everything that determines the response
+
+        Args:
+            model_name: Gemini model name
+            prompt: Prompt text
+            is_json: Whether a JSON response was requested
+            generation_config: Generation config sent with the request
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        material = json.dumps({
+            "model": model_name,
+            "prompt": prompt,
+            "is_json": is_json,
+            "generation_config": generation_config or {}
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Tuple of (found, value)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM gemini_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._put_memory(key, value, row[1])
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                    return True, value
+                if row:
+                    self._db.execute('DELETE FROM gemini_cache WHERE key = ?', (key,))
+                    self._db.commit()
+                    self._stats["expirations"] += 1
+
+            self._stats["misses"] += 1
+            return False, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a response
+
+        Args:
+            key: Cache key from make_key()
+            value: JSON-serializable response
+            ttl: Time-to-live in seconds (defaults to the cache TTL)
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+            self._stats["stores"] += 1
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO gemini_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value, ensure_ascii=False), expires_at)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist cache entry: {e}")
+
+    def _put_memory(self, key: str, value: Any, expires_at: float):
+        """Insert into the LRU tier, evicting the least recently used entries (lock held)"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM gemini_cache')
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hit/miss/eviction counters and sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["ttl"] = self.ttl
+            stats["disk_enabled"] = self._db is not None
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+            return stats
+
+
+def create_cache_from_env() -> Optional[ResponseCache]:
+    """
+    Build the response cache from environment variables
+
+    GEMINI_CACHE_SIZE (0 disables caching), GEMINI_CACHE_TTL and
+    GEMINI_CACHE_DB (path of the optional on-disk tier).
+
+    Returns:
+        A ResponseCache, or None when caching is disabled
+    """
+    max_entries = int(os.getenv('GEMINI_CACHE_SIZE', '256'))
+    if max_entries <= 0:
+        return None
+    return ResponseCache(
+        max_entries=max_entries,
+        ttl=float(os.getenv('GEMINI_CACHE_TTL', '3600')),
+        db_path=os.getenv('GEMINI_CACHE_DB') or None
+    )
@@ -0,0 +1,252 @@
+"""
+Retry policy for outbound Gemini calls
+"""
+
+import os
+import random
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Callable
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth another attempt: timeouts, rate limiting and transient server errors
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryBudget:
+    """
+    Token bucket capping retries to a fraction of first attempts
+
+    Every first attempt deposits `ratio` tokens (up to `max_tokens`) and every
+    retry spends one, so under a sustained outage retries add at most `ratio`
+    extra load instead of multiplying it by the attempt count.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        """
+        Initialize the budget, full
+
+        Args:
+            ratio: Tokens earned per first attempt
+            max_tokens: Bucket capacity (the largest burst of retries)
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend one token; False when the budget is exhausted"""
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header
+
+    Args:
+        value: Header value, delay-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None when absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retries retryable failures with decorrelated jitter, Retry-After and a retry budget"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 deadline: float = 45.0, budget: Optional[RetryBudget] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the policy
+
+        Args:
+            max_attempts: Attempts per call, including the first (1 disables retries)
+            base_delay: Smallest backoff delay in seconds
+            max_delay: Largest backoff delay in seconds
+            deadline: Seconds after the first attempt past which no retry is started;
+                a Retry-After that would end past it is not waited for
+            budget: Shared RetryBudget (None for unlimited retries)
+            sleep: Sleep function (replaceable in benchmarks)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget = budget
+        self.sleep = sleep
+        self.stats = {"attempts": {}, "retries": 0, "budget_exhausted": 0, "gave_up": 0}
+        self.stats_lock = threading.Lock()
+
+    @staticmethod
+    def classify(response: Optional[requests.Response] = None,
+                 error: Optional[Exception] = None) -> str:
+        """
+        Name the outcome of one attempt
+
+        Args:
+            response: The response, when one was received
+            error: The exception raised instead, if any
+
+        Returns:
+            "ok", "http_<status>", "timeout", "connection_error" or "error"
+        """
+        if error is not None:
+            if isinstance(error, requests.exceptions.Timeout):
+                return "timeout"
+            if isinstance(error, requests.exceptions.ConnectionError):
+                return "connection_error"
+            return "error"
+        if response.status_code < 400:
+            return "ok"
+        return f"http_{response.status_code}"
+
+    @staticmethod
+    def is_retryable(outcome: str) -> bool:
+        if outcome in ("timeout", "connection_error"):
+            return True
+        return outcome.startswith("http_") and int(outcome[5:]) in RETRYABLE_STATUS
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: uniform between base_delay and 3x the previous delay, capped"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    def call(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Run send() until it succeeds, fails for good, or retries run out
+
+        Args:
+            send: Makes one attempt and returns the response
+
+        Returns:
+            The last response received (which may be an error response)
+
+        Raises:
+            The last requests exception when no attempt got a response
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+        started = time.monotonic()
+        delay = self.base_delay
+        attempt = 1
+        while True:
+            response, error = None, None
+            try:
+                response = send()
+            except requests.exceptions.RequestException as e:
+                error = e
+            outcome = self.classify(response, error)
+            self._count(outcome)
+
+            if not self.is_retryable(outcome):
+                break
+            wait = self._retry_wait(attempt, started, delay, response)
+            if wait is None:
+                break
+            logger.warning(f"Gemini attempt {attempt} failed ({outcome}); retrying in {wait:.2f}s")
+            self.sleep(wait)
+            delay = max(delay, wait)
+            attempt += 1
+
+        if error is not None:
+            raise error
+        return response
+
+    def _retry_wait(self, attempt: int, started: float, previous: float,
+                    response: Optional[requests.Response]) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to stop retrying"""
+        if attempt >= self.max_attempts:
+            self._count_decision("gave_up")
+            return None
+        wait = self.next_delay(previous)
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            # The server knows when it will recover; never come back sooner
+            wait = max(wait, retry_after)
+        if time.monotonic() - started + wait > self.deadline:
+            self._count_decision("gave_up")
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            self._count_decision("budget_exhausted")
+            return None
+        self._count_decision("retries")
+        return wait
+
+    def _count(self, outcome: str):
+        with self.stats_lock:
+            self.stats["attempts"][outcome] = self.stats["attempts"].get(outcome, 0) + 1
+
+    def _count_decision(self, name: str):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get attempt counts per outcome and retry decisions
+
+        Returns:
+            Dictionary with attempts by outcome, retries, budget_exhausted,
+            gave_up and the tokens left in the retry budget
+        """
+        with self.stats_lock:
+            stats = {**self.stats, "attempts": dict(self.stats["attempts"])}
+        stats["max_attempts"] = self.max_attempts
+        stats["budget_tokens"] = round(self.budget.tokens, 2) if self.budget is not None else None
+        return stats
+
+
+_shared_policy: Optional[RetryPolicy] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_retry_policy() -> RetryPolicy:
+    """
+    Return the process-wide retry policy, creating it on first use
+
+    Configured from GEMINI_RETRY_ATTEMPTS (1 disables retries),
+    GEMINI_RETRY_BASE_DELAY, GEMINI_RETRY_MAX_DELAY, GEMINI_RETRY_DEADLINE,
+    GEMINI_RETRY_BUDGET_RATIO and GEMINI_RETRY_BUDGET_MAX. The budget is shared
+    by every GeminiService instance.
+
+    Returns:
+        The shared RetryPolicy instance
+    """
+    global _shared_policy
+    if _shared_policy is None:
+        with _shared_lock:
+            if _shared_policy is None:
+                _shared_policy = RetryPolicy(
+                    max_attempts=int(os.getenv('GEMINI_RETRY_ATTEMPTS', '3')),
+                    base_delay=float(os.getenv('GEMINI_RETRY_BASE_DELAY', '0.5')),
+                    max_delay=float(os.getenv('GEMINI_RETRY_MAX_DELAY', '8')),
+                    deadline=float(os.getenv('GEMINI_RETRY_DEADLINE', '45')),
+                    budget=RetryBudget(
+                        ratio=float(os.getenv('GEMINI_RETRY_BUDGET_RATIO', '0.2')),
+                        max_tokens=float(os.getenv('GEMINI_RETRY_BUDGET_MAX', '10'))
+                    )
+                )
+    return _shared_policy
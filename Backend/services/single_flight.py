@@ -0,0 +1,99 @@
+"""
+Request coalescing for identical concurrent calls
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """State of one in-flight call shared by its leader and waiters"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = True
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its outcome"""
+
+    def __init__(self):
+        """Initialize an empty in-flight table"""
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "executions": 0,
+            "coalesced_waiters": 0,
+            "max_waiters": 0
+        }
+
+    def do(self, key: str, fn: Callable[[], Any],
+           shareable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Execute fn for key, or wait for the call already running for key
+
+        Args:
+            key: Identity of the call (e.g. a prompt hash)
+            fn: Zero-argument callable performing the work
+            shareable: Whether a result may be handed to the waiters; those
+                of a result it rejects run the call again themselves
+
+        Returns:
+            The result of fn; if fn raised, every caller re-raises the same error
+        """
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                return self._lead(key, call, fn, shareable)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            if call.shared:
+                return call.result
+
+    def _join(self, key: str):
+        """(in-flight call for key, whether the caller leads it)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced_waiters"] += 1
+                self._stats["max_waiters"] = max(self._stats["max_waiters"], call.waiters)
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+                leader = True
+            return call, leader
+
+    def _lead(self, key: str, call: _Call, fn: Callable[[], Any],
+              shareable: Optional[Callable[[Any], bool]]) -> Any:
+        """Run fn for the waiters of call"""
+        try:
+            result = fn()
+            call.result = result
+            call.shared = shareable is None or shareable(result)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with executions, coalesced waiters and in-flight count
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+            return stats
@@ -2,7 +2,7 @@
 Input validation utilities
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class Validator:
@@ -162,3 +162,26 @@ class Validator:
                 return f"sub_questions[{i}] cannot be empty"
         
         return None
+    
+    @staticmethod
+    def validate_batch_input(items: List[Any], max_items: int) -> Optional[str]:
+        """
+        Validate the envelope of a batch request (items are validated one by one)
+        
+        Args:
+            items: List of batch items
+            max_items: Largest accepted batch
+        
+        Returns:
+            Error message if validation fails, None otherwise
+        """
+        if not isinstance(items, list):
+            return "Input must be a JSON array of question sets"
+        
+        if len(items) == 0:
+            return "Batch cannot be empty"
+        
+        if len(items) > max_items:
+            return f"Batch cannot contain more than {max_items} question sets"
+        
+        return None
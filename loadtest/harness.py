@@ -0,0 +1,305 @@
+"""
+Cross-service load and latency benchmark.
+
+Drives each service's endpoints at a series of concurrency levels and
+reports throughput, error rate and p50/p95/p99 latency per scenario:
+
+    backend-analyze   POST Backend        /api/analyze-questions
+    backend-ask       POST Backend        /api/ask
+    rg-researchgap    GET  rg-backend     /researchgap
+    spm-generate      POST spm            /api/generate-blog   (rg-backend -> questions -> Backend -> blog)
+    spm-blogs         GET  spm            /api/blogs
+
+With --start the harness runs loadtest/stub_server.py in-process and launches
+the three services against it (Gemini and the questions API both pointed at
+the stub, caches off, throwaway spm database), so the numbers measure the
+services themselves and are comparable between runs and machines of a kind.
+Without --start it drives whatever is listening on --backend/--rg/--spm.
+
+    python loadtest/harness.py --start --save-baseline loadtest/baselines/stub-400ms.json
+    python loadtest/harness.py --start --compare loadtest/baselines/stub-400ms.json
+
+--compare exits 1 when a scenario's p95 latency rose, or its throughput fell,
+by more than --tolerance relative to the baseline.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_server  # noqa: E402
+
+SUBJECTS = ['federated learning', 'digital twins', 'graph neural networks', 'edge computing',
+            'causal inference', 'knowledge graphs', 'blockchain', 'computer vision']
+DOMAINS = ['healthcare', 'agriculture', 'finance', 'education', 'manufacturing', 'transportation']
+
+
+def _topic(n):
+    return f'{SUBJECTS[n % len(SUBJECTS)]} in {DOMAINS[n // len(SUBJECTS) % len(DOMAINS)]} study {n}'
+
+
+def _analyze_payload(n):
+    return {
+        'main_question': f'How does {_topic(n)} change outcomes for practitioners?',
+        'sub_questions': [f'What limits adoption of {_topic(n)}?', 'How is impact measured?']
+    }
+
+
+# name -> (service, method, path, request kwargs for the n-th request)
+SCENARIOS = {
+    'backend-analyze': ('backend', 'POST', '/api/analyze-questions', lambda n: {'json': _analyze_payload(n)}),
+    'backend-ask': ('backend', 'POST', '/api/ask',
+                    lambda n: {'json': {'question': f'What are open problems in {_topic(n)}?'}}),
+    'rg-researchgap': ('rg', 'GET', '/researchgap', lambda n: {'params': {'query': _topic(n)}}),
+    'spm-generate': ('spm', 'POST', '/api/generate-blog', lambda n: {'json': {'topic': _topic(n)}}),
+    'spm-blogs': ('spm', 'GET', '/api/blogs', lambda n: {'params': {'page': 1}}),
+}
+
+HEALTH = {'backend': '/api/health', 'rg': '/health', 'spm': '/api/cache/stats'}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_level(base_url, scenario, concurrency, requests_per_level, timeout, counter):
+    """Send requests_per_level requests with `concurrency` workers; returns the level's summary"""
+    _, method, path, make_kwargs = SCENARIOS[scenario]
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    remaining = itertools.count()
+    local = threading.local()
+
+    def worker():
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        while next(remaining) < requests_per_level:
+            kwargs = make_kwargs(next(counter))
+            start = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, timeout=timeout, **kwargs)
+                outcome = None if response.status_code < 400 else str(response.status_code)
+            except requests.RequestException as e:
+                outcome = type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if outcome:
+                    errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    failed = sum(errors.values())
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'error_rate': round(failed / len(latencies), 4) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against a baseline, as printable strings"""
+    regressions = []
+    for scenario, levels in results.items():
+        before = {level['concurrency']: level for level in baseline.get('results', {}).get(scenario, [])}
+        for level in levels:
+            old = before.get(level['concurrency'])
+            if not old:
+                continue
+            name = f"{scenario} @ {level['concurrency']}"
+            if old['p95_ms'] and level['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {old['p95_ms']} -> {level['p95_ms']} ms")
+            if old['throughput_rps'] and level['throughput_rps'] < old['throughput_rps'] * (1 - tolerance):
+                regressions.append(f"{name}: throughput {old['throughput_rps']} -> {level['throughput_rps']} req/s")
+            if level['error_rate'] > old['error_rate'] + tolerance / 10:
+                regressions.append(f"{name}: error rate {old['error_rate']} -> {level['error_rate']}")
+    return regressions
+
+
+class Services:
+    """The stub plus the three services, started against it for one run"""
+
+    def __init__(self, args):
+        self.args = args
+        self.stub = None
+        self.processes = []
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def __enter__(self):
+        args = self.args
+        self.stub = stub_server.make_server(
+            '127.0.0.1', args.stub_port, latency=args.latency, questions_latency=args.questions_latency,
+            error_rate=args.error_rate, response_chars=args.response_chars, seed=args.seed
+        )
+        threading.Thread(target=self.stub.serve_forever, daemon=True).start()
+        stub = f'http://127.0.0.1:{args.stub_port}'
+        ports = {name: int(url.rsplit(':', 1)[1]) for name, url in self.urls().items()}
+
+        common = {'GEMINI_API_KEY': 'stub', 'PYTHONUNBUFFERED': '1'}
+        self._launch('Backend', [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(ports['backend'])],
+                     {**common, 'GEMINI_API_BASE': stub, 'GEMINI_MODEL': 'gemini-stub'})
+        self._launch('rg-backend-plan_b',
+                     [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(ports['rg']), '--log-level', 'warning'],
+                     {**common, 'GEMINI_API_ENDPOINT': stub, 'DATABASE_URL': 'sqlite://',
+                      'SEMANTIC_CACHE_ENABLED': 'false'})
+        self._launch('spm', [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(ports['spm'])],
+                     {**common, 'GEMINI_API_ENDPOINT': stub, 'GEMINI_MODEL': 'gemini-stub',
+                      'RESEARCH_GAPS_API_URL': f"{args.rg}/researchgap",
+                      'QUESTIONS_API_URL': f'{stub}/generateQuestions',
+                      'METHODOLOGY_API_URL': f"{args.backend}/api/analyze-questions",
+                      'BLOGS_DB': os.path.join(self.tmp.name, 'blogs.db'),
+                      'ARTIFACTS_DIR': os.path.join(self.tmp.name, 'artifacts'),
+                      'SEMANTIC_CACHE': '0'})
+        self._wait_healthy()
+        return self
+
+    def urls(self):
+        return {'backend': self.args.backend, 'rg': self.args.rg, 'spm': self.args.spm}
+
+    def _launch(self, directory, command, env):
+        log = open(os.path.join(self.tmp.name, f'{directory}.log'), 'w')
+        self.processes.append((directory, log, subprocess.Popen(
+            command, cwd=os.path.join(ROOT, directory), env={**os.environ, **env},
+            stdout=log, stderr=subprocess.STDOUT
+        )))
+
+    def _wait_healthy(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        for name, url in self.urls().items():
+            while True:
+                try:
+                    if requests.get(url + HEALTH[name], timeout=2).status_code < 500:
+                        break
+                except requests.RequestException:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{name} did not become healthy at {url}; logs in {self.tmp.name}')
+                time.sleep(0.25)
+
+    def __exit__(self, *exc):
+        for _, log, process in self.processes:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            log.close()
+        if self.stub is not None:
+            self.stub.shutdown()
+        self.tmp.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-service load and latency benchmark')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated scenario names')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=48, help='requests per scenario and level')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--backend', default='http://127.0.0.1:5000')
+    parser.add_argument('--rg', default='http://127.0.0.1:8000')
+    parser.add_argument('--spm', default='http://127.0.0.1:3000')
+    parser.add_argument('--start', action='store_true', help='start the stub and the three services')
+    parser.add_argument('--stub-port', type=int, default=8090)
+    parser.add_argument('--latency', default='lognormal:400:0.5', help='stub Gemini latency distribution (ms)')
+    parser.add_argument('--questions-latency', default='lognormal:300:0.3')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--response-chars', type=int, default=4000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--save-baseline', metavar='PATH', help='write the results as a baseline file')
+    parser.add_argument('--compare', metavar='PATH', help='compare the results with a baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    services = Services(args) if args.start else None
+    results = {}
+    counter = itertools.count()
+    try:
+        if services:
+            services.__enter__()
+        urls = {'backend': args.backend, 'rg': args.rg, 'spm': args.spm}
+        print(f"{'scenario':<18} {'conc':>5} {'req':>5} {'err%':>6} {'req/s':>8} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for scenario in scenarios:
+            results[scenario] = []
+            for concurrency in levels:
+                level = run_level(urls[SCENARIOS[scenario][0]], scenario, concurrency,
+                                  args.requests, args.timeout, counter)
+                results[scenario].append(level)
+                print(f"{scenario:<18} {concurrency:>5} {level['requests']:>5} {level['error_rate'] * 100:>6.1f} "
+                      f"{level['throughput_rps']:>8.2f} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} "
+                      f"{level['p99_ms']:>9.1f}", flush=True)
+    finally:
+        if services:
+            services.__exit__(None, None, None)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'started_services': args.start,
+        },
+        'stub': {
+            'latency': args.latency,
+            'questions_latency': args.questions_latency,
+            'error_rate': args.error_rate,
+            'response_chars': args.response_chars,
+        },
+        'requests_per_level': args.requests,
+        'results': results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f'\nBaseline written to {args.save_baseline}')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'\nRegressions against {args.compare} (tolerance {args.tolerance:.0%}):')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Local stand-in for the Gemini REST API and the Railway questions API.
+
+Serves the request/response shapes the three services use:
+
+    POST /v1beta/models/<model>:generateContent        (Backend, genai REST transport)
+    POST /v1beta/models/<model>:streamGenerateContent  (genai stream=True; SSE with ?alt=sse)
+    POST /generateQuestions?topic=...                  (spm questions stage)
+    GET  /__stats                                      (requests / errors per route)
+
+Answers are canned but shaped by the prompt: research gaps, relevance
+verdicts, fused verdict+gaps, methodology objects (packed arrays for packed
+prompts) or free text of --response-chars characters. Latency is drawn
+from a distribution, and a fraction of requests fail with an HTTP error.
+With --rpm-limit, Gemini requests beyond that many in the last minute are
+answered 429 at once, like an exhausted quota. With --malformed-rate, that
+fraction of JSON answers comes back the way models sometimes write it: in
+markdown fences, with a trailing comma, or cut off before the end.
+
+    python loadtest/stub_server.py --port 8090 --latency lognormal:400:0.5 --error-rate 0.02
+
+Latency specs (milliseconds): fixed:MS, uniform:LOW:HIGH, normal:MEAN:SD,
+lognormal:MEDIAN:SIGMA. Streamed responses spread the latency over their chunks.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ('research data model analysis learning network system privacy health policy evidence method '
+         'study design outcome framework approach community practice intervention').split()
+
+
+def parse_latency(spec):
+    """Return a function drawing one latency in seconds from a spec like lognormal:400:0.5"""
+    kind, *params = spec.split(':')
+    params = [float(p) for p in params]
+    if kind == 'fixed':
+        return lambda rng: params[0] / 1000
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(params[0], params[1]) / 1000
+    if kind == 'normal':
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1])) / 1000
+    if kind == 'lognormal':
+        return lambda rng: params[0] * rng.lognormvariate(0, params[1]) / 1000
+    raise ValueError(f'Unknown latency distribution: {spec}')
+
+
+class StubConfig:
+    def __init__(self, latency='fixed:200', error_rate=0.0, error_status=(500, 503, 429),
+                 response_chars=4000, questions_latency=None, seed=None, stream_chunks=8, rpm_limit=0,
+                 malformed_rate=0.0):
+        self.latency = parse_latency(latency)
+        self.questions_latency = parse_latency(questions_latency or latency)
+        self.error_rate = error_rate
+        self.error_status = tuple(error_status)
+        self.response_chars = response_chars
+        self.stream_chunks = stream_chunks
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.rpm_limit = rpm_limit
+        self.malformed_rate = malformed_rate
+        self.recent = deque()
+        self.stats = {}
+
+    def draw(self, route):
+        """(latency seconds, error status or None) for one request"""
+        with self.lock:
+            counts = self.stats.setdefault(route, {'requests': 0, 'errors': 0, 'throttled': 0})
+            counts['requests'] += 1
+            if self.rpm_limit and route != 'generateQuestions' and self._over_quota():
+                counts['throttled'] += 1
+                return 0.0, 429
+            delay = (self.questions_latency if route == 'generateQuestions' else self.latency)(self.rng)
+            status = self.rng.choice(self.error_status) if self.rng.random() < self.error_rate else None
+            counts['errors'] += status is not None
+        return delay, status
+
+    def malform(self, route, text):
+        """text, or with --malformed-rate sometimes a fenced, trailing-comma or truncated copy"""
+        if not text.startswith(('{', '[')):
+            return text
+        with self.lock:
+            if self.rng.random() >= self.malformed_rate:
+                return text
+            fault = self.rng.choice(('fence', 'trailing_comma', 'truncated'))
+            self.stats[route]['malformed'] = self.stats[route].get('malformed', 0) + 1
+        if fault == 'fence':
+            return f'Here is the JSON you asked for:\n```json\n{text}\n```'
+        if fault == 'trailing_comma':
+            return f'{text[:-1]},{text[-1]}'
+        return text[:int(len(text) * 0.9)]
+
+    def _over_quota(self):
+        now = time.monotonic()
+        while self.recent and self.recent[0] <= now - 60:
+            self.recent.popleft()
+        if len(self.recent) >= self.rpm_limit:
+            return True
+        self.recent.append(now)
+        return False
+
+    def words(self, chars):
+        with self.lock:
+            text = []
+            length = 0
+            while length < chars:
+                word = self.rng.choice(WORDS)
+                text.append(word)
+                length += len(word) + 1
+        return ' '.join(text)
+
+
+def _sentence(config, chars=80):
+    return config.words(chars).capitalize() + '.'
+
+
+def answer_for(prompt, config):
+    """Canned answer text for a prompt, in the shape the prompt asks for"""
+    topic = re.search(r'Topic: "([^"]*)"', prompt)
+    topic = topic.group(1) if topic else 'the topic'
+    gaps = [{'statement': f'{_sentence(config)} ({topic})', 'score': 95 - 5 * i} for i in range(5)]
+    verdict = {'relevant': True, 'safe': True, 'message': ''}
+    methodology = {
+        'recommended_methodology': 'Mixed-Methods Approach',
+        'justification': _sentence(config, 400),
+        'study_design': 'Convergent Parallel Mixed Methods Design',
+        'data_collection_tools': {
+            'qualitative_tools': [f'Interviews: {_sentence(config)}'],
+            'quantitative_tools': [f'Survey: {_sentence(config)}']
+        }
+    }
+    if 'QUESTION SETS:' in prompt:
+        ids = re.findall(r'^ID: (\S+)$', prompt, flags=re.MULTILINE)
+        return json.dumps([{'id': item_id, **methodology} for item_id in ids])
+    if '"relevant"' in prompt and '"gaps"' in prompt:
+        return json.dumps({**verdict, 'gaps': gaps})
+    if '"gaps"' in prompt:
+        return json.dumps({'gaps': gaps})
+    if '"relevant"' in prompt:
+        return json.dumps(verdict)
+    if 'recommended_methodology' in prompt:
+        return json.dumps(methodology)
+    return f'# {topic.title()}\n\n' + '\n\n'.join(
+        config.words(600) for _ in range(max(1, config.response_chars // 600))
+    )
+
+
+def questions_answer(topic, gaps, config):
+    return {
+        'success': True,
+        'data': {
+            'main_question': f'How can {topic} address its open research gaps?',
+            'sub_questions': [f'{_sentence(config, 60)[:-1]}?' for _ in range(max(1, min(len(gaps), 5)))],
+            'rationale': _sentence(config, 200)
+        }
+    }
+
+
+def _candidate(text):
+    return {'content': {'parts': [{'text': text}], 'role': 'model'}, 'finishReason': 'STOP', 'index': 0}
+
+
+def _usage(prompt, text):
+    prompt_tokens = len(prompt) // 4
+    output_tokens = len(text) // 4
+    return {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': output_tokens,
+            'totalTokenCount': prompt_tokens + output_tokens}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this Nagle + delayed ACK add ~40 ms
+    disable_nagle_algorithm = True
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(body) if body else {}
+        except ValueError:
+            return None
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status):
+        headers = {'Retry-After': '1'} if status in (429, 503) else None
+        self._send_json(status, {'error': {'code': status, 'message': 'Injected stub error',
+                                           'status': 'UNAVAILABLE' if status != 429 else 'RESOURCE_EXHAUSTED'}},
+                        headers)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/__stats':
+            with self.config.lock:
+                self._send_json(200, self.config.stats)
+            return
+        self._send_json(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        match = re.match(r'^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)$', url.path)
+        if match:
+            self._generate(match.group(2) == 'streamGenerateContent', parse_qs(url.query))
+        elif url.path == '/generateQuestions':
+            self._questions(parse_qs(url.query))
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def _generate(self, stream, query):
+        request = self._read_json()
+        route = 'streamGenerateContent' if stream else 'generateContent'
+        delay, status = self.config.draw(route)
+        if request is None:
+            self._send_json(400, {'error': {'code': 400, 'message': 'Invalid JSON payload'}})
+            return
+        prompt = ''.join(
+            part.get('text', '') for content in request.get('contents', []) for part in content.get('parts', [])
+        )
+        if status:
+            time.sleep(delay)
+            self._send_error(status)
+            return
+        text = self.config.malform(route, answer_for(prompt, self.config))
+        if not stream:
+            time.sleep(delay)
+            self._send_json(200, {'candidates': [_candidate(text)], 'usageMetadata': _usage(prompt, text)})
+            return
+
+        # Streamed: chunks spread over the latency, as SSE (alt=sse) or a JSON array
+        sse = query.get('alt', [''])[0] == 'sse'
+        size = max(1, len(text) // self.config.stream_chunks + 1)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or ['']
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, chunk in enumerate(chunks):
+            time.sleep(delay / len(chunks))
+            payload = {'candidates': [_candidate(chunk)]}
+            if i == len(chunks) - 1:
+                payload['usageMetadata'] = _usage(prompt, text)
+            data = f'data: {json.dumps(payload)}\r\n\r\n' if sse else \
+                ('[' if i == 0 else ',') + json.dumps(payload) + (']' if i == len(chunks) - 1 else '')
+            self._write_chunk(data.encode('utf-8'))
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _questions(self, query):
+        gaps = self._read_json()
+        delay, status = self.config.draw('generateQuestions')
+        time.sleep(delay)
+        if status:
+            self._send_error(status)
+            return
+        topic = query.get('topic', ['the topic'])[0]
+        self._send_json(200, questions_answer(topic, gaps if isinstance(gaps, list) else [], self.config))
+
+
+def make_server(host='127.0.0.1', port=8090, **config):
+    """Build (not start) a stub server; config is passed to StubConfig"""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {'config': StubConfig(**config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Gemini / questions API stub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', default='lognormal:400:0.5', help='Gemini latency distribution (ms)')
+    parser.add_argument('--questions-latency', help='questions API latency distribution (default: --latency)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests failing')
+    parser.add_argument('--error-status', default='500,503,429', help='statuses injected errors use')
+    parser.add_argument('--response-chars', type=int, default=4000, help='length of free-text answers')
+    parser.add_argument('--rpm-limit', type=int, default=0, help='Gemini requests per minute before 429s (0: none)')
+    parser.add_argument('--malformed-rate', type=float, default=0.0,
+                        help='fraction of JSON answers fenced, with a trailing comma or truncated')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = make_server(
+        args.host, args.port, latency=args.latency, questions_latency=args.questions_latency,
+        error_rate=args.error_rate, error_status=[int(s) for s in args.error_status.split(',')],
+        response_chars=args.response_chars, seed=args.seed, rpm_limit=args.rpm_limit,
+        malformed_rate=args.malformed_rate
+    )
+    print(f'Gemini / questions stub on http://{args.host}:{args.port} (latency {args.latency}, '
+          f'error rate {args.error_rate})', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
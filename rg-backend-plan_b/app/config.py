@@ -1,9 +1,57 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     gemini_api_key: str
     database_url: str
 
+    # How /researchgap combines the safety check and gap generation:
+    #   sequential - relevance check, then gap generation (2 round trips)
+    #   concurrent - both calls start together, gaps discarded if the check fails
+    #   fused      - a single prompt returns the verdict and the gaps
+    gap_pipeline_mode: Literal["sequential", "concurrent", "fused"] = "sequential"
+
+    # Models and sampling used by services.model_registry
+    gemini_gap_model: str = "gemini-2.5-flash"
+    gemini_relevance_model: str = "gemini-2.5-flash"
+    gap_temperature: float = 0.3
+    relevance_temperature: float = 0.0
+
+    # Near-duplicate topics ("healthcare data engineering" / "data engineering in
+    # healthcare") reuse cached gaps; see services.semantic_cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.9
+    semantic_cache_size: int = 5000
+    semantic_cache_ttl_seconds: float = 86400
+
+    # Gemini retries (services.retry_policy): attempts per call including the
+    # first (1 disables), decorrelated-jitter bounds, no retry past the deadline,
+    # and a retry budget earning budget_ratio tokens per call (max budget_max)
+    gemini_timeout_seconds: float = 30.0
+    gemini_retry_attempts: int = 3
+    gemini_retry_base_delay: float = 0.5
+    gemini_retry_max_delay: float = 8.0
+    gemini_retry_deadline: float = 15.0
+    gemini_retry_budget_ratio: float = 0.2
+    gemini_retry_budget_max: float = 10.0
+
+    # Outbound Gemini rate limit (services.rate_limiter): requests and estimated
+    # tokens per minute and calls in flight, all 0 = no limit. Processes (and the
+    # Backend service) with the same gemini_rate_limit_db file share one budget;
+    # empty keeps the budget per process. Every call here uses the default lane,
+    # so no in-flight slots are reserved for interactive calls.
+    gemini_rpm: float = 0
+    gemini_tpm: float = 0
+    gemini_max_in_flight: int = 0
+    gemini_interactive_reserve: int = 0
+    gemini_rate_limit_timeout: float = 30.0
+    gemini_rate_limit_db: str = ""
+    gemini_answer_tokens_estimate: int = 1000
+
+    # Base URL of a Gemini-compatible endpoint (e.g. the local stub in
+    # loadtest/stub_server.py); switches the client to the REST transport
+    gemini_api_endpoint: str = ""
+
     class Config:
         env_file = ".env"
         case_sensitive = False
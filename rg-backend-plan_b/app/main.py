@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.models import ResearchGapRequest, ResearchGapResponse
-from app.services.gemini_service import get_research_gaps, is_relevant_query
+from app.services.gemini_service import (
+    analyze_query, coalescing_stats, pipeline_stats, rate_limit_stats, retry_stats, semantic_cache_stats
+)
 
 app = FastAPI(title="Research Genie Backend")
 
@@ -19,23 +21,21 @@ def root():
 
 
 @app.post("/research-gaps", response_model=ResearchGapResponse)
-def get_research_gaps_endpoint(request: ResearchGapRequest):
-    check = is_relevant_query(request.query)
+async def get_research_gaps_endpoint(request: ResearchGapRequest):
+    check, research_gap = await analyze_query(request.query)
     if not check["relevant"] or not check["safe"]:
         raise HTTPException(status_code=400, detail=check["message"])
 
-    research_gap = get_research_gaps(request.query)
     gaps_list = research_gap.get("gaps", [])
     return ResearchGapResponse(gaps=gaps_list)
 
 
 @app.get("/researchgap", response_model=ResearchGapResponse)
-def get_research_gaps_get_endpoint(query: str):
-    check = is_relevant_query(query)
+async def get_research_gaps_get_endpoint(query: str):
+    check, research_gap = await analyze_query(query)
     if not check["relevant"] or not check["safe"]:
         raise HTTPException(status_code=400, detail=check["message"])
 
-    research_gap = get_research_gaps(query)
     gaps_list = research_gap.get("gaps", [])
     return ResearchGapResponse(gaps=gaps_list)
 
@@ -43,3 +43,14 @@ def get_research_gaps_get_endpoint(query: str):
 @app.get("/health")
 def health_check():
     return {"status": "ok", "message": "Backend running successfully"}
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "coalescing": coalescing_stats(),
+        "gap_pipeline": pipeline_stats(),
+        "semantic_cache": semantic_cache_stats(),
+        "retries": retry_stats(),
+        "rate_limit": rate_limit_stats(),
+    }
@@ -1,23 +1,122 @@
 import json
+import time
+import asyncio
+import functools
+import hashlib
 import google.generativeai as genai
 from app.config import settings
+from app.services.metrics import Counter, LatencyRecorder
+from app.services.model_registry import registry
+from app.services.rate_limiter import RateLimiter, estimate_tokens
+from app.services.retry_policy import RetryBudget, RetryPolicy
+from app.services.semantic_cache import SemanticCache
+from app.services.single_flight import SingleFlight, AsyncSingleFlight
 
-genai.configure(api_key=settings.gemini_api_key)
+if settings.gemini_api_endpoint:
+    # REST transport so a plain-HTTP stand-in (loadtest/stub_server.py) can answer
+    genai.configure(api_key=settings.gemini_api_key, transport="rest",
+                    client_options={"api_endpoint": settings.gemini_api_endpoint})
+else:
+    genai.configure(api_key=settings.gemini_api_key)
 
+# Retries replace the client's built-in ones (503 only, no jitter, up to 600s)
+_retry = RetryPolicy(
+    max_attempts=settings.gemini_retry_attempts,
+    base_delay=settings.gemini_retry_base_delay,
+    max_delay=settings.gemini_retry_max_delay,
+    deadline=settings.gemini_retry_deadline,
+    budget=RetryBudget(settings.gemini_retry_budget_ratio, settings.gemini_retry_budget_max),
+)
+_REQUEST_OPTIONS = {"retry": None, "timeout": settings.gemini_timeout_seconds}
 
-def get_research_gaps(query: str) -> dict:
-    """
-    Uses Gemini to generate 5 research gaps for the user query.
-    Returns JSON like:
-    {
-        "gaps": [
-            {"statement": "Gap 1", "score": 95},
-            {"statement": "Gap 2", "score": 87},
-            ...
-        ]
+# Every attempt (retries included) waits for the RPM / TPM / in-flight budget
+_limiter = RateLimiter(
+    db_path=settings.gemini_rate_limit_db or ":memory:",
+    rpm=settings.gemini_rpm,
+    tpm=settings.gemini_tpm,
+    max_in_flight=settings.gemini_max_in_flight,
+    interactive_reserve=settings.gemini_interactive_reserve,
+    acquire_timeout=settings.gemini_rate_limit_timeout,
+)
+
+# Identical concurrent prompts share one upstream Gemini call
+_flight = SingleFlight()
+_async_flight = AsyncSingleFlight()
+
+
+def _prompt_key(kind: str, prompt: str) -> str:
+    return hashlib.sha256(f"{kind}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+# Per-mode latency and upstream call counts, to compare gap_pipeline_mode settings
+_pipeline_latency = LatencyRecorder()
+_upstream_calls = Counter()
+
+
+# Gap results of earlier topics, reused for near-duplicate queries. The relevance
+# check still runs for every query; only gap generation is skipped on a hit.
+_semantic_cache = SemanticCache(
+    threshold=settings.semantic_cache_threshold,
+    max_entries=settings.semantic_cache_size,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+) if settings.semantic_cache_enabled else None
+
+
+def coalescing_stats() -> dict:
+    return {"sync": _flight.stats(), "async": _async_flight.stats()}
+
+
+def pipeline_stats() -> dict:
+    return {
+        "mode": settings.gap_pipeline_mode,
+        "latency": _pipeline_latency.summary(),
+        "upstream_calls": _upstream_calls.snapshot(),
     }
-    """
-    prompt = f"""
+
+
+def retry_stats() -> dict:
+    return _retry.stats()
+
+
+def rate_limit_stats() -> dict:
+    return _limiter.stats()
+
+
+def semantic_cache_stats() -> dict:
+    if _semantic_cache is None:
+        return {"enabled": False}
+    stats = _semantic_cache.stats()
+    # Every hit is one gap-generation call not sent to Gemini
+    return {"enabled": True, **stats, "upstream_calls_saved": stats["exact_hits"] + stats["semantic_hits"]}
+
+
+def _cached_gaps(query: str):
+    if _semantic_cache is None:
+        return None
+    hit = _semantic_cache.get(query)
+    return hit[0] if hit else None
+
+
+def _remember_gaps(query: str, result: dict):
+    # Failed generations carry a "message" and no gaps; those are not cached
+    if _semantic_cache is not None and result.get("gaps") and "message" not in result:
+        _semantic_cache.put(query, result)
+
+
+def _clean_json_text(text: str) -> str:
+    text = text.strip()
+
+    # Sometimes Gemini wraps JSON in backticks or quotes, remove them
+    if text.startswith("```json"):
+        text = text.replace("```json", "").replace("```", "").strip()
+    elif text.startswith('"') and text.endswith('"'):
+        text = text[1:-1]
+
+    return text
+
+
+def _research_gaps_prompt(query: str) -> str:
+    return f"""
     You are an AI assistant. Analyze the following academic topic and identify 5 potential research gaps.
     Each gap should have an importance score from 1 to 100 (100 = most important).
     Respond ONLY in JSON format like this:
@@ -35,23 +134,101 @@ def get_research_gaps(query: str) -> dict:
     Topic: "{query}"
     """
 
-    try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(temperature=0.3),
-        )
 
-        text = response.text.strip()
+def _relevance_prompt(query: str) -> str:
+    return f"""
+    You are an AI assistant. Analyze this user query and respond ONLY in JSON format.
+    The JSON should contain three fields:
+    {{
+        "relevant": true or false,
+        "safe": true or false,
+        "message": "Explanation if the query is not relevant or not safe"
+    }}
+
+    User Query: "{query}"
+    """
+
+
+def _fused_prompt(query: str) -> str:
+    return f"""
+    You are an AI assistant. First decide whether the following user query is a relevant academic
+    research topic and whether it is safe to answer. Then, only if it is both relevant and safe,
+    identify 5 potential research gaps for it. Each gap should have an importance score from 1 to 100
+    (100 = most important). If the query is not relevant or not safe, return an empty "gaps" list.
+    Respond ONLY in JSON format like this:
+
+    {{
+        "relevant": true or false,
+        "safe": true or false,
+        "message": "Explanation if the query is not relevant or not safe",
+        "gaps": [
+            {{"statement": "Gap description 1", "score": 95}},
+            {{"statement": "Gap description 2", "score": 87}},
+            {{"statement": "Gap description 3", "score": 80}},
+            {{"statement": "Gap description 4", "score": 75}},
+            {{"statement": "Gap description 5", "score": 70}}
+        ]
+    }}
+
+    Topic: "{query}"
+    """
+
+
+def _parse_relevance(data: dict) -> dict:
+    return {
+        "relevant": data.get("relevant", False),
+        "safe": data.get("safe", False),
+        "message": data.get("message", ""),
+    }
 
-        # Clean code fences or quotes if present
-        if text.startswith("```json"):
-            text = text.replace("```json", "").replace("```", "").strip()
-        elif text.startswith('"') and text.endswith('"'):
-            text = text[1:-1]
 
-        data = json.loads(text)
-        return data
+def _relevance_error(message: str) -> dict:
+    return {"relevant": False, "safe": False, "message": message}
+
+
+def _total_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) or None
+
+
+def _generate(model, prompt: str, config):
+    return _retry.call(_limited, model.generate_content, prompt, config)
+
+
+def _limited(generate, prompt: str, config):
+    with _limiter.acquire("default", estimate_tokens(prompt, settings.gemini_answer_tokens_estimate)) as lease:
+        response = generate(prompt, generation_config=config, request_options=_REQUEST_OPTIONS)
+        lease.record_usage(_total_tokens(response))
+        return response
+
+
+def get_research_gaps(query: str) -> dict:
+    """
+    Uses Gemini to generate 5 research gaps for the user query.
+    Returns JSON like:
+    {
+        "gaps": [
+            {"statement": "Gap 1", "score": 95},
+            {"statement": "Gap 2", "score": 87},
+            ...
+        ]
+    }
+    """
+    cached = _cached_gaps(query)
+    if cached is not None:
+        return cached
+    prompt = _research_gaps_prompt(query)
+    result = _flight.do(_prompt_key("research_gaps", prompt), lambda: _generate_research_gaps(prompt))
+    _remember_gaps(query, result)
+    return result
+
+
+def _generate_research_gaps(prompt: str) -> dict:
+    _upstream_calls.inc("research_gaps")
+    try:
+        model, config = registry.get("research_gaps")
+        response = _generate(model, prompt, config)
+        return json.loads(_clean_json_text(response.text))
 
     except json.JSONDecodeError:
         return {"gaps": [], "message": "Gemini did not return valid JSON"}
@@ -60,52 +237,151 @@ def get_research_gaps(query: str) -> dict:
 
 
 def is_relevant_query(query: str) -> dict:
-    prompt = f"""
-    You are an AI assistant. Analyze this user query and respond ONLY in JSON format.
-    The JSON should contain three fields:
-    {{
-        "relevant": true or false,
-        "safe": true or false,
-        "message": "Explanation if the query is not relevant or not safe"
-    }}
+    prompt = _relevance_prompt(query)
+    return _flight.do(_prompt_key("relevance", prompt), lambda: _check_relevance(prompt))
 
-    User Query: "{query}"
-    """
 
+def _check_relevance(prompt: str) -> dict:
+    _upstream_calls.inc("relevance")
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(temperature=0),
-        )
-
-        # Strip extra whitespace/newlines
-        text = response.text.strip()
-
-        # Sometimes Gemini wraps JSON in backticks or quotes, remove them
-        if text.startswith("```json"):
-            text = text.replace("```json", "").replace("```", "").strip()
-        elif text.startswith('"') and text.endswith('"'):
-            text = text[1:-1]
-
-        # Parse JSON safely
-        data = json.loads(text)
-        return {
-            "relevant": data.get("relevant", False),
-            "safe": data.get("safe", False),
-            "message": data.get("message", ""),
-        }
+        model, config = registry.get("relevance")
+        response = _generate(model, prompt, config)
+        return _parse_relevance(json.loads(_clean_json_text(response.text)))
 
     except json.JSONDecodeError:
         # Return fallback if Gemini output is not valid JSON
-        return {
-            "relevant": False,
-            "safe": False,
-            "message": "Gemini did not return valid JSON",
-        }
+        return _relevance_error("Gemini did not return valid JSON")
     except Exception as e:
-        return {
-            "relevant": False,
-            "safe": False,
-            "message": f"Something went wrong: {e}",
-        }
+        return _relevance_error(f"Something went wrong: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Async variants: awaited directly by the FastAPI endpoints so a worker is not
+# blocked for the duration of the upstream call.
+# ---------------------------------------------------------------------------
+
+async def _generate_async(model, prompt: str, config):
+    # google-generativeai 0.8 has no working async client on the REST transport
+    if settings.gemini_api_endpoint:
+        generate = functools.partial(asyncio.to_thread, model.generate_content)
+    else:
+        generate = model.generate_content_async
+    return await _retry.call_async(_limited_async, generate, prompt, config)
+
+
+async def _limited_async(generate, prompt: str, config):
+    lease = await _limiter.acquire_async("default", estimate_tokens(prompt, settings.gemini_answer_tokens_estimate))
+    try:
+        response = await generate(prompt, generation_config=config, request_options=_REQUEST_OPTIONS)
+        lease.record_usage(_total_tokens(response))
+        return response
+    finally:
+        await lease.release_async()
+
+
+async def get_research_gaps_async(query: str) -> dict:
+    """Async version of get_research_gaps."""
+    cached = _cached_gaps(query)
+    if cached is not None:
+        return cached
+    prompt = _research_gaps_prompt(query)
+    result = await _async_flight.do(
+        _prompt_key("research_gaps", prompt), lambda: _generate_research_gaps_async(prompt)
+    )
+    _remember_gaps(query, result)
+    return result
+
+
+async def _generate_research_gaps_async(prompt: str) -> dict:
+    _upstream_calls.inc("research_gaps")
+    try:
+        model, config = registry.get("research_gaps")
+        response = await _generate_async(model, prompt, config)
+        return json.loads(_clean_json_text(response.text))
+
+    except json.JSONDecodeError:
+        return {"gaps": [], "message": "Gemini did not return valid JSON"}
+    except Exception as e:
+        return {"gaps": [], "message": f"Something went wrong: {e}"}
+
+
+async def is_relevant_query_async(query: str) -> dict:
+    """Async version of is_relevant_query."""
+    prompt = _relevance_prompt(query)
+    return await _async_flight.do(
+        _prompt_key("relevance", prompt), lambda: _check_relevance_async(prompt)
+    )
+
+
+async def _check_relevance_async(prompt: str) -> dict:
+    _upstream_calls.inc("relevance")
+    try:
+        model, config = registry.get("relevance")
+        response = await _generate_async(model, prompt, config)
+        return _parse_relevance(json.loads(_clean_json_text(response.text)))
+
+    except json.JSONDecodeError:
+        return _relevance_error("Gemini did not return valid JSON")
+    except Exception as e:
+        return _relevance_error(f"Something went wrong: {e}")
+
+
+async def _fused_analysis_async(prompt: str) -> dict:
+    _upstream_calls.inc("fused")
+    try:
+        model, config = registry.get("fused")
+        response = await _generate_async(model, prompt, config)
+        data = json.loads(_clean_json_text(response.text))
+        return {**_parse_relevance(data), "gaps": data.get("gaps", [])}
+
+    except json.JSONDecodeError:
+        return {**_relevance_error("Gemini did not return valid JSON"), "gaps": []}
+    except Exception as e:
+        return {**_relevance_error(f"Something went wrong: {e}"), "gaps": []}
+
+
+async def analyze_query(query: str, mode: str = None) -> tuple:
+    """
+    Runs the safety/relevance check and gap generation for a query using the
+    configured gap_pipeline_mode. Returns (check, research_gap); research_gap
+    is None when the check fails.
+    """
+    mode = mode or settings.gap_pipeline_mode
+    start = time.perf_counter()
+    try:
+        if mode == "fused":
+            cached = _cached_gaps(query)
+            if cached is not None:
+                # Gaps are known; only the verdict is needed for this query
+                check = await is_relevant_query_async(query)
+                if not check["relevant"] or not check["safe"]:
+                    return check, None
+                return check, cached
+            prompt = _fused_prompt(query)
+            data = await _async_flight.do(_prompt_key("fused", prompt), lambda: _fused_analysis_async(prompt))
+            check = _parse_relevance(data)
+            if not check["relevant"] or not check["safe"]:
+                return check, None
+            research_gap = {"gaps": data.get("gaps", [])}
+            _remember_gaps(query, research_gap)
+            return check, research_gap
+
+        if mode == "concurrent":
+            gaps_task = asyncio.ensure_future(get_research_gaps_async(query))
+            try:
+                check = await is_relevant_query_async(query)
+            except BaseException:
+                gaps_task.cancel()
+                raise
+            if not check["relevant"] or not check["safe"]:
+                # Only this caller's wait is cancelled; a shared upstream call keeps running
+                gaps_task.cancel()
+                return check, None
+            return check, await gaps_task
+
+        check = await is_relevant_query_async(query)
+        if not check["relevant"] or not check["safe"]:
+            return check, None
+        return check, await get_research_gaps_async(query)
+    finally:
+        _pipeline_latency.record(mode, time.perf_counter() - start)
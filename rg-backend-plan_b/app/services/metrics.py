@@ -0,0 +1,51 @@
+import threading
+from collections import defaultdict, deque
+
+
+class LatencyRecorder:
+    """Keeps the most recent latency samples per label and reports percentiles."""
+
+    def __init__(self, window: int = 1000):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, label: str, seconds: float):
+        with self._lock:
+            self._samples[label].append(seconds)
+            self._counts[label] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            result = {}
+            for label, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[label] = {
+                    "count": self._counts[label],
+                    "p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+                    "p99_ms": round(_percentile(ordered, 0.99) * 1000, 1),
+                }
+            return result
+
+
+class Counter:
+    """Thread-safe named counters."""
+
+    def __init__(self):
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self._values[name] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+def _percentile(ordered, q: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+    return ordered[index]
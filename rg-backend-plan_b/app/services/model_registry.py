@@ -0,0 +1,57 @@
+import threading
+import google.generativeai as genai
+from app.config import settings
+
+
+def _profiles() -> dict:
+    # profile name -> (model name, temperature); model names come from Settings
+    return {
+        "research_gaps": (settings.gemini_gap_model, settings.gap_temperature),
+        "relevance": (settings.gemini_relevance_model, settings.relevance_temperature),
+        "fused": (settings.gemini_gap_model, settings.gap_temperature),
+    }
+
+
+class ModelRegistry:
+    """
+    Builds each configured GenerativeModel and GenerationConfig once and hands
+    the same instances to every request. Construction happens under a lock and
+    never awaits, so it is safe from worker threads and from event-loop tasks.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._models = {}
+        self._configs = {}
+        self._lock = threading.Lock()
+
+    def get(self, profile: str):
+        """Returns (model, generation_config) for a profile such as "research_gaps"."""
+        entry = self._entries.get(profile)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(profile)
+                if entry is None:
+                    entry = self._entries[profile] = self._build(profile)
+        return entry
+
+    def _build(self, profile: str):
+        # Profiles sharing a model name or temperature share the instances too
+        model_name, temperature = _profiles()[profile]
+        model = self._models.get(model_name)
+        if model is None:
+            model = self._models[model_name] = genai.GenerativeModel(model_name)
+        config = self._configs.get(temperature)
+        if config is None:
+            config = self._configs[temperature] = genai.types.GenerationConfig(temperature=temperature)
+        return model, config
+
+    def clear(self):
+        """Drops cached instances, e.g. after changing model settings at runtime."""
+        with self._lock:
+            self._entries.clear()
+            self._models.clear()
+            self._configs.clear()
+
+
+registry = ModelRegistry()
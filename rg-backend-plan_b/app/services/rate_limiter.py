@@ -0,0 +1,295 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from app.services.metrics import Counter
+
+# Lower number = served first
+LANES = {"interactive": 0, "default": 1, "batch": 2}
+
+# Waiters that stop polling for this long (crashed or killed) no longer block lower lanes
+WAITER_STALE_SECONDS = 2.0
+
+# Same tables as Backend/services/rate_limiter.py, so both services can share one file
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    lane TEXT NOT NULL,
+    acquired REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waiters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pid INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+def estimate_tokens(prompt: str, answer_tokens: int) -> int:
+    # ~4 characters per prompt token, plus the expected answer
+    return len(prompt) // 4 + answer_tokens
+
+
+class Lease:
+    def __init__(self, limiter: "RateLimiter", lease_id, estimated_tokens: float):
+        self.limiter = limiter
+        self.lease_id = lease_id
+        self.estimated_tokens = estimated_tokens
+        self.used_tokens = None
+
+    def record_usage(self, total_tokens):
+        self.used_tokens = total_tokens
+
+    def release(self):
+        if self.lease_id is not None:
+            self.limiter.release(self)
+            self.lease_id = None
+
+    async def release_async(self):
+        if self.lease_id is not None:
+            await asyncio.to_thread(self.release)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and (estimated) tokens per minute plus a
+    max-in-flight cap, kept in SQLite so every process pointing at the same
+    db_path shares one budget. A call is admitted only when no live waiter of
+    a higher-priority lane is queued, and the last `interactive_reserve`
+    in-flight slots are kept for the interactive lane. Buckets hold
+    `burst_seconds` of refill, so any minute admits at most (60 + burst_seconds)
+    / 60 times the limit. Each admission attempt is one short SQLite
+    transaction; waiting happens outside it.
+    """
+
+    def __init__(self, db_path: str = ":memory:", rpm: float = 0, tpm: float = 0, max_in_flight: int = 32,
+                 interactive_reserve: int = 4, acquire_timeout: float = 30.0, lease_ttl: float = 300.0,
+                 poll_interval: float = 0.05, burst_seconds: float = 10.0):
+        self.db_path = db_path
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_in_flight = max_in_flight
+        self.interactive_reserve = min(interactive_reserve, max(max_in_flight - 1, 0))
+        self.acquire_timeout = acquire_timeout
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.burst_seconds = burst_seconds
+        self.pid = os.getpid()
+
+        self._conn = sqlite3.connect(db_path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if db_path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self._counts = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm or self.max_in_flight)
+
+    def acquire(self, lane: str = "default", tokens: float = 0) -> Lease:
+        if not self.enabled:
+            return Lease(self, None, tokens)
+        started = time.monotonic()
+        waiter_id = None
+        try:
+            while True:
+                lease_id, wait, waiter_id = self._try_acquire(lane, tokens, waiter_id)
+                if lease_id is not None:
+                    return self._admitted(lane, lease_id, tokens, started)
+                time.sleep(self._next_sleep(lane, wait, started))
+        finally:
+            self._forget_waiter(waiter_id)
+
+    async def acquire_async(self, lane: str = "default", tokens: float = 0) -> Lease:
+        # The SQLite transactions (BEGIN IMMEDIATE can wait on other processes)
+        # run in worker threads so they never block the event loop
+        if not self.enabled:
+            return Lease(self, None, tokens)
+        started = time.monotonic()
+        waiter_id = None
+        try:
+            while True:
+                lease_id, wait, waiter_id = await asyncio.to_thread(self._try_acquire, lane, tokens, waiter_id)
+                if lease_id is not None:
+                    return self._admitted(lane, lease_id, tokens, started)
+                await asyncio.sleep(self._next_sleep(lane, wait, started))
+        finally:
+            if waiter_id is not None:
+                await asyncio.to_thread(self._forget_waiter, waiter_id)
+
+    def _next_sleep(self, lane: str, wait: float, started: float) -> float:
+        sleep = min(wait, self.poll_interval)
+        if time.monotonic() - started + sleep > self.acquire_timeout:
+            self._counts.inc(f"{lane}.timeouts")
+            raise RateLimitTimeout(f"Gemini rate limit: not admitted within {self.acquire_timeout}s")
+        return sleep
+
+    def _admitted(self, lane: str, lease_id: int, tokens: float, started: float) -> Lease:
+        self._counts.inc(f"{lane}.acquired")
+        waited_ms = (time.monotonic() - started) * 1000
+        if waited_ms >= 1:
+            self._counts.inc(f"{lane}.waited")
+            self._counts.inc(f"{lane}.wait_ms", waited_ms)
+        return Lease(self, lease_id, tokens)
+
+    def _forget_waiter(self, waiter_id):
+        if waiter_id is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+
+    def _try_acquire(self, lane: str, tokens: float, waiter_id):
+        """One admission attempt: (lease id or None, seconds to wait, waiter id)."""
+        priority = LANES.get(lane, LANES["default"])
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM waiters WHERE heartbeat < ?", (now - WAITER_STALE_SECONDS,))
+                ahead = self._conn.execute("SELECT COUNT(*) FROM waiters WHERE priority < ?", (priority,)).fetchone()[0]
+
+                wait = self.poll_interval if ahead else 0.0
+                if not wait and self.max_in_flight:
+                    wait = self._in_flight_wait(priority, now)
+                rpm_tokens = tpm_tokens = None
+                if not wait and self.rpm:
+                    rpm_tokens, wait = self._bucket("rpm", self.rpm, 1, now)
+                if not wait and self.tpm:
+                    tpm_tokens, wait = self._bucket("tpm", self.tpm, self._tpm_cost(tokens), now)
+
+                if wait:
+                    if waiter_id is None:
+                        waiter_id = self._conn.execute(
+                            "INSERT INTO waiters (pid, priority, heartbeat) VALUES (?, ?, ?)", (self.pid, priority, now)
+                        ).lastrowid
+                    else:
+                        self._conn.execute("UPDATE waiters SET heartbeat = ? WHERE id = ?", (now, waiter_id))
+                    self._conn.execute("COMMIT")
+                    return None, wait, waiter_id
+
+                if rpm_tokens is not None:
+                    self._store("rpm", rpm_tokens - 1, now)
+                if tpm_tokens is not None:
+                    self._store("tpm", tpm_tokens - self._tpm_cost(tokens), now)
+                lease_id = self._conn.execute(
+                    "INSERT INTO leases (pid, lane, acquired) VALUES (?, ?, ?)", (self.pid, lane, now)
+                ).lastrowid
+                if waiter_id is not None:
+                    self._conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+                self._conn.execute("COMMIT")
+                return lease_id, 0.0, None
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _in_flight_wait(self, priority: int, now: float) -> float:
+        self._conn.execute("DELETE FROM leases WHERE acquired < ?", (now - self.lease_ttl,))
+        limit = self.max_in_flight
+        if priority > LANES["interactive"]:
+            limit -= self.interactive_reserve
+        if self._conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0] < limit:
+            return 0.0
+        # Leases of processes that died without releasing free up their slots
+        for (pid,) in self._conn.execute("SELECT DISTINCT pid FROM leases").fetchall():
+            if not _pid_alive(pid):
+                self._conn.execute("DELETE FROM leases WHERE pid = ?", (pid,))
+        in_flight = self._conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+        return 0.0 if in_flight < limit else self.poll_interval
+
+    def _capacity(self, per_minute: float) -> float:
+        return max(1.0, per_minute * self.burst_seconds / 60.0)
+
+    def _tpm_cost(self, tokens: float) -> float:
+        # A call larger than the bucket would never be admitted; it takes the whole bucket
+        return min(tokens, self._capacity(self.tpm))
+
+    def _bucket(self, name: str, per_minute: float, cost: float, now: float):
+        """(tokens after refill, seconds until `cost` is available)."""
+        row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        rate = per_minute / 60.0
+        capacity = self._capacity(per_minute)
+        tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+        if tokens >= cost:
+            return tokens, 0.0
+        return tokens, (cost - tokens) / rate
+
+    def _store(self, name: str, tokens: float, now: float):
+        self._conn.execute(
+            "INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+            (name, tokens, now),
+        )
+
+    def release(self, lease: Lease):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM leases WHERE id = ?", (lease.lease_id,))
+                if self.tpm and lease.used_tokens is not None:
+                    now = time.time()
+                    tokens, _ = self._bucket("tpm", self.tpm, 0, now)
+                    # Over-estimates are refunded; under-estimates become debt
+                    refund = self._tpm_cost(lease.estimated_tokens) - lease.used_tokens
+                    self._store("tpm", min(self._capacity(self.tpm), tokens + refund), now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self._conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+            waiting = self._conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0]
+            buckets = dict(self._conn.execute("SELECT name, tokens FROM buckets").fetchall())
+        counts = self._counts.snapshot()
+        lanes = {}
+        for lane in LANES:
+            waited = counts.get(f"{lane}.waited", 0)
+            wait_ms = counts.get(f"{lane}.wait_ms", 0)
+            lanes[lane] = {
+                "acquired": counts.get(f"{lane}.acquired", 0),
+                "waited": waited,
+                "avg_wait_ms": round(wait_ms / waited, 1) if waited else 0.0,
+                "timeouts": counts.get(f"{lane}.timeouts", 0),
+            }
+        return {
+            "db_path": self.db_path,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "max_in_flight": self.max_in_flight,
+            "interactive_reserve": self.interactive_reserve,
+            "in_flight": in_flight,
+            "waiting": waiting,
+            "buckets": {name: round(tokens, 1) for name, tokens in buckets.items()},
+            "lanes": lanes,
+        }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,176 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from google.api_core import exceptions as core_exceptions
+from tenacity import AsyncRetrying, RetryCallState, Retrying, retry_if_exception
+
+from app.services.metrics import Counter
+
+# Statuses worth another attempt: timeouts, rate limiting and transient server errors
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryBudget:
+    """
+    Token bucket capping retries to a fraction of first attempts. Every call
+    deposits `ratio` tokens (up to `max_tokens`) and every retry spends one, so
+    a sustained outage adds at most `ratio` extra load instead of multiplying
+    it by the attempt count.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def classify(error: BaseException = None) -> str:
+    """Outcome of one attempt: ok, http_<status>, timeout, connection_error or error."""
+    if error is None:
+        return "ok"
+    if isinstance(error, (requests.exceptions.Timeout, core_exceptions.DeadlineExceeded, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection_error"
+    # google.api_core errors carry the HTTP status as `code`
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return f"http_{code}"
+    return "error"
+
+
+def is_retryable(outcome: str) -> bool:
+    if outcome in ("timeout", "connection_error"):
+        return True
+    return outcome.startswith("http_") and int(outcome[5:]) in RETRYABLE_STATUS
+
+
+def retry_after(error: BaseException):
+    """Seconds the server asked us to wait (Retry-After header or gRPC RetryInfo), or None."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None and hasattr(response, "headers") else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    return None
+
+
+class RetryPolicy:
+    """
+    Retries retryable Gemini failures with decorrelated jitter (each delay is
+    uniform between base_delay and three times the previous one, capped at
+    max_delay), never sooner than a Retry-After, and only while the shared
+    RetryBudget has tokens. No retry starts once it would end past `deadline`
+    seconds after the first attempt.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 deadline: float = 15.0, budget: RetryBudget = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget = budget
+        self._attempts = Counter()
+        self._decisions = Counter()
+
+    def call(self, fn, *args, **kwargs):
+        retrying = Retrying(**self._tenacity_options())
+        return retrying(self._counted(fn), *args, **kwargs)
+
+    async def call_async(self, fn, *args, **kwargs):
+        retrying = AsyncRetrying(**self._tenacity_options())
+        return await retrying(self._counted_async(fn), *args, **kwargs)
+
+    def _counted(self, fn):
+        def attempt(*args, **kwargs):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._attempts.inc(classify(e))
+                raise
+            self._attempts.inc("ok")
+            return result
+        return attempt
+
+    def _counted_async(self, fn):
+        async def attempt(*args, **kwargs):
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                self._attempts.inc(classify(e))
+                raise
+            self._attempts.inc("ok")
+            return result
+        return attempt
+
+    def _tenacity_options(self) -> dict:
+        if self.budget is not None:
+            self.budget.deposit()
+        # Previous delay of this call, for decorrelated jitter
+        previous = {"delay": self.base_delay}
+
+        def wait(retry_state: RetryCallState) -> float:
+            delay = min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous["delay"] * 3)))
+            server_delay = retry_after(retry_state.outcome.exception())
+            if server_delay is not None:
+                # The server knows when it will recover; never come back sooner
+                delay = max(delay, server_delay)
+            previous["delay"] = delay
+            return delay
+
+        def stop(retry_state: RetryCallState) -> bool:
+            if retry_state.attempt_number >= self.max_attempts:
+                self._decisions.inc("gave_up")
+                return True
+            if retry_state.seconds_since_start + (retry_state.upcoming_sleep or 0) > self.deadline:
+                self._decisions.inc("gave_up")
+                return True
+            if self.budget is not None and not self.budget.withdraw():
+                self._decisions.inc("budget_exhausted")
+                return True
+            self._decisions.inc("retries")
+            return False
+
+        return {
+            "retry": retry_if_exception(lambda e: is_retryable(classify(e))),
+            "wait": wait,
+            "stop": stop,
+            "reraise": True,
+        }
+
+    def stats(self) -> dict:
+        decisions = self._decisions.snapshot()
+        return {
+            "attempts": self._attempts.snapshot(),
+            "retries": decisions.get("retries", 0),
+            "budget_exhausted": decisions.get("budget_exhausted", 0),
+            "gave_up": decisions.get("gave_up", 0),
+            "max_attempts": self.max_attempts,
+            "budget_tokens": round(self.budget.tokens, 2) if self.budget is not None else None,
+        }
@@ -0,0 +1,186 @@
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+_STOPWORDS = frozenset(
+    "a an and are as at by for from how in into is of on or the to using via what with within".split()
+)
+
+
+def normalize_topic(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _stem(word: str) -> str:
+    # Plural folding only; enough for "system"/"systems", "network"/"networks"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def key_words(text: str) -> frozenset:
+    # Numbers and short words ("type 1", "industry 4.0", "5g", "iot") barely move the
+    # embedding but change the topic, so a semantic match must have the same ones
+    words = (_stem(w) for w in normalize_topic(text).split() if w not in _STOPWORDS)
+    return frozenset(w for w in words if len(w) <= 3 or any(c.isdigit() for c in w))
+
+
+class HashedNgramEmbedder:
+    """
+    Embeds short texts as sublinear term frequencies of their words and the
+    character n-grams of each word, hashed into `dim` buckets. Word order is
+    ignored, so "healthcare data engineering" and "data engineering in
+    healthcare" embed identically; character n-grams tolerate inflections
+    and typos. IDF weighting is applied by the index, which knows the corpus.
+    """
+
+    def __init__(self, dim: int = 1024, char_ngrams: tuple = (3, 4)):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def terms(self, text: str) -> list:
+        words = [_stem(w) for w in normalize_topic(text).split() if w not in _STOPWORDS]
+        terms = [f"w:{w}" for w in words]
+        for word in words:
+            padded = f"#{word}#"
+            for n in self.char_ngrams:
+                terms.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return terms
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in self.terms(text):
+            vector[zlib.crc32(term.encode("utf-8")) % self.dim] += 1.0
+        return np.log1p(vector)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache over embedded texts. get() returns the value stored
+    for the most similar text whose TF-IDF cosine similarity reaches
+    `threshold` and whose key words (numbers and short words) are exactly the
+    query's. Entries live in a fixed ring of `max_entries` rows (the
+    oldest is overwritten) and expire after `ttl_seconds`.
+
+    The IDF-weighted, normalised matrix used for lookups is rebuilt when the
+    index has changed by more than `reweight_fraction` of its size, so a
+    lookup is a single matrix-vector product.
+    """
+
+    def __init__(self, embedder: HashedNgramEmbedder = None, threshold: float = 0.9,
+                 max_entries: int = 5000, ttl_seconds: float = 86400, reweight_fraction: float = 0.1):
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.reweight_fraction = reweight_fraction
+
+        dim = self.embedder.dim
+        self._tf = np.zeros((max_entries, dim), dtype=np.float32)
+        self._weighted = np.zeros((max_entries, dim), dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._idf = np.ones(dim, dtype=np.float32)
+        self._created = np.zeros(max_entries)
+        self._keys = [None] * max_entries
+        self._key_words = [None] * max_entries
+        self._values = [None] * max_entries
+        self._slots = {}
+        self._next = 0
+        self._changes = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0, "expired": 0,
+                       "key_word_mismatches": 0}
+
+    def get(self, text: str):
+        """Returns (value, similarity, matched_text) or None."""
+        key = normalize_topic(text)
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            slot = self._slots.get(key)
+            if slot is not None:
+                if now - self._created[slot] <= self.ttl_seconds:
+                    self._stats["exact_hits"] += 1
+                    return self._values[slot], 1.0, key
+                self._stats["expired"] += 1
+            if self._slots:
+                self._maybe_reweight()
+                query = self.embedder.embed(key) * self._idf
+                norm = np.linalg.norm(query)
+                if norm > 0:
+                    similarities = self._weighted @ (query / norm)
+                    similarities[now - self._created > self.ttl_seconds] = -1.0
+                    candidates = np.flatnonzero(similarities >= self.threshold)
+                    words = key_words(key)
+                    for best in candidates[np.argsort(-similarities[candidates])]:
+                        if self._keys[best] is None:
+                            continue
+                        if self._key_words[best] != words:
+                            self._stats["key_word_mismatches"] += 1
+                            continue
+                        self._stats["semantic_hits"] += 1
+                        return self._values[best], float(similarities[best]), self._keys[best]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, text: str, value):
+        key = normalize_topic(text)
+        if not key:
+            return
+        tf = self.embedder.embed(key)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._next
+                self._next = (self._next + 1) % self.max_entries
+                self._evict(slot)
+                self._slots[key] = slot
+                self._keys[slot] = key
+                self._key_words[slot] = key_words(key)
+                self._tf[slot] = tf
+                self._df += tf > 0
+                self._weighted[slot] = self._normalized(tf * self._idf)
+                self._changes += 1
+            self._values[slot] = value
+            self._created[slot] = time.time()
+
+    def _evict(self, slot: int):
+        old = self._keys[slot]
+        if old is None:
+            return
+        del self._slots[old]
+        self._df -= self._tf[slot] > 0
+        self._tf[slot] = 0
+        self._weighted[slot] = 0
+        self._keys[slot] = self._key_words[slot] = self._values[slot] = None
+        self._created[slot] = 0
+
+    def _maybe_reweight(self):
+        if self._changes <= self.reweight_fraction * len(self._slots):
+            return
+        n = len(self._slots)
+        self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+        weighted = self._tf * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        np.divide(weighted, norms, out=weighted, where=norms > 0)
+        self._weighted = weighted
+        self._changes = 0
+
+    @staticmethod
+    def _normalized(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._stats["exact_hits"] + self._stats["semantic_hits"]
+            lookups = self._stats["lookups"]
+            return {
+                **self._stats,
+                "entries": len(self._slots),
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "threshold": self.threshold,
+            }
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key runs the
+    work, later callers for the same key block until it finishes and receive
+    the same result (or the same exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced_waiters": 0, "max_waiters": 0}
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+            else:
+                call.waiters += 1
+                self._stats["coalesced_waiters"] += 1
+                self._stats["max_waiters"] = max(self._stats["max_waiters"], call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight. The shared call runs as its own task,
+    so a caller that is cancelled (e.g. client disconnect) does not cancel the
+    upstream request other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {"executions": 0, "coalesced_waiters": 0, "max_waiters": 0}
+        self._waiters = {}
+
+    async def do(self, key: str, coro_fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            self._stats["executions"] += 1
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self._waiters[key] += 1
+            self._stats["coalesced_waiters"] += 1
+            self._stats["max_waiters"] = max(self._stats["max_waiters"], self._waiters[key])
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+
+    def stats(self) -> dict:
+        return {**self._stats, "in_flight": len(self._calls)}
@@ -0,0 +1,83 @@
+"""
+Load benchmark: blocking `def` endpoints vs. native `async def` endpoints.
+
+Gemini is replaced by a local stub that sleeps for a fixed latency (time.sleep
+for the blocking client, asyncio.sleep for the async one), so the numbers only
+reflect how many upstream calls a single worker can keep in flight.
+
+    python benchmarks/bench_async_endpoints.py --requests 400 --concurrency 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+import stub_gemini
+
+stub_gemini.install(0.5)
+
+from app.main import app as async_app  # noqa: E402
+from app.models import ResearchGapResponse  # noqa: E402
+from app.services.gemini_service import get_research_gaps, is_relevant_query  # noqa: E402
+
+# The previous endpoint shape: blocking calls inside a sync handler
+sync_app = FastAPI()
+
+
+@sync_app.get("/researchgap", response_model=ResearchGapResponse)
+def sync_endpoint(query: str):
+    check = is_relevant_query(query)
+    if not check["relevant"] or not check["safe"]:
+        raise HTTPException(status_code=400, detail=check["message"])
+    return ResearchGapResponse(gaps=get_research_gaps(query).get("gaps", []))
+
+
+async def run_load(app, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                # Unique topics so request coalescing does not flatter either side
+                response = await client.get("/researchgap", params={"query": f"topic {i}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub Gemini latency per call (s)")
+    args = parser.parse_args()
+    stub_gemini.install(args.latency)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"2 upstream calls/request at {args.latency * 1000:.0f} ms each")
+    for name, app in (("sync def", sync_app), ("async def", async_app)):
+        result = asyncio.run(run_load(app, args.requests, args.concurrency))
+        print(f"{name:>10}: {json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares gap_pipeline_mode settings (sequential / concurrent / fused) on latency
+and upstream Gemini calls per request, using the in-process Gemini stub.
+
+    python benchmarks/bench_gap_modes.py --requests 200 --latency 0.3 --reject-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+import stub_gemini
+
+stub_gemini.install(0.3)
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.gemini_service import pipeline_stats  # noqa: E402
+
+
+async def run_mode(mode: str, total: int, concurrency: int, reject_rate: float) -> dict:
+    settings.gap_pipeline_mode = mode
+    calls_before = sum(pipeline_stats()["upstream_calls"].values())
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    reject_every = int(1 / reject_rate) if reject_rate > 0 else 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(i):
+            topic = f"blocked topic {i}" if reject_every and i % reject_every == 0 else f"{mode} topic {i}"
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/researchgap", params={"query": topic})
+                assert response.status_code in (200, 400), response.text
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+
+    latencies.sort()
+    calls = sum(pipeline_stats()["upstream_calls"].values()) - calls_before
+    return {
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+        "upstream_calls_per_request": round(calls / total, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub Gemini latency per call (s)")
+    parser.add_argument("--reject-rate", type=float, default=0.1, help="fraction of queries failing the safety check")
+    args = parser.parse_args()
+    stub_gemini.install(args.latency)
+
+    for mode in ("sequential", "concurrent", "fused"):
+        result = asyncio.run(run_mode(mode, args.requests, args.concurrency, args.reject_rate))
+        print(f"{mode:>10}: {json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
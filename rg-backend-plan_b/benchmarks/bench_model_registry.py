@@ -0,0 +1,51 @@
+"""
+Microbenchmark: per-request GenerativeModel/GenerationConfig construction vs.
+the shared instances handed out by services.model_registry.
+
+No network calls are made; only the client-side setup cost is measured.
+
+    python benchmarks/bench_model_registry.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import google.generativeai as genai  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services.model_registry import registry  # noqa: E402
+
+
+def per_request(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        genai.GenerativeModel(settings.gemini_gap_model)
+        genai.types.GenerationConfig(temperature=settings.gap_temperature)
+    return time.perf_counter() - start
+
+
+def shared(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        registry.get("research_gaps")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    registry.get("research_gaps")  # warm the registry once, as the first request would
+    for name, fn in (("per-request construction", per_request), ("model registry", shared)):
+        elapsed = fn(args.iterations)
+        print(f"{name:>24}: {elapsed / args.iterations * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
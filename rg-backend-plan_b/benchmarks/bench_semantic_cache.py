@@ -0,0 +1,153 @@
+"""
+Semantic gap cache on a workload of paraphrased topics: hit rate, Gemini calls
+saved, wrong matches and lookup cost, using the in-process Gemini stub.
+
+Each request picks one of --topics base topics and phrases it one of several
+ways (word order, stopwords, plurals, casing), or is a brand-new topic with
+probability --new-rate. A hit is "wrong" when it returns another base topic's gaps.
+Pairs of topics that embed almost identically but differ in a number or short
+word ("type 1" / "type 2") must never match each other.
+
+    python benchmarks/bench_semantic_cache.py --requests 2000 --topics 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+os.environ["SEMANTIC_CACHE_ENABLED"] = "true"
+
+import httpx  # noqa: E402
+
+import stub_gemini  # noqa: E402
+
+stub_gemini.install(0.0)
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import gemini_service  # noqa: E402
+from app.services.semantic_cache import SemanticCache  # noqa: E402
+
+METHODS = ["machine learning", "deep learning", "federated learning", "blockchain", "digital twins",
+           "natural language processing", "computer vision", "reinforcement learning", "edge computing",
+           "knowledge graphs", "graph neural networks", "causal inference", "large language models"]
+APPLICATIONS = ["fraud detection", "anomaly detection", "risk prediction", "resource scheduling",
+                "image segmentation", "demand forecasting", "privacy preservation", "decision support",
+                "misinformation detection", "patient triage", "energy optimization", "quality control"]
+DOMAINS = ["healthcare", "finance", "agriculture", "education", "manufacturing", "smart cities",
+           "supply chains", "climate science", "cybersecurity", "public policy", "transportation"]
+
+# (cached topic, different topic that must miss): they differ only in a number or a short word
+NEAR_MISSES = [
+    ("type 1", "type 2 diabetes management"),
+    ("type 1 diabetes management", "type 2 diabetes management"),
+    ("industry 4.0", "industry 5.0"),
+    ("world war 1 history", "world war 2 history"),
+    ("5g network security", "6g network security"),
+    ("iot security in healthcare", "ai security in healthcare"),
+]
+
+
+def phrasings(method: str, application: str, domain: str) -> list:
+    return [
+        f"{method} for {application} in {domain}",
+        f"{domain} {application} using {method}",
+        f"{application} in {domain} with {method}",
+        f"{method.title()} for {application.title()} in {domain.title()}",
+        f"{method} for {application}s in {domain}",
+        f"  {method}   {application} {domain} ",
+    ]
+
+
+def build_workload(args) -> list:
+    rng = random.Random(args.seed)
+    combos = set()
+    while len(combos) < args.topics:
+        combos.add((rng.choice(METHODS), rng.choice(APPLICATIONS), rng.choice(DOMAINS)))
+    combos = sorted(combos)
+    workload = []
+    for i in range(args.requests):
+        if rng.random() < args.new_rate:
+            workload.append((f"new-{i}", f"{rng.choice(METHODS)} study {i} of {rng.choice(DOMAINS)}"))
+        else:
+            combo = rng.choice(combos)
+            workload.append(("|".join(combo), rng.choice(phrasings(*combo))))
+    return workload
+
+
+async def run(workload: list) -> dict:
+    # Gaps echo the topic, so a hit can be traced back to the topic it came from
+    owner = {}
+
+    def stub_text(prompt: str) -> str:
+        topic = prompt.rsplit('Topic: "', 1)[-1].split('"', 1)[0] if 'Topic: "' in prompt else ""
+        if '"gaps"' in prompt:
+            return json.dumps({"gaps": [{"statement": f"gap for {topic}", "score": 90}]})
+        return json.dumps({"relevant": True, "safe": True, "message": ""})
+
+    stub_gemini._stub_text = stub_text
+    calls_before = dict(gemini_service.pipeline_stats()["upstream_calls"])
+    wrong = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for base, topic in workload:
+            response = await client.get("/researchgap", params={"query": topic})
+            statement = response.json()["gaps"][0]["statement"]
+            owner.setdefault(statement, base)
+            if owner[statement] != base:
+                wrong += 1
+    calls = gemini_service.pipeline_stats()["upstream_calls"]
+    gap_calls = calls.get("research_gaps", 0) - calls_before.get("research_gaps", 0)
+    return {"gap_calls": gap_calls, "wrong_hits": wrong}
+
+
+def near_miss_matches() -> list:
+    rng = random.Random(2)
+    cache = SemanticCache()
+    for i in range(200):
+        cache.put(f"{rng.choice(METHODS)} for {rng.choice(APPLICATIONS)} in {rng.choice(DOMAINS)}", i)
+    for cached, _ in NEAR_MISSES:
+        cache.put(cached, cached)
+    return [(query, hit[2], hit[1]) for _, query in NEAR_MISSES if (hit := cache.get(query))]
+
+
+def lookup_cost(entries: int, repeat: int = 200) -> float:
+    rng = random.Random(1)
+    cache = SemanticCache(max_entries=entries)
+    for i in range(entries):
+        cache.put(f"{rng.choice(METHODS)} {rng.choice(APPLICATIONS)} {rng.choice(DOMAINS)} {i}", i)
+    cache.get("warm up the weights")
+    start = time.perf_counter()
+    for i in range(repeat):
+        cache.get(f"{rng.choice(METHODS)} for {rng.choice(DOMAINS)} variant {i}")
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--topics", type=int, default=300, help="distinct base topics")
+    parser.add_argument("--new-rate", type=float, default=0.1, help="fraction of never-seen topics")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    workload = build_workload(args)
+    distinct = len({normal for _, normal in ((b, " ".join(t.lower().split())) for b, t in workload)})
+    result = asyncio.run(run(workload))
+    stats = gemini_service.semantic_cache_stats()
+    print(f"{args.requests} requests, {args.topics} base topics, {distinct} distinct strings "
+          f"(an exact-match cache would make {distinct} gap calls)")
+    print(f"threshold {settings.semantic_cache_threshold}: {result['gap_calls']} gap calls, "
+          f"hit rate {stats['hit_rate']:.1%} ({stats['exact_hits']} exact, {stats['semantic_hits']} semantic), "
+          f"{stats['upstream_calls_saved']} calls saved, {result['wrong_hits']} wrong hits")
+    wrong = near_miss_matches()
+    print(f"near-miss pairs: {len(wrong)} of {len(NEAR_MISSES)} wrongly matched")
+    for query, matched, similarity in wrong:
+        print(f"  '{query}' -> '{matched}' ({similarity:.3f})")
+    for entries in (1000, 5000):
+        print(f"lookup with {entries} entries: {lookup_cost(entries):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
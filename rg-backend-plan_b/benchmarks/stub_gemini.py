@@ -0,0 +1,60 @@
+"""
+In-process stand-in for google.generativeai.GenerativeModel used by the benchmarks.
+
+install(latency) patches genai.GenerativeModel so that every call sleeps for
+`latency` seconds (time.sleep for generate_content, asyncio.sleep for
+generate_content_async) and returns a canned JSON answer. Import this module
+before anything from `app` so the service picks up the stub.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+# Benchmark topics like "topic 12" / "topic 13" are near-duplicates to the semantic
+# cache; benchmarks that want it enable it explicitly
+os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+
+import google.generativeai as genai  # noqa: E402
+
+LATENCY = {"seconds": 0.5}
+
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def _stub_text(prompt: str) -> str:
+    gaps = [{"statement": f"Gap {i}", "score": 90 - i} for i in range(5)]
+    verdict = {"relevant": True, "safe": True, "message": ""}
+    if "blocked topic" in prompt:
+        verdict = {"relevant": False, "safe": False, "message": "Query is not an academic topic"}
+        gaps = []
+    if '"gaps"' in prompt and '"relevant"' in prompt:
+        return json.dumps({**verdict, "gaps": gaps})
+    if '"gaps"' in prompt:
+        return json.dumps({"gaps": gaps})
+    return json.dumps(verdict)
+
+
+class StubModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(LATENCY["seconds"])
+        return _StubResponse(_stub_text(prompt))
+
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(LATENCY["seconds"])
+        return _StubResponse(_stub_text(prompt))
+
+
+def install(latency: float):
+    LATENCY["seconds"] = latency
+    genai.GenerativeModel = StubModel
@@ -4,7 +4,7 @@ from app.config import settings
 genai.configure(api_key=settings.gemini_api_key)
 
 try:
-    model = genai.GenerativeModel("gemini-2.0-flash-exp")
+    model = genai.GenerativeModel(settings.gemini_gap_model)
     response = model.generate_content("Say hello")
     print("✓ API Key is valid!")
     print(f"Response: {response.text[:50]}...")
@@ -1,14 +1,29 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 from flask_cors import CORS
 import requests
 import json
-import sqlite3
+import base64
 import google.generativeai as genai
 from datetime import datetime
+import atexit
 import io
 import os
+import queue
+import re
+import threading
+import time
+from urllib.parse import urljoin
 from dotenv import load_dotenv
 
+from artifacts import ArtifactStore
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from codec import ColumnCodec
+from db import Database
+from jobs import JobQueue, JobStore
+from pipeline import Pipeline, PipelineError, Stage, StageError
+from semantic_cache import TopicIndex
+from stage_cache import StageCache
+
 load_dotenv()
 
 app = Flask(__name__)
@@ -16,15 +31,69 @@ CORS(app)
 
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
-if GEMINI_API_KEY:
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-pro')
+# Optional Gemini-compatible endpoint (e.g. loadtest/stub_server.py), served over REST
+GEMINI_API_ENDPOINT = os.getenv('GEMINI_API_ENDPOINT', '')
+if GEMINI_API_KEY and GEMINI_API_ENDPOINT:
+    genai.configure(api_key=GEMINI_API_KEY, transport='rest',
+                    client_options={'api_endpoint': GEMINI_API_ENDPOINT})
+elif GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-pro')
 
-# Database setup
+# Pipeline time budgets in seconds (per stage, and for the whole run)
+STAGE_TIMEOUTS = {
+    'gaps': float(os.getenv('STAGE_TIMEOUT_GAPS', '25')),
+    'questions': float(os.getenv('STAGE_TIMEOUT_QUESTIONS', '25')),
+    'methodology': float(os.getenv('STAGE_TIMEOUT_METHODOLOGY', '65')),
+    'blog_opening': float(os.getenv('STAGE_TIMEOUT_BLOG_OPENING', '60')),
+    'blog': float(os.getenv('STAGE_TIMEOUT_BLOG', '90')),
+}
+PIPELINE_DEADLINE = float(os.getenv('PIPELINE_DEADLINE', '240'))
+
+# How long (seconds) a stage result is reused for the same topic and inputs; 0 = never
+STAGE_CACHE_TTLS = {
+    'gaps': float(os.getenv('STAGE_CACHE_TTL_GAPS', '86400')),
+    'questions': float(os.getenv('STAGE_CACHE_TTL_QUESTIONS', '86400')),
+    'methodology': float(os.getenv('STAGE_CACHE_TTL_METHODOLOGY', '86400')),
+}
+# How long (seconds) past its TTL a cached result is kept to serve while its API is down
+STAGE_CACHE_STALE_TTL = float(os.getenv('STAGE_CACHE_STALE_TTL', '604800'))
+# Reuse the cached results of a near-duplicate topic (cosine similarity of
+# local TF-IDF embeddings); SEMANTIC_CACHE=0 limits reuse to the same topic
+SEMANTIC_CACHE = os.getenv('SEMANTIC_CACHE', '1') != '0'
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9'))
+
+# Shared GenerativeModel instances, built once per model name
+_models = {}
+_models_lock = threading.Lock()
+
+def get_model(model_name=None):
+    """Return the shared GenerativeModel for model_name (default: GEMINI_MODEL)"""
+    model_name = model_name or GEMINI_MODEL
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                model = _models[model_name] = genai.GenerativeModel(model_name)
+    return model
+
+# Database setup: an absolute path so the app works from any working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.getenv('BLOGS_DB', os.path.join(BASE_DIR, 'blogs.db'))
+db = Database(
+    DB_PATH,
+    pool_size=int(os.getenv('DB_POOL_SIZE', '8')),
+    busy_timeout=float(os.getenv('DB_BUSY_TIMEOUT', '5'))
+)
+
+# content and the JSON payload columns are stored zlib-compressed; unpack()
+# is also available in SQL for the search view and triggers
+codec = ColumnCodec(db, level=int(os.getenv('BLOG_COMPRESSION_LEVEL', '6')))
+db.create_function('unpack', 1, codec.unpack)
+
 def init_db():
-    conn = sqlite3.connect('blogs.db')
-    c = conn.cursor()
-    c.execute('''
+    db.execute('''
         CREATE TABLE IF NOT EXISTS blogs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             topic TEXT NOT NULL,
@@ -35,20 +104,251 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    conn.commit()
-    conn.close()
+    db.migrate(MIGRATIONS)
+
+def _gap_statements_sql(column):
+    """SQL expression joining the gap statements stored in a research_gaps column"""
+    return f'''(
+        SELECT group_concat(CASE WHEN type = 'object' THEN json_extract(value, '$.statement') ELSE value END, ' ')
+        FROM json_each(CASE WHEN json_valid({column}) THEN {column} END, '$.gaps')
+    )'''
+
+def _blog_gap_statements_sql(blog_id):
+    """SQL expression joining the gap statements of blog blog_id (from blog_gaps)"""
+    return _gap_statements_sql(f'(SELECT unpack(data) FROM blog_gaps WHERE blog_id = {blog_id})')
+
+# Pipeline artifacts: API field name -> table holding it (one packed JSON
+# document per blog)
+ARTIFACT_TABLES = {
+    'research_gaps': 'blog_gaps',
+    'research_questions': 'blog_questions',
+    'methodology': 'blog_methodology',
+}
+
+# Schema changes on top of the original blogs table, applied in order by
+# init_db(); PRAGMA user_version records how many have run
+MIGRATIONS = [
+    # 1: keyset pagination of GET /api/blogs (newest first)
+    ['CREATE INDEX IF NOT EXISTS idx_blogs_created_at_id ON blogs (created_at, id)'],
+    # 2: full-text search. blogs_fts indexes topic, content and gap statements;
+    # it stores no text of its own but reads it back (for snippets) through
+    # blogs_search_source, and triggers keep it in sync with blogs
+    [
+        f'''CREATE VIEW blogs_search_source AS
+            SELECT id, topic, content, {_gap_statements_sql('research_gaps')} AS gaps FROM blogs''',
+        '''CREATE VIRTUAL TABLE blogs_fts USING fts5(
+            topic, content, gaps,
+            content='blogs_search_source', content_rowid='id',
+            tokenize='porter unicode61'
+        )''',
+        # Topic matches weigh most, then gap statements, then body text
+        "INSERT INTO blogs_fts (blogs_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0)')",
+        f'''CREATE TRIGGER blogs_fts_insert AFTER INSERT ON blogs BEGIN
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            VALUES (new.id, new.topic, new.content, {_gap_statements_sql('new.research_gaps')});
+        END''',
+        f'''CREATE TRIGGER blogs_fts_delete AFTER DELETE ON blogs BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            VALUES ('delete', old.id, old.topic, old.content, {_gap_statements_sql('old.research_gaps')});
+        END''',
+        f'''CREATE TRIGGER blogs_fts_update AFTER UPDATE OF topic, content, research_gaps ON blogs BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            VALUES ('delete', old.id, old.topic, old.content, {_gap_statements_sql('old.research_gaps')});
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            VALUES (new.id, new.topic, new.content, {_gap_statements_sql('new.research_gaps')});
+        END''',
+        # Index existing blogs ('rebuild' cannot read a view that uses json_each)
+        'INSERT INTO blogs_fts (rowid, topic, content, gaps) SELECT id, topic, content, gaps FROM blogs_search_source',
+    ],
+    # 3: compressed columns (codec.py). Search reads text through unpack(),
+    # and re-packing a row (compress_blogs.py) does not reindex it
+    [
+        '''CREATE TABLE compression_dicts (
+            id INTEGER PRIMARY KEY,
+            dictionary BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'DROP TRIGGER blogs_fts_insert',
+        'DROP TRIGGER blogs_fts_delete',
+        'DROP TRIGGER blogs_fts_update',
+        'DROP VIEW blogs_search_source',
+        f'''CREATE VIEW blogs_search_source AS
+            SELECT id, topic, unpack(content) AS content,
+                   {_gap_statements_sql('unpack(research_gaps)')} AS gaps
+            FROM blogs''',
+        f'''CREATE TRIGGER blogs_fts_insert AFTER INSERT ON blogs BEGIN
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            VALUES (new.id, new.topic, unpack(new.content), {_gap_statements_sql('unpack(new.research_gaps)')});
+        END''',
+        f'''CREATE TRIGGER blogs_fts_delete AFTER DELETE ON blogs BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            VALUES ('delete', old.id, old.topic, unpack(old.content), {_gap_statements_sql('unpack(old.research_gaps)')});
+        END''',
+        f'''CREATE TRIGGER blogs_fts_update AFTER UPDATE OF topic, content, research_gaps ON blogs
+        WHEN old.topic IS NOT new.topic
+            OR unpack(old.content) IS NOT unpack(new.content)
+            OR unpack(old.research_gaps) IS NOT unpack(new.research_gaps)
+        BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            VALUES ('delete', old.id, old.topic, unpack(old.content), {_gap_statements_sql('unpack(old.research_gaps)')});
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            VALUES (new.id, new.topic, unpack(new.content), {_gap_statements_sql('unpack(new.research_gaps)')});
+        END''',
+    ],
+    # 4: gaps, questions and methodology move to their own tables so a blog
+    # can be read without them; the old blogs columns are left empty. The
+    # indexed text does not change, so blogs_fts needs no rebuild; its
+    # triggers now follow both blogs and blog_gaps
+    [
+        'DROP TRIGGER blogs_fts_insert',
+        'DROP TRIGGER blogs_fts_delete',
+        'DROP TRIGGER blogs_fts_update',
+        'DROP VIEW blogs_search_source',
+        *(f'''CREATE TABLE {table} (
+            blog_id INTEGER PRIMARY KEY REFERENCES blogs (id) ON DELETE CASCADE,
+            data BLOB NOT NULL
+        )''' for table in ARTIFACT_TABLES.values()),
+        *(f'INSERT INTO {table} (blog_id, data) SELECT id, {field} FROM blogs WHERE {field} IS NOT NULL'
+          for field, table in ARTIFACT_TABLES.items()),
+        'UPDATE blogs SET research_gaps = NULL, research_questions = NULL, methodology = NULL',
+        f'''CREATE VIEW blogs_search_source AS
+            SELECT id, topic, unpack(content) AS content, {_blog_gap_statements_sql('blogs.id')} AS gaps
+            FROM blogs''',
+        f'''CREATE TRIGGER blogs_fts_insert AFTER INSERT ON blogs BEGIN
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            VALUES (new.id, new.topic, unpack(new.content), {_blog_gap_statements_sql('new.id')});
+        END''',
+        # BEFORE, so the gaps are still there to be removed from the index;
+        # the cascade to blog_gaps then finds no blog and leaves the index alone
+        f'''CREATE TRIGGER blogs_fts_delete BEFORE DELETE ON blogs BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            VALUES ('delete', old.id, old.topic, unpack(old.content), {_blog_gap_statements_sql('old.id')});
+        END''',
+        f'''CREATE TRIGGER blogs_fts_update AFTER UPDATE OF topic, content ON blogs
+        WHEN old.topic IS NOT new.topic OR unpack(old.content) IS NOT unpack(new.content)
+        BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            VALUES ('delete', old.id, old.topic, unpack(old.content), {_blog_gap_statements_sql('old.id')});
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            VALUES (new.id, new.topic, unpack(new.content), {_blog_gap_statements_sql('new.id')});
+        END''',
+        f'''CREATE TRIGGER blog_gaps_fts_insert AFTER INSERT ON blog_gaps BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            SELECT 'delete', id, topic, unpack(content), NULL FROM blogs WHERE id = new.blog_id;
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            SELECT id, topic, unpack(content), {_gap_statements_sql('unpack(new.data)')} FROM blogs WHERE id = new.blog_id;
+        END''',
+        f'''CREATE TRIGGER blog_gaps_fts_update AFTER UPDATE OF data ON blog_gaps
+        WHEN unpack(old.data) IS NOT unpack(new.data)
+        BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            SELECT 'delete', id, topic, unpack(content), {_gap_statements_sql('unpack(old.data)')} FROM blogs WHERE id = old.blog_id;
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            SELECT id, topic, unpack(content), {_gap_statements_sql('unpack(new.data)')} FROM blogs WHERE id = new.blog_id;
+        END''',
+        f'''CREATE TRIGGER blog_gaps_fts_delete AFTER DELETE ON blog_gaps BEGIN
+            INSERT INTO blogs_fts (blogs_fts, rowid, topic, content, gaps)
+            SELECT 'delete', id, topic, unpack(content), {_gap_statements_sql('unpack(old.data)')} FROM blogs WHERE id = old.blog_id;
+            INSERT INTO blogs_fts (rowid, topic, content, gaps)
+            SELECT id, topic, unpack(content), NULL FROM blogs WHERE id = old.blog_id;
+        END''',
+    ],
+    # 5: index of the append-only artifact store (artifacts.py), replacing the
+    # per-run output/ JSON files. Rows outlive their blog on purpose.
+    [
+        '''CREATE TABLE artifacts (
+            id INTEGER PRIMARY KEY,
+            topic_key TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            blog_id INTEGER,
+            segment INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'CREATE INDEX idx_artifacts_topic ON artifacts (topic_key, kind, id)',
+    ],
+    # 6: per-stage result cache (stage_cache.py)
+    [
+        '''CREATE TABLE stage_cache (
+            stage TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value BLOB NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (stage, key)
+        )''',
+    ],
+    # 7: normalized topic of each stage cache entry, for the semantic topic index
+    ['ALTER TABLE stage_cache ADD COLUMN topic TEXT'],
+]
 
 init_db()
 
+# Raw gaps / questions / methodology of every run, appended in the background
+ARTIFACTS_DIR = os.getenv('ARTIFACTS_DIR', os.path.join(BASE_DIR, 'artifacts'))
+artifact_store = ArtifactStore(ARTIFACTS_DIR, db)
+atexit.register(artifact_store.flush, 5)
+
+# Gap / question / methodology API results, reused for repeat topics
+stage_cache = StageCache(
+    db, codec, STAGE_CACHE_TTLS,
+    topic_index=TopicIndex() if SEMANTIC_CACHE else None,
+    similarity=SEMANTIC_CACHE_THRESHOLD,
+    stale_ttl=STAGE_CACHE_STALE_TTL
+)
+stage_cache.purge()
+
+# GET /api/blogs page size: default, and the cap on ?limit=
+BLOGS_PAGE_SIZE = int(os.getenv('BLOGS_PAGE_SIZE', '20'))
+BLOGS_PAGE_MAX = int(os.getenv('BLOGS_PAGE_MAX', '100'))
+SEARCH_RESULTS_MAX = 50
+# Queries matching more blogs than this rank only the newest this-many matches
+SEARCH_RANK_CANDIDATES = int(os.getenv('SEARCH_RANK_CANDIDATES', '1000'))
+
+# Upstream service URLs
+RESEARCH_GAPS_API_URL = os.getenv('RESEARCH_GAPS_API_URL', 'http://127.0.0.1:8000/researchgap')
+QUESTIONS_API_URL = os.getenv('QUESTIONS_API_URL', 'https://spm-production.up.railway.app/generateQuestions')
+METHODOLOGY_API_URL = os.getenv('METHODOLOGY_API_URL', 'http://127.0.0.1:5000/api/analyze-questions')
+RESEARCH_GAPS_API_TIMEOUT = float(os.getenv('RESEARCH_GAPS_API_TIMEOUT', '20'))
+QUESTIONS_API_TIMEOUT = float(os.getenv('QUESTIONS_API_TIMEOUT', '20'))
+METHODOLOGY_API_TIMEOUT = float(os.getenv('METHODOLOGY_API_TIMEOUT', '60'))
+
+# Circuit breakers: after CIRCUIT_FAILURE_THRESHOLD consecutive failures an
+# API is not called for CIRCUIT_RESET_TIMEOUT seconds, then its health
+# endpoint is checked before the next call (0 failures = breakers off)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+CIRCUIT_PROBE_TIMEOUT = float(os.getenv('CIRCUIT_PROBE_TIMEOUT', '2'))
+
+circuits = {
+    'research_gaps': CircuitBreaker(
+        'Research Gaps API', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+        health_url=os.getenv('RESEARCH_GAPS_HEALTH_URL', urljoin(RESEARCH_GAPS_API_URL, '/health')),
+        probe_timeout=CIRCUIT_PROBE_TIMEOUT
+    ),
+    # The hosted questions API has no known health endpoint; the first call after the reset timeout is the trial
+    'questions': CircuitBreaker(
+        'Questions API', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+        health_url=os.getenv('QUESTIONS_HEALTH_URL') or None,
+        probe_timeout=CIRCUIT_PROBE_TIMEOUT
+    ),
+    'methodology': CircuitBreaker(
+        'Methodology API', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+        health_url=os.getenv('METHODOLOGY_HEALTH_URL', urljoin(METHODOLOGY_API_URL, '/api/health')),
+        probe_timeout=CIRCUIT_PROBE_TIMEOUT
+    ),
+}
+
 # API Functions (from api.py)
+# Each call returns {} when the API fails and raises CircuitOpenError,
+# without calling it, while its circuit is open
 def call_research_gaps_api(topic):
     """Step 1: Get research gaps from local API"""
-    url = "http://127.0.0.1:8000/researchgap"
+    url = RESEARCH_GAPS_API_URL
     params = {"query": topic}
     
     try:
-        response = requests.get(url, params=params, timeout=20)
-        response.raise_for_status()
+        response = circuits['research_gaps'].request('GET', url, params=params, timeout=RESEARCH_GAPS_API_TIMEOUT)
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to Research Gaps API: {e}")
@@ -68,12 +368,12 @@ def call_external_questions_api(topic, gaps):
         for i, gap in enumerate(gaps["gaps"])
     ]
     
-    url = f"https://spm-production.up.railway.app/generateQuestions?topic={topic}"
+    url = f"{QUESTIONS_API_URL}?topic={topic}"
     headers = {"Content-Type": "application/json"}
     
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(gaps_payload), timeout=20)
-        response.raise_for_status()
+        response = circuits['questions'].request('POST', url, headers=headers, data=json.dumps(gaps_payload),
+                                                 timeout=QUESTIONS_API_TIMEOUT)
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to Questions API: {e}")
@@ -87,7 +387,7 @@ def call_methodology_api(question_data):
     main_question = question_data["data"]["main_question"]
     sub_questions = question_data["data"]["sub_questions"]
     
-    url = "http://127.0.0.1:5000/api/analyze-questions"
+    url = METHODOLOGY_API_URL
     payload = {
         "main_question": main_question,
         "sub_questions": sub_questions
@@ -96,60 +396,195 @@ def call_methodology_api(question_data):
     headers = {"Content-Type": "application/json"}
     
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
+        response = circuits['methodology'].request('POST', url, json=payload, headers=headers,
+                                                   timeout=METHODOLOGY_API_TIMEOUT)
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to Methodology API: {e}")
         return {}
 
-def generate_blog_with_gemini(topic, gaps_data, questions_data, methodology_data):
-    """Transform research data into blog format using Gemini"""
+BLOG_FORMATTING_RULES = """
+IMPORTANT FORMATTING RULES:
+- Use markdown formatting with proper headings (# ## ###)
+- Write ALL content in flowing paragraphs, NOT bullet points or numbered lists
+- When presenting research questions, integrate them smoothly into narrative paragraphs
+- Make it professional yet accessible
+- Include relevant insights and connections between the data points
+- DO NOT use bullet points (•, -, *) or numbered lists (1., 2., 3.) anywhere in the blog
+"""
+
+def generate_text(prompt, on_chunk=None):
+    """Call Gemini; with on_chunk, stream the response and pass each text delta to it"""
+    if on_chunk is None:
+        return get_model().generate_content(prompt).text
     
-    # Prepare the prompt with all collected data
+    parts = []
+    for chunk in get_model().generate_content(prompt, stream=True):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            on_chunk(text)
+    return ''.join(parts)
+
+def generate_blog_opening(topic, gaps_data, on_chunk=None):
+    """Write the title, introduction and research landscape from the gaps alone.
+
+    Runs while the questions and methodology APIs are still in flight.
+    Returns None when Gemini is unavailable so the caller can fall back.
+    """
+    if not GEMINI_API_KEY:
+        return None
+
     prompt = f"""
-You are an expert technical writer. Transform the following research data into a well-structured, engaging blog post.
+You are an expert technical writer. You are writing the first part of a well-structured, engaging blog post about research in this topic.
 
 Topic: {topic}
 
 Research Gaps:
 {json.dumps(gaps_data, indent=2)}
 
+Write ONLY the following sections:
+1. Title (catchy and relevant, as a single # heading)
+2. Introduction (engaging hook about the topic)
+3. Current Research Landscape (discuss the gaps identified in flowing paragraph format)
+
+Do not write a conclusion; the post continues with the research questions and methodology.
+{BLOG_FORMATTING_RULES}"""
+
+    try:
+        return generate_text(prompt, on_chunk)
+    except Exception as e:
+        print(f"Error generating blog opening with Gemini: {e}")
+        return None
+
+def generate_blog_body(topic, gaps_data, questions_data, methodology_data, opening, on_chunk=None):
+    """Write the remaining sections and return the complete blog.
+
+    Falls back to generate_basic_blog when Gemini is unavailable or fails.
+    """
+    if not GEMINI_API_KEY or not opening:
+        return generate_basic_blog(topic, gaps_data, questions_data, methodology_data)
+
+    prompt = f"""
+You are an expert technical writer. Continue the blog post below, which already has its title, introduction and research landscape.
+
+Topic: {topic}
+
+Blog so far:
+{opening}
+
 Research Questions:
 {json.dumps(questions_data, indent=2)}
 
 Research Methodology:
 {json.dumps(methodology_data, indent=2)}
 
-Create a comprehensive blog post with the following structure:
-1. Title (catchy and relevant)
-2. Introduction (engaging hook about the topic)
-3. Current Research Landscape (discuss the gaps identified in flowing paragraph format)
+Write ONLY the following sections, continuing naturally from the text above:
 4. Key Research Questions (write the main question and sub-questions as flowing narrative paragraphs, NOT as bullet points or lists. Weave them naturally into the text)
 5. Proposed Methodology (explain the research approach in paragraph format)
 6. Potential Impact (discuss implications and future directions)
 7. Conclusion (summarize key takeaways)
-
-IMPORTANT FORMATTING RULES:
-- Use markdown formatting with proper headings (# ## ###)
-- Write ALL content in flowing paragraphs, NOT bullet points or numbered lists
-- When presenting research questions, integrate them smoothly into narrative paragraphs
-- Make it professional yet accessible
-- Include relevant insights and connections between the data points
-- DO NOT use bullet points (•, -, *) or numbered lists (1., 2., 3.) anywhere in the blog
-"""
+{BLOG_FORMATTING_RULES}"""
 
     try:
-        if not GEMINI_API_KEY:
-            # Fallback: Generate basic blog without Gemini
-            return generate_basic_blog(topic, gaps_data, questions_data, methodology_data)
-        
-        response = model.generate_content(prompt)
-        return response.text
+        body = generate_text(prompt, on_chunk)
+        return f"{opening.rstrip()}\n\n{body.lstrip()}"
     except Exception as e:
         print(f"Error generating blog with Gemini: {e}")
         return generate_basic_blog(topic, gaps_data, questions_data, methodology_data)
 
+def _require(data, message):
+    """Fail the current pipeline stage when an upstream API returned nothing"""
+    if not data:
+        raise StageError(message)
+    return data
+
+def build_blog_pipeline(topic, on_chunk=None, force_refresh=False, degraded=None):
+    """Blog generation stages and their dependencies.
+
+    gaps --> questions --> methodology -------+
+      |                                       +--> blog
+      +--> blog_opening (Gemini, concurrent) -+
+
+    With on_chunk, Gemini output is streamed: on_chunk(section, text) is
+    called with section 'opening' or 'body' as text arrives. The three API
+    stages go through stage_cache, under a near-duplicate earlier topic's
+    entries when there is one; force_refresh calls them regardless.
+
+    An API stage whose call fails serves its last cached result, however
+    old, if there is one; while its circuit is open it does not fail the run
+    either, and serves nothing when nothing is cached. Such stages are
+    recorded in degraded (a dict) as 'stale' or 'unavailable'. Without gaps
+    or questions the blog is written at once by generate_basic_blog from
+    what is left.
+    """
+    if degraded is None:
+        degraded = {}
+    opening_chunk = body_chunk = None
+    if on_chunk is not None:
+        opening_chunk = lambda text: on_chunk('opening', text)
+        body_chunk = lambda text: on_chunk('body', text)
+    
+    cache_topic = topic if force_refresh else stage_cache.resolve(topic)
+    
+    def cached(stage, fn):
+        wrapped = stage_cache.wrap(stage, cache_topic, fn, force_refresh)
+        
+        def run(**inputs):
+            try:
+                return wrapped(**inputs)
+            except (CircuitOpenError, StageError) as e:
+                value = stage_cache.get_stale(stage, cache_topic, inputs)
+                if value is None and isinstance(e, StageError):
+                    raise
+                degraded[stage] = 'stale' if value is not None else 'unavailable'
+                print(f"{e}: {stage} is {degraded[stage]}")
+                return value or {}
+        return run
+    
+    def questions_stage(gaps):
+        if not gaps:
+            # Gaps unavailable behind an open circuit
+            return {}
+        return _require(call_external_questions_api(topic, gaps), 'Failed to generate research questions')
+    
+    def methodology_stage(questions):
+        if not questions:
+            # Questions unavailable behind an open circuit
+            return {}
+        return _require(call_methodology_api(questions), 'Failed to generate methodology')
+    
+    def blog_stage(gaps, questions, methodology, blog_opening):
+        if not gaps or not questions:
+            return generate_basic_blog(topic, gaps, questions, methodology or {})
+        return generate_blog_body(topic, gaps, questions, methodology or {}, blog_opening, body_chunk)
+    
+    return Pipeline([
+        Stage('gaps',
+              cached('gaps', lambda: _require(call_research_gaps_api(topic), 'Failed to fetch research gaps')),
+              timeout=STAGE_TIMEOUTS['gaps']),
+        Stage('questions', cached('questions', questions_stage), deps=['gaps'], timeout=STAGE_TIMEOUTS['questions']),
+        Stage('methodology',
+              cached('methodology', methodology_stage),
+              deps=['questions'], timeout=STAGE_TIMEOUTS['methodology'], required=False),
+        Stage('blog_opening',
+              lambda gaps: generate_blog_opening(topic, gaps, opening_chunk) if gaps else None,
+              deps=['gaps'], timeout=STAGE_TIMEOUTS['blog_opening'], required=False),
+        Stage('blog', blog_stage,
+              deps=['gaps', 'questions', 'methodology', 'blog_opening'], timeout=STAGE_TIMEOUTS['blog']),
+    ], deadline=PIPELINE_DEADLINE)
+
+def run_blog_pipeline(topic, listener=None, on_chunk=None, force_refresh=False):
+    """Run the full pipeline for a topic; returns (results, timings)
+
+    results['degraded'] names the stages served without their API (see
+    build_blog_pipeline); it is empty when every API answered.
+    """
+    degraded = {}
+    results, timings = build_blog_pipeline(topic, on_chunk, force_refresh, degraded).run(listener=listener)
+    results['degraded'] = degraded
+    return results, timings
+
 def generate_basic_blog(topic, gaps_data, questions_data, methodology_data):
     """Fallback blog generation without Gemini - using narrative paragraph format"""
     blog = f"# Research Blog: {topic.title()}\n\n"
@@ -218,110 +653,353 @@ def index():
     """Serve the landing page"""
     return render_template('index.html')
 
+def save_blog(topic, results):
+    """Persist a finished pipeline run; returns the new blog id"""
+    gaps_data = results['gaps']
+    questions_data = results['questions']
+    methodology_data = results['methodology'] or {}
+    blog_content = results['blog']
+    
+    # Save to database
+    artifacts = {
+        'research_gaps': gaps_data,
+        'research_questions': questions_data,
+        'methodology': methodology_data
+    }
+    with db.transaction() as conn:
+        cursor = conn.execute(
+            'INSERT INTO blogs (topic, content) VALUES (?, ?)',
+            (topic, codec.pack(blog_content))
+        )
+        blog_id = cursor.lastrowid
+        for field, table in ARTIFACT_TABLES.items():
+            conn.execute(
+                f'INSERT INTO {table} (blog_id, data) VALUES (?, ?)',
+                (blog_id, codec.pack(json.dumps(artifacts[field])))
+            )
+    
+    # Keep the raw stage output too; written off the request path
+    artifact_store.put(topic, 'gaps', gaps_data, blog_id=blog_id)
+    artifact_store.put(topic, 'questions', questions_data, blog_id=blog_id)
+    artifact_store.put(topic, 'methodology', methodology_data, blog_id=blog_id)
+    
+    return blog_id
+
+def run_blog_job(job):
+    """Job handler: run the pipeline, recording progress on the job as stages finish"""
+    job_id = job['id']
+    running = []
+    
+    def listener(event, stage, info):
+        if event == 'started':
+            running.append(stage)
+        else:
+            if stage in running:
+                running.remove(stage)
+            job_store.record_stage(job_id, stage, info.get('result'), info['timing'])
+        job_store.update(job_id, current_stage=running[-1] if running else None)
+    
+    results, timings = run_blog_pipeline(job['topic'], listener=listener, force_refresh=bool(job['force_refresh']))
+    blog_id = save_blog(job['topic'], results)
+    return {'blog_id': blog_id, 'timings': timings, 'degraded': results['degraded']}
+
+job_store = JobStore(db)
+job_store.init_db()
+job_queue = JobQueue(
+    job_store, run_blog_job,
+    max_workers=int(os.getenv('JOB_WORKERS', '2')),
+    heartbeat_interval=float(os.getenv('JOB_HEARTBEAT_INTERVAL', '10')),
+    stale_after=float(os.getenv('JOB_STALE_AFTER', '60'))
+)
+
+@app.before_request
+def start_job_queue():
+    # Deferred to the first request so the debug reloader's watcher process
+    # does not also pick up unfinished jobs
+    job_queue.ensure_started()
+
 @app.route('/api/generate-blog', methods=['POST'])
 def generate_blog():
-    """Main endpoint to generate blog from topic"""
+    """Main endpoint to generate blog from topic
+
+    With {"async": true} the pipeline runs as a background job and the
+    response is a job id to poll at /api/jobs/<id>. {"force_refresh": true}
+    calls the gap, questions and methodology APIs even for a cached topic.
+    """
     data = request.json
     topic = data.get('topic', '')
+    force_refresh = bool(data.get('force_refresh'))
     
     if not topic:
         return jsonify({'error': 'Topic is required'}), 400
     
+    if data.get('async'):
+        job = job_queue.submit(topic, force_refresh=force_refresh)
+        return jsonify({
+            'success': True,
+            'job_id': job['id'],
+            'state': job['state'],
+            'status_url': f"/api/jobs/{job['id']}"
+        }), 202
+    
     try:
-        # Step 1: Get research gaps
-        gaps_data = call_research_gaps_api(topic)
-        if not gaps_data:
-            return jsonify({'error': 'Failed to fetch research gaps'}), 500
-        
-        # Step 2: Generate research questions
-        questions_data = call_external_questions_api(topic, gaps_data)
-        if not questions_data:
-            return jsonify({'error': 'Failed to generate research questions'}), 500
-        
-        # Step 3: Get methodology
-        methodology_data = call_methodology_api(questions_data)
-        
-        # Step 4: Generate blog with Gemini
-        blog_content = generate_blog_with_gemini(topic, gaps_data, questions_data, methodology_data)
-        
-        # Save to database
-        conn = sqlite3.connect('blogs.db')
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO blogs (topic, content, research_gaps, research_questions, methodology)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            topic,
-            blog_content,
-            json.dumps(gaps_data),
-            json.dumps(questions_data),
-            json.dumps(methodology_data)
-        ))
-        blog_id = c.lastrowid
-        conn.commit()
-        conn.close()
-        
-        # Save gaps and methodology as separate JSON files
-        output_dir = 'output'
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Create safe filename from topic
-        safe_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_topic = safe_topic.replace(' ', '_')
-        
-        # Save gaps as JSON
-        gaps_filename = os.path.join(output_dir, f"{safe_topic}_gaps.json")
-        with open(gaps_filename, 'w', encoding='utf-8') as f:
-            json.dump(gaps_data, f, indent=2, ensure_ascii=False)
-        
-        # Save methodology as JSON
-        methodology_filename = os.path.join(output_dir, f"{safe_topic}_methodology.json")
-        with open(methodology_filename, 'w', encoding='utf-8') as f:
-            json.dump(methodology_data, f, indent=2, ensure_ascii=False)
+        results, timings = run_blog_pipeline(topic, force_refresh=force_refresh)
+        blog_id = save_blog(topic, results)
         
         return jsonify({
             'success': True,
             'blog_id': blog_id,
-            'content': blog_content,
-            'gaps': gaps_data,
-            'questions': questions_data,
-            'methodology': methodology_data
+            'content': results['blog'],
+            'gaps': results['gaps'],
+            'questions': results['questions'],
+            'methodology': results['methodology'] or {},
+            'timings': timings,
+            'degraded': results['degraded']
         })
     
+    except PipelineError as e:
+        return jsonify({'error': str(e), 'stage': e.stage, 'timings': e.timings}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/generate-blog/stream', methods=['GET'])
+def generate_blog_stream():
+    """Generate a blog and stream real pipeline progress as Server-Sent Events
+
+    Events: stage_started, stage_completed (with status, timing and the
+    stage result), blog_chunk (markdown deltas as Gemini writes them, tagged
+    with section 'opening' or 'body'), then either done (the saved blog,
+    whose content is authoritative) or pipeline_error. ?force_refresh=1
+    bypasses the stage cache.
+    """
+    topic = request.args.get('topic', '').strip()
+    force_refresh = request.args.get('force_refresh', '').lower() in ('1', 'true', 'yes')
+    if not topic:
+        return jsonify({'error': 'Topic is required'}), 400
+    
+    events = queue.Queue()
+    run_start = time.monotonic()
+    
+    def elapsed_ms():
+        return round((time.monotonic() - run_start) * 1000, 1)
+    
+    def listener(event, stage, info):
+        payload = {'stage': stage, 'elapsed_ms': elapsed_ms()}
+        if event == 'started':
+            events.put(('stage_started', payload))
+            return
+        payload['status'] = event
+        payload['timing'] = info['timing']
+        if 'result' in info:
+            payload['result'] = info['result']
+        events.put(('stage_completed', payload))
+    
+    def on_chunk(section, text):
+        events.put(('blog_chunk', {'section': section, 'text': text}))
+    
+    def worker():
+        try:
+            results, timings = run_blog_pipeline(topic, listener=listener, on_chunk=on_chunk, force_refresh=force_refresh)
+            blog_id = save_blog(topic, results)
+            events.put(('done', {
+                'blog_id': blog_id,
+                'content': results['blog'],
+                'gaps': results['gaps'],
+                'questions': results['questions'],
+                'methodology': results['methodology'] or {},
+                'timings': timings,
+                'degraded': results['degraded']
+            }))
+        except PipelineError as e:
+            events.put(('pipeline_error', {'error': str(e), 'stage': e.stage, 'timings': e.timings}))
+        except Exception as e:
+            events.put(('pipeline_error', {'error': str(e)}))
+    
+    # The pipeline keeps running (and saves the blog) even if the client disconnects
+    threading.Thread(target=worker, daemon=True).start()
+    
+    def stream():
+        while True:
+            try:
+                event, data = events.get(timeout=15)
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                continue
+            yield _sse(event, data)
+            if event in ('done', 'pipeline_error'):
+                return
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Stage cache hit rate and upstream API calls saved since startup"""
+    return jsonify(stage_cache.stats())
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Circuit state of each upstream API; degraded while any circuit is not closed"""
+    circuit_stats = {name: breaker.stats() for name, breaker in circuits.items()}
+    healthy = all(stats['state'] in ('closed', 'disabled') for stats in circuit_stats.values())
+    return jsonify({
+        'status': 'healthy' if healthy else 'degraded',
+        'circuits': circuit_stats
+    })
+
+@app.route('/api/jobs/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get state, current stage and partial results of a background job"""
+    job = job_store.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+def _encode_cursor(created_at, blog_id):
+    """Opaque cursor pointing just after (created_at, id) in listing order"""
+    return base64.urlsafe_b64encode(json.dumps([created_at, blog_id]).encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    try:
+        created_at, blog_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), int(blog_id)
+    except (ValueError, TypeError):
+        return None
+
 @app.route('/api/blogs', methods=['GET'])
 def get_blogs():
-    """Get all saved blogs"""
-    conn = sqlite3.connect('blogs.db')
-    c = conn.cursor()
-    c.execute('SELECT id, topic, created_at FROM blogs ORDER BY created_at DESC')
-    blogs = [{'id': row[0], 'topic': row[1], 'created_at': row[2]} for row in c.fetchall()]
-    conn.close()
-    return jsonify({'blogs': blogs})
+    """Get saved blogs, newest first, one page at a time
+
+    ?limit= sets the page size (capped at BLOGS_PAGE_MAX); pass the returned
+    next_cursor as ?cursor= to get the following page. next_cursor is null on
+    the last page.
+    """
+    limit = request.args.get('limit', BLOGS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, BLOGS_PAGE_MAX))
+    cursor = request.args.get('cursor')
+    
+    # Keyset pagination: seek past the last row of the previous page through
+    # idx_blogs_created_at_id, so every page costs the same however deep it is.
+    # One extra row tells us whether another page exists.
+    if cursor:
+        position = _decode_cursor(cursor)
+        if position is None:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        rows = db.query_all(
+            'SELECT id, topic, created_at FROM blogs WHERE (created_at, id) < (?, ?) '
+            'ORDER BY created_at DESC, id DESC LIMIT ?',
+            (*position, limit + 1)
+        )
+    else:
+        rows = db.query_all(
+            'SELECT id, topic, created_at FROM blogs ORDER BY created_at DESC, id DESC LIMIT ?',
+            (limit + 1,)
+        )
+    
+    blogs = [{'id': row[0], 'topic': row[1], 'created_at': row[2]} for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last['created_at'], last['id'])
+    return jsonify({'blogs': blogs, 'next_cursor': next_cursor})
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query in which every word must match
+
+    Words are matched whole (the porter tokenizer folds plurals and verb
+    forms); prefix queries on common stems would have to merge hundreds of
+    doclists and are not offered.
+    """
+    terms = re.findall(r'\w+', text)[:16]
+    if not terms:
+        return None
+    # Quoting makes words like AND/NOT/NEAR plain terms instead of operators
+    return ' '.join(f'"{term}"' for term in terms)
+
+@app.route('/api/blogs/search', methods=['GET'])
+def search_blogs():
+    """Full-text search over blog topics, content and research gaps
+
+    Returns up to ?limit= results (default 20, max 50), best match first,
+    each with a snippet where matched words are wrapped in <mark></mark>.
+    bm25 ranking costs a lookup per matching blog, so for very broad queries
+    only the newest SEARCH_RANK_CANDIDATES matches are ranked.
+    """
+    q = request.args.get('q', '').strip()
+    match = _fts_query(q)
+    if not match:
+        return jsonify({'error': 'Search query is required'}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_RESULTS_MAX))
+    
+    # Rank candidates first, then build snippets for the returned page only;
+    # the rowid range keeps the second pass over the index to the candidates
+    rows = db.query_all('''
+        WITH top AS MATERIALIZED (
+            SELECT rowid, rank FROM blogs_fts
+            WHERE blogs_fts MATCH :match AND rowid >= coalesce((
+                SELECT rowid FROM blogs_fts WHERE blogs_fts MATCH :match
+                ORDER BY rowid DESC LIMIT 1 OFFSET :candidates - 1
+            ), 0)
+            ORDER BY rank LIMIT :limit
+        )
+        SELECT blogs.id, blogs.topic, blogs.created_at,
+               snippet(blogs_fts, -1, '<mark>', '</mark>', '…', 24) AS snippet,
+               top.rank AS rank
+        FROM blogs_fts
+        JOIN top ON top.rowid = blogs_fts.rowid
+        JOIN blogs ON blogs.id = blogs_fts.rowid
+        WHERE blogs_fts MATCH :match AND blogs_fts.rowid >= (SELECT min(rowid) FROM top)
+        ORDER BY top.rank
+    ''', {'match': match, 'candidates': SEARCH_RANK_CANDIDATES, 'limit': limit})
+    
+    results = [{
+        'id': row['id'],
+        'topic': row['topic'],
+        'created_at': row['created_at'],
+        'snippet': row['snippet'],
+        'score': -row['rank']
+    } for row in rows]
+    return jsonify({'query': q, 'results': results})
+
+BLOG_COLUMNS = ('id', 'topic', 'content', 'created_at')
+BLOG_FIELDS = BLOG_COLUMNS + tuple(ARTIFACT_TABLES)
 
 @app.route('/api/blogs/<int:blog_id>', methods=['GET'])
 def get_blog(blog_id):
-    """Get a specific blog"""
-    conn = sqlite3.connect('blogs.db')
-    c = conn.cursor()
-    c.execute('SELECT * FROM blogs WHERE id = ?', (blog_id,))
-    row = c.fetchone()
-    conn.close()
+    """Get a specific blog
+
+    ?fields=content,topic limits the response to those fields (default: all
+    of BLOG_FIELDS); artifact tables that are not asked for are not read.
+    """
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    fields = fields or list(BLOG_FIELDS)
+    unknown = [field for field in fields if field not in BLOG_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
     
-    if not row:
-        return jsonify({'error': 'Blog not found'}), 404
+    columns = [column for column in BLOG_COLUMNS if column in fields] or ['id']
+    with db.connection():
+        row = db.query_one(f'SELECT {", ".join(columns)} FROM blogs WHERE id = ?', (blog_id,))
+        if not row:
+            return jsonify({'error': 'Blog not found'}), 404
+        
+        blog = {column: row[column] for column in columns if column in fields}
+        if 'content' in blog:
+            blog['content'] = codec.unpack(blog['content'])
+        for field, table in ARTIFACT_TABLES.items():
+            if field in fields:
+                artifact = db.query_one(f'SELECT data FROM {table} WHERE blog_id = ?', (blog_id,))
+                data = codec.unpack(artifact[0]) if artifact else None
+                blog[field] = json.loads(data) if data else {}
     
-    return jsonify({
-        'id': row[0],
-        'topic': row[1],
-        'content': row[2],
-        'research_gaps': json.loads(row[3]),
-        'research_questions': json.loads(row[4]),
-        'methodology': json.loads(row[5]) if row[5] else {},
-        'created_at': row[6]
-    })
+    return jsonify(blog)
 
 @app.route('/api/blogs/<int:blog_id>', methods=['PUT'])
 def update_blog(blog_id):
@@ -332,54 +1010,32 @@ def update_blog(blog_id):
     if not content:
         return jsonify({'error': 'Content is required'}), 400
     
-    conn = sqlite3.connect('blogs.db')
-    c = conn.cursor()
-    
-    # Check if blog exists
-    c.execute('SELECT id FROM blogs WHERE id = ?', (blog_id,))
-    if not c.fetchone():
-        conn.close()
+    # Update blog; rowcount tells us whether it existed
+    cursor = db.execute('UPDATE blogs SET content = ? WHERE id = ?', (codec.pack(content), blog_id))
+    if cursor.rowcount == 0:
         return jsonify({'error': 'Blog not found'}), 404
     
-    # Update blog
-    c.execute('UPDATE blogs SET content = ? WHERE id = ?', (content, blog_id))
-    conn.commit()
-    conn.close()
-    
     return jsonify({'success': True, 'message': 'Blog updated successfully'})
 
 @app.route('/api/blogs/<int:blog_id>', methods=['DELETE'])
 def delete_blog(blog_id):
     """Delete a blog"""
-    conn = sqlite3.connect('blogs.db')
-    c = conn.cursor()
-    
-    # Check if blog exists
-    c.execute('SELECT id FROM blogs WHERE id = ?', (blog_id,))
-    if not c.fetchone():
-        conn.close()
+    # Delete blog; rowcount tells us whether it existed
+    cursor = db.execute('DELETE FROM blogs WHERE id = ?', (blog_id,))
+    if cursor.rowcount == 0:
         return jsonify({'error': 'Blog not found'}), 404
     
-    # Delete blog
-    c.execute('DELETE FROM blogs WHERE id = ?', (blog_id,))
-    conn.commit()
-    conn.close()
-    
     return jsonify({'success': True, 'message': 'Blog deleted successfully'})
 
 @app.route('/api/blogs/<int:blog_id>/download', methods=['GET'])
 def download_blog(blog_id):
     """Download blog as markdown file"""
-    conn = sqlite3.connect('blogs.db')
-    c = conn.cursor()
-    c.execute('SELECT topic, content FROM blogs WHERE id = ?', (blog_id,))
-    row = c.fetchone()
-    conn.close()
+    row = db.query_one('SELECT topic, content FROM blogs WHERE id = ?', (blog_id,))
     
     if not row:
         return jsonify({'error': 'Blog not found'}), 404
     
-    topic, content = row
+    topic, content = row[0], codec.unpack(row[1])
     
     # Create markdown file
     filename = f"{topic.replace(' ', '_')}_blog.md"
@@ -394,10 +1050,5 @@ def download_blog(blog_id):
         mimetype='text/markdown'
     )
 
-@app.route('/api/progress/<string:step>', methods=['POST'])
-def update_progress(step):
-    """Endpoint for progress updates (for future websocket implementation)"""
-    return jsonify({'status': 'acknowledged', 'step': step})
-
 if __name__ == '__main__':
     app.run(debug=True, port=3000)
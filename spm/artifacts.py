@@ -0,0 +1,236 @@
+"""
+Append-only store for pipeline artifacts (gaps, questions, methodology).
+
+Records are JSON Lines appended to numbered segment files
+(segment-00000001.jsonl, ...); a new segment starts once the current one
+reaches segment_size. The `artifacts` table in blogs.db indexes every
+record by topic with its segment, byte offset and length, so a lookup reads
+exactly the bytes it needs however many records there are.
+
+put() only enqueues: a background thread appends records in batches and
+indexes each batch in one transaction, keeping disk writes off the request
+path. Records that reached a segment but not the index (a crash between the
+two) are picked up by recover() on the next start.
+
+Several processes may share one directory (gunicorn workers, a second app
+instance). Appending a batch and indexing it, and recovery, happen while
+holding an exclusive lock on the directory's .lock file, so offsets are
+taken from the true end of the segment and recover() only sees records
+whose writer died before indexing them.
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{8})\.jsonl$')
+
+
+def normalize_topic(topic):
+    """Case- and whitespace-insensitive key for a topic"""
+    return ' '.join(topic.lower().split())
+
+
+class ArtifactStore:
+    """Segment files plus an offset index in blogs.db"""
+
+    def __init__(self, directory, db, segment_size=64 * 1024 * 1024, batch_size=512):
+        self.directory = os.path.abspath(directory)
+        self.db = db
+        self.segment_size = segment_size
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self._stats = {'queued': 0, 'written': 0, 'batches': 0, 'errors': 0}
+
+    @contextmanager
+    def _locked(self):
+        """Hold the directory's inter-process write lock"""
+        with open(os.path.join(self.directory, '.lock'), 'a+b') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f'segment-{number:08d}.jsonl')
+
+    def _segments(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            int(match.group(1))
+            for match in map(SEGMENT_PATTERN.match, os.listdir(self.directory)) if match
+        )
+
+    def put(self, topic, kind, data, blog_id=None):
+        """Queue one artifact for writing; returns immediately"""
+        self._ensure_writer()
+        self._queue.put({
+            'topic': topic,
+            'kind': kind,
+            'blog_id': blog_id,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+            'data': data
+        })
+        self._stats['queued'] += 1
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written and indexed"""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._start_lock:
+            if self._writer is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.recover()
+                self._writer = threading.Thread(target=self._write_loop, name='artifact-writer', daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in batch if isinstance(item, dict)]
+            if records:
+                try:
+                    self._append(records)
+                except Exception as e:
+                    self._stats['errors'] += len(records)
+                    print(f"Artifact store write failed ({len(records)} records lost): {e}")
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _append(self, records):
+        """Append a batch to the newest segment and index it, under the directory lock"""
+        with self._locked():
+            # Another process may have appended or started a segment since the last batch
+            segments = self._segments()
+            number = segments[-1] if segments else 1
+            path = self._segment_path(number)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_size:
+                number += 1
+            with open(self._segment_path(number), 'ab') as segment:
+                self._write(segment, number, records)
+
+    def _write(self, segment, number, records):
+        segment.seek(0, os.SEEK_END)
+        offset = segment.tell()
+        chunks = []
+        rows = []
+        for record in records:
+            line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+            chunks.append(line)
+            rows.append(self._index_row(record, number, offset, len(line)))
+            offset += len(line)
+        segment.write(b''.join(chunks))
+        segment.flush()
+        self._index(rows)
+        self._stats['written'] += len(records)
+        self._stats['batches'] += 1
+
+    @staticmethod
+    def _index_row(record, number, offset, length):
+        return (
+            normalize_topic(record['topic']), record['kind'], record.get('blog_id'),
+            number, offset, length, record.get('created_at')
+        )
+
+    def _index(self, rows):
+        with self.db.transaction() as conn:
+            conn.executemany(
+                'INSERT INTO artifacts (topic_key, kind, blog_id, segment, offset, length, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def recover(self):
+        """Index records at the end of the newest segment that the index is missing
+
+        A partially written last line (crash mid-append) is cut off.
+        Returns the number of records recovered.
+        """
+        with self._locked():
+            return self._recover()
+
+    def _recover(self):
+        segments = self._segments()
+        if not segments:
+            return 0
+        number = segments[-1]
+        row = self.db.query_one(
+            'SELECT max(offset + length) FROM artifacts WHERE segment = ?', (number,)
+        )
+        offset = row[0] or 0
+        path = self._segment_path(number)
+        if os.path.getsize(path) <= offset:
+            return 0
+
+        rows = []
+        with open(path, 'r+b') as segment:
+            segment.seek(offset)
+            for line in segment:
+                if not line.endswith(b'\n'):
+                    segment.truncate(offset)
+                    break
+                rows.append(self._index_row(json.loads(line), number, offset, len(line)))
+                offset += len(line)
+        if rows:
+            self._index(rows)
+            print(f"Artifact store: recovered {len(rows)} unindexed records from segment {number}")
+        return len(rows)
+
+    def find(self, topic, kind=None):
+        """Index entries for a topic (any capitalisation / spacing), oldest first"""
+        sql = 'SELECT * FROM artifacts WHERE topic_key = ?'
+        params = [normalize_topic(topic)]
+        if kind:
+            sql += ' AND kind = ?'
+            params.append(kind)
+        return [dict(row) for row in self.db.query_all(sql + ' ORDER BY id', params)]
+
+    def read(self, entry):
+        """Load the record an index entry points at"""
+        with open(self._segment_path(entry['segment']), 'rb') as segment:
+            segment.seek(entry['offset'])
+            return json.loads(segment.read(entry['length']))
+
+    def iter_topic(self, topic, kind=None):
+        for entry in self.find(topic, kind):
+            yield self.read(entry)
+
+    def stats(self):
+        return {**self._stats, 'pending': self._queue.qsize(), 'segments': len(self._segments())}
@@ -0,0 +1,105 @@
+"""
+Cost of keeping pipeline artifacts: the old synchronous output/ JSON files
+against the append-only artifact store.
+
+Reports the time a request spends writing (json.dump(indent=2) to a file vs
+ArtifactStore.put), sustained store throughput including indexing, and topic
+lookup latency once the store holds --count records.
+
+    python benchmarks/bench_artifact_store.py [--count 200000] [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = 'research data model analysis learning network privacy health policy evidence method study design'.split()
+
+
+def artifact(rng):
+    return {'gaps': [
+        {'statement': ' '.join(rng.choice(WORDS) for _ in range(14)),
+         'reasoning': ' '.join(rng.choice(WORDS) for _ in range(30)),
+         'score': rng.randint(60, 99)}
+        for _ in range(5)
+    ]}
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=200000, help='records written for the throughput run')
+    parser.add_argument('--repeat', type=int, default=2000, help='writes / lookups timed for latency')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    import app as spm_app
+    store = spm_app.artifact_store
+
+    rng = random.Random(5)
+    data = artifact(rng)
+    topics = [' '.join(rng.choice(WORDS) for _ in range(3)) + f' {i}' for i in range(args.count // 3 or 1)]
+
+    # Request-path write latency
+    output_dir = os.path.join(tmp.name, 'output')
+    os.makedirs(output_dir)
+    files = []
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        with open(os.path.join(output_dir, f'topic_{i}_gaps.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        files.append((time.perf_counter() - start) * 1000)
+    puts = []
+    for i in range(args.repeat):
+        start = time.perf_counter()
+        store.put(topics[i % len(topics)], 'gaps', data, blog_id=i)
+        puts.append((time.perf_counter() - start) * 1000)
+    store.flush()
+
+    print(f"{'request-path write':<28} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, samples in (('output/ json.dump(indent=2)', files), ('ArtifactStore.put', puts)):
+        p50, p99 = percentiles(samples)
+        print(f"{label:<28} {p50:>8.3f} {p99:>8.3f}")
+
+    # Sustained throughput, written and indexed
+    start = time.perf_counter()
+    for i in range(args.count):
+        store.put(topics[i % len(topics)], ('gaps', 'questions', 'methodology')[i // len(topics) % 3], data, blog_id=i)
+    store.flush()
+    elapsed = time.perf_counter() - start
+    segment_bytes = sum(
+        os.path.getsize(os.path.join(store.directory, name)) for name in os.listdir(store.directory)
+    )
+    print(f"\n{args.count} records in {elapsed:.1f}s: {args.count / elapsed:,.0f} records/s, "
+          f"{segment_bytes / 1e6:.0f} MB in {store.stats()['segments']} segment file(s)")
+
+    lookups = []
+    probe = random.Random(1)
+    for _ in range(args.repeat):
+        topic = probe.choice(topics)
+        start = time.perf_counter()
+        records = list(store.iter_topic(topic.upper(), 'gaps'))
+        lookups.append((time.perf_counter() - start) * 1000)
+        assert records
+    p50, p99 = percentiles(lookups)
+    print(f"Topic lookup (gaps): p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+    spm_app.db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
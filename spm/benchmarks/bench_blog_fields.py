@@ -0,0 +1,90 @@
+"""
+Cost of opening a blog in the editor: the full GET /api/blogs/<id> (what
+the editor used to fetch) against ?fields=content, for blogs with large
+research artifacts.
+
+Reports median latency and the peak Python memory allocated per request
+(tracemalloc), through Flask's test client on a temporary database.
+
+    python benchmarks/bench_blog_fields.py [--gaps 200] [--repeat 50]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = 'research data model analysis learning network privacy health policy evidence method study design'.split()
+
+
+def text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def measure(client, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(samples), peak / 1024, len(response.data) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--gaps', type=int, default=200, help='gaps (and sub-questions) per blog')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    import app as spm_app
+    client = spm_app.app.test_client()
+
+    rng = random.Random(3)
+    results = {
+        'blog': '\n\n'.join(text(rng, 120) for _ in range(12)),
+        'gaps': {'gaps': [
+            {'statement': text(rng, 25), 'reasoning': text(rng, 80), 'score': rng.randint(1, 100)}
+            for _ in range(args.gaps)
+        ]},
+        'questions': {'data': {
+            'main_question': text(rng, 20) + '?',
+            'sub_questions': [text(rng, 30) + '?' for _ in range(args.gaps)]
+        }},
+        'methodology': {'data': {'methodology': {
+            'recommended_methodology': 'Mixed-methods approach',
+            'justification': text(rng, 3000),
+            'study_design': text(rng, 3000)
+        }}}
+    }
+    blog_id = spm_app.save_blog('Large blog', results)
+
+    print(f"Blog with {args.gaps} gaps / sub-questions\n")
+    print(f"{'request':<34} {'p50 ms':>8} {'peak KB':>9} {'body KB':>9}")
+    for label, url in (
+        ('full blog (editor, before)', f'/api/blogs/{blog_id}'),
+        ('?fields=content (editor)', f'/api/blogs/{blog_id}?fields=content'),
+        ('?fields=id,content (reader)', f'/api/blogs/{blog_id}?fields=id,content'),
+    ):
+        p50, peak_kb, body_kb = measure(client, url, args.repeat)
+        print(f"{label:<34} {p50:>8.2f} {peak_kb:>9.0f} {body_kb:>9.0f}")
+
+    spm_app.db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Latency of GET /api/blogs as the blogs table grows: the old unpaginated
+listing against the first and a deep keyset page.
+
+Runs the real route through Flask's test client against a temporary
+database seeded with short blogs.
+
+    python benchmarks/bench_blog_listing.py [--sizes 1000 10000 100000 300000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 300000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    import app as spm_app
+    client = spm_app.app.test_client()
+    db = spm_app.db
+
+    print(f"{'blogs':>8} {'unpaginated ms':>15} {'first page ms':>14} {'page 100 ms':>12}")
+    seeded = 0
+    for size in sorted(args.sizes):
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO blogs (topic, content, created_at) "
+                "VALUES (?, 'content', datetime('2024-01-01', ? || ' minutes'))",
+                ((f'Topic {i}', i) for i in range(seeded, size))
+            )
+        seeded = size
+
+        def unpaginated():
+            # The query GET /api/blogs ran before pagination
+            db.query_all('SELECT id, topic, created_at FROM blogs ORDER BY created_at DESC')
+
+        def first_page():
+            assert client.get('/api/blogs').status_code == 200
+
+        # Cursor for page 100, taken from walking the listing once
+        cursor = None
+        for _ in range(99):
+            cursor = client.get('/api/blogs', query_string={'cursor': cursor} if cursor else {}).json['next_cursor']
+
+        def deep_page():
+            assert client.get('/api/blogs', query_string={'cursor': cursor}).status_code == 200
+
+        print(f"{size:>8} {timed(unpaginated, max(3, args.repeat // 5)):>15.2f} "
+              f"{timed(first_page, args.repeat):>14.2f} {timed(deep_page, args.repeat):>12.2f}")
+
+    db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Latency of GET /api/blogs/search on a large corpus, against the LIKE scan
+over topic and content that would otherwise be needed to find every match.
+
+Seeds a temporary database with synthetic blogs (Zipf-distributed words, so
+there are both very common and rare terms) through the real insert trigger,
+then times queries through Flask's test client.
+
+    python benchmarks/bench_blog_search.py [--blogs 100000] [--words 300]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYLLABLES = ['ka', 'lo', 'mi', 'nu', 'pe', 'ra', 'si', 'to', 've', 'zo', 'dra', 'gen', 'tor', 'lux', 'quan']
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--blogs', type=int, default=100000)
+    parser.add_argument('--words', type=int, default=300, help='words per blog body')
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    import app as spm_app
+    client = spm_app.app.test_client()
+    db = spm_app.db
+
+    rng = random.Random(42)
+    vocab = vocabulary(20000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+
+    start = time.perf_counter()
+    batch = 5000
+    for offset in range(0, args.blogs, batch):
+        rows = []
+        for _ in range(min(batch, args.blogs - offset)):
+            body = ' '.join(rng.choices(vocab, weights, k=args.words))
+            topic = ' '.join(rng.choices(vocab, weights, k=3))
+            gaps = {'gaps': [{'statement': ' '.join(rng.choices(vocab, weights, k=8)), 'score': 80}]}
+            rows.append((topic, body, json.dumps(gaps)))
+        with db.transaction() as conn:
+            conn.executemany('INSERT INTO blogs (topic, content, research_gaps) VALUES (?, ?, ?)', rows)
+    seed_s = time.perf_counter() - start
+    size_mb = os.path.getsize(os.environ['BLOGS_DB']) / 1e6
+    print(f"Seeded {args.blogs} blogs in {seed_s:.1f}s (database {size_mb:.0f} MB)\n")
+
+    queries = {
+        'common word': vocab[0],
+        'mid-frequency word': vocab[200],
+        'rare word': vocab[15000],
+        'two words': f'{vocab[3]} {vocab[40]}',
+        'common + rare word': f'{vocab[0]} {vocab[15000]}',
+    }
+    print(f"{'query':<20} {'matches':>8} {'p50 ms':>8} {'p95 ms':>8}   {'LIKE scan ms':>12}")
+    for label, q in queries.items():
+        def search():
+            response = client.get('/api/blogs/search', query_string={'q': q})
+            assert response.status_code == 200
+        matches = db.query_one('SELECT count(*) FROM blogs_fts WHERE blogs_fts MATCH ?', (spm_app._fts_query(q),))[0]
+        p50, p95 = timed(search, args.repeat)
+        term = q.split()[0]
+        like_ms, _ = timed(lambda: db.query_all(
+            'SELECT id FROM blogs WHERE topic LIKE ?1 OR content LIKE ?1', (f'%{term}%',)
+        ), 3)
+        print(f"{label:<20} {matches:>8} {p50:>8.2f} {p95:>8.2f}   {like_ms:>12.1f}")
+
+    db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
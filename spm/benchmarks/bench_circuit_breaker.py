@@ -0,0 +1,120 @@
+"""
+Time to a response while the research gaps API hangs, with and without its circuit breaker.
+
+The gaps API is a socket that accepts connections and never answers, so
+every call waits out RESEARCH_GAPS_API_TIMEOUT (--timeout). The questions
+and methodology APIs are instant stubs and Gemini is off. Each
+configuration runs --requests new topics back to back:
+
+  no breaker        every request waits for the timeout, then fails
+  breaker           --threshold requests wait, then the rest get the basic blog at once
+  breaker + stale   the topics have expired cache entries, which are served instead
+
+Finally one topic runs as a background job (POST /api/generate-blog with
+"async": true) while the circuit is open, which must complete with its
+degraded stages recorded.
+
+    python benchmarks/bench_circuit_breaker.py [--requests 10] [--timeout 3]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=3, help='gaps API timeout in seconds (default in the app: 20)')
+    parser.add_argument('--threshold', type=int, default=3, help='CIRCUIT_FAILURE_THRESHOLD')
+    args = parser.parse_args()
+
+    # Accepts connections (the kernel completes the handshake) but never reads or replies
+    black_hole = socket.socket()
+    black_hole.bind(('127.0.0.1', 0))
+    black_hole.listen(128)
+    port = black_hole.getsockname()[1]
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    os.environ['RESEARCH_GAPS_API_URL'] = f'http://127.0.0.1:{port}/researchgap'
+    os.environ['RESEARCH_GAPS_API_TIMEOUT'] = str(args.timeout)
+    os.environ['SEMANTIC_CACHE'] = '0'
+    import app as spm_app
+    from circuit_breaker import CircuitBreaker
+    spm_app.GEMINI_API_KEY = ''
+    spm_app.call_external_questions_api = lambda topic, gaps: {
+        'data': {'main_question': f'What about {topic}?', 'sub_questions': ['How?', 'Why?']}
+    }
+    spm_app.call_methodology_api = lambda questions: {
+        'data': {'methodology': {'recommended_methodology': 'Mixed-methods approach'}}
+    }
+    cache = spm_app.stage_cache
+    ttls = dict(cache.ttls)
+
+    def expired_entries(topic):
+        # Cached an hour ago by a run against a healthy API, then expired
+        gaps = {'gaps': [{'statement': f'{topic} gap {i}', 'reasoning': 'Understudied.'} for i in range(5)]}
+        cache.put('gaps', cache.key(topic, {}), gaps, topic)
+        spm_app.db.execute('UPDATE stage_cache SET created_at = created_at - ? WHERE topic = ?',
+                           (ttls['gaps'] + 3600, topic))
+
+    configs = [
+        ('no breaker', 0, False),
+        ('breaker', args.threshold, False),
+        ('breaker + stale', args.threshold, True),
+    ]
+    print(f"{args.requests} requests per run; gaps API hangs, timeout {args.timeout:.0f}s, "
+          f"breaker opens after {args.threshold} failures\n")
+    print(f"{'configuration':<18} {'p50 ms':>9} {'p95 ms':>9} {'total s':>8} {'blogs':>6} {'stale':>6} {'basic':>6}")
+    for label, threshold, stale in configs:
+        spm_app.circuits['research_gaps'] = CircuitBreaker(
+            'Research Gaps API', threshold, reset_timeout=300,
+            health_url=f'http://127.0.0.1:{port}/health', probe_timeout=1
+        )
+        latencies = []
+        counts = {'blogs': 0, 'stale': 0, 'unavailable': 0}
+        run_start = time.perf_counter()
+        for i in range(args.requests):
+            topic = f'{label} topic {i}'
+            if stale:
+                expired_entries(topic)
+            start = time.perf_counter()
+            try:
+                results, _ = spm_app.run_blog_pipeline(topic)
+                counts['blogs'] += 1
+                state = results['degraded'].get('gaps')
+                if state:
+                    counts[state] += 1
+            except spm_app.PipelineError:
+                pass
+            latencies.append((time.perf_counter() - start) * 1000)
+        total = time.perf_counter() - run_start
+        p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+        print(f"{label:<18} {statistics.median(latencies):>9.0f} {p95:>9.0f} {total:>8.1f} "
+              f"{counts['blogs']:>6} {counts['stale']:>6} {counts['unavailable']:>6}")
+
+    print(f"\nCircuit: {spm_app.circuits['research_gaps'].stats()}")
+
+    client = spm_app.app.test_client()
+    job_id = client.post('/api/generate-blog', json={'topic': 'async job topic', 'async': True}).json['job_id']
+    job = client.get(f'/api/jobs/{job_id}').json
+    while job['state'] in ('queued', 'running'):
+        time.sleep(0.05)
+        job = client.get(f'/api/jobs/{job_id}').json
+    print(f"Async job: {job['state']}, blog {job['blog_id']}, degraded {job['degraded']}, error {job['error']}")
+    assert job['state'] == 'completed' and job['blog_id'], job
+    black_hole.close()
+    spm_app.db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Size and read-latency tradeoffs of the compressed blog columns.
+
+Seeds a temporary database with synthetic blogs shaped like real pipeline
+output (generate_basic_blog() text plus generated prose, and the gaps /
+questions / methodology JSON), then measures the same data stored as plain
+TEXT, zlib without a dictionary and zlib with a trained dictionary. The last
+two are produced by compress_blogs.py, exercising the migration path.
+
+    python benchmarks/bench_compression.py [--blogs 2000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    'research data model analysis learning network system privacy health policy climate '
+    'energy urban education student patient clinical evidence framework approach method '
+    'study design survey interview sample outcome effect impact risk bias fairness '
+    'transparency governance adoption performance accuracy robustness scalability '
+    'community stakeholder practice intervention longitudinal qualitative quantitative '
+    'mixed experimental comparative regional global emerging limited existing novel'
+).split()
+
+
+def sentence(rng, words=14):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def pipeline_output(rng, topic):
+    gaps = {'gaps': [
+        {'statement': sentence(rng), 'reasoning': sentence(rng, 20), 'score': rng.randint(60, 99)}
+        for _ in range(5)
+    ]}
+    questions = {'success': True, 'data': {
+        'main_question': sentence(rng)[:-1] + '?',
+        'sub_questions': [sentence(rng, 10)[:-1] + '?' for _ in range(3)],
+        'rationale': sentence(rng, 30)
+    }}
+    methodology = {'success': True, 'message': 'Methodology analysis completed successfully', 'data': {
+        'methodology': {
+            'recommended_methodology': 'Mixed-methods approach',
+            'justification': ' '.join(sentence(rng, 20) for _ in range(4)),
+            'study_design': ' '.join(sentence(rng, 20) for _ in range(3)),
+            'data_collection_tools': sentence(rng, 12)
+        }
+    }}
+    return gaps, questions, methodology
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--blogs', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    import app as spm_app
+    import compress_blogs
+    from codec import train_dictionary
+    client = spm_app.app.test_client()
+    db, codec = spm_app.db, spm_app.codec
+
+    # Seed uncompressed, as rows written before this change were
+    rng = random.Random(7)
+    packing_threshold = codec.min_size
+    codec.min_size = float('inf')
+    for _ in range(args.blogs):
+        topic = ' '.join(rng.choice(WORDS) for _ in range(3))
+        gaps, questions, methodology = pipeline_output(rng, topic)
+        blog = spm_app.generate_basic_blog(topic, gaps, questions, methodology)
+        blog += '\n'.join(f"## {sentence(rng, 4)}\n\n" + ' '.join(sentence(rng) for _ in range(8)) for _ in range(5))
+        spm_app.save_blog(topic, {'gaps': gaps, 'questions': questions, 'methodology': methodology, 'blog': blog})
+    codec.min_size = packing_threshold
+
+    ids = [row[0] for row in db.query_all('SELECT id FROM blogs')]
+
+    def measure(label):
+        db.execute('VACUUM')
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        probe = random.Random(1)
+        get_ms = timed(lambda: client.get(f'/api/blogs/{probe.choice(ids)}'), args.repeat)
+        list_ms = timed(lambda: client.get('/api/blogs'), args.repeat)
+        row = db.query_one('SELECT content FROM blogs WHERE id = ?', (ids[0],))
+        unpack_us = timed(lambda: codec.unpack(row[0]), args.repeat) * 1000
+        print(f"{label:<22} {compress_blogs.column_bytes() / 1e6:>10.2f} {os.path.getsize(db.path) / 1e6:>9.2f} "
+              f"{get_ms:>10.3f} {list_ms:>10.3f} {unpack_us:>11.1f}")
+
+    print(f"{args.blogs} blogs\n")
+    print(f"{'storage':<22} {'column MB':>10} {'file MB':>9} {'get ms':>10} {'list ms':>10} {'unpack us':>11}")
+    measure('plain TEXT')
+
+    # The migration tool's re-pack step, first without a dictionary
+    with contextlib.redirect_stdout(io.StringIO()):
+        compress_blogs.repack(500)
+    measure('zlib')
+
+    start = time.perf_counter()
+    dictionary = train_dictionary(compress_blogs.sample_documents(500))
+    train_s = time.perf_counter() - start
+    codec.add_dictionary(dictionary)
+    with contextlib.redirect_stdout(io.StringIO()):
+        compress_blogs.repack(500)
+    measure(f'zlib + {len(dictionary) // 1024} KB dictionary')
+
+    print(f"\nDictionary trained in {train_s:.1f}s")
+    db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
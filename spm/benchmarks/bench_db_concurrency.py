@@ -0,0 +1,150 @@
+"""
+Concurrent read/write throughput of the blog store: the old
+connect-per-request pattern (rollback journal, full sync) against the pooled
+WAL connections from db.py.
+
+Reader threads run the same queries as GET /api/blogs and GET /api/blogs/<id>;
+writer threads insert blogs like save_blog() and update them like PUT.
+
+    python benchmarks/bench_db_concurrency.py [--readers 8] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import Database
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS blogs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT NOT NULL,
+        content TEXT NOT NULL,
+        research_gaps TEXT,
+        research_questions TEXT,
+        methodology TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+INSERT = '''
+    INSERT INTO blogs (topic, content, research_gaps, research_questions, methodology)
+    VALUES (?, ?, ?, ?, ?)
+'''
+CONTENT = 'Lorem ipsum dolor sit amet. ' * 200
+GAPS = json.dumps({'gaps': [{'statement': f'Gap {i}', 'score': 90 - i} for i in range(5)]})
+
+
+def seed(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany(INSERT, [(f'Topic {i}', CONTENT, GAPS, '{}', '{}') for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+class LegacyStore:
+    """What app.py did before: a fresh connection per operation"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, blog_id):
+        conn = sqlite3.connect(self.path)
+        c = conn.cursor()
+        if blog_id is None:
+            c.execute('SELECT id, topic, created_at FROM blogs ORDER BY created_at DESC LIMIT 50')
+            c.fetchall()
+        else:
+            c.execute('SELECT * FROM blogs WHERE id = ?', (blog_id,))
+            c.fetchone()
+        conn.close()
+
+    def write(self, blog_id):
+        conn = sqlite3.connect(self.path)
+        c = conn.cursor()
+        if blog_id is None:
+            c.execute(INSERT, ('New topic', CONTENT, GAPS, '{}', '{}'))
+        else:
+            c.execute('UPDATE blogs SET content = ? WHERE id = ?', (CONTENT, blog_id))
+        conn.commit()
+        conn.close()
+
+
+class PooledStore:
+    def __init__(self, path, pool_size):
+        self.db = Database(path, pool_size=pool_size)
+
+    def read(self, blog_id):
+        if blog_id is None:
+            self.db.query_all('SELECT id, topic, created_at FROM blogs ORDER BY created_at DESC LIMIT 50')
+        else:
+            self.db.query_one('SELECT * FROM blogs WHERE id = ?', (blog_id,))
+
+    def write(self, blog_id):
+        if blog_id is None:
+            self.db.execute(INSERT, ('New topic', CONTENT, GAPS, '{}', '{}'))
+        else:
+            self.db.execute('UPDATE blogs SET content = ? WHERE id = ?', (CONTENT, blog_id))
+
+
+def run(store, rows, readers, writers, seconds):
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def loop(kind):
+        rng = random.Random()
+        done = errors = 0
+        while time.monotonic() < stop:
+            # Every fourth operation is the list query or a new blog
+            blog_id = None if rng.random() < 0.25 else rng.randint(1, rows)
+            try:
+                store.read(blog_id) if kind == 'reads' else store.write(blog_id)
+                done += 1
+            except sqlite3.OperationalError:
+                # "database is locked" once the default 5s busy wait runs out
+                errors += 1
+        with lock:
+            counts[kind] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=loop, args=('reads',)) for _ in range(readers)]
+    threads += [threading.Thread(target=loop, args=('writes',)) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {key: value / seconds if key != 'errors' else value for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds}s per run, {args.rows} seeded blogs\n")
+    print(f"{'pattern':<20} {'reads/s':>10} {'writes/s':>10} {'errors':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, make in (
+            ('connect-per-request', lambda path: LegacyStore(path)),
+            ('pooled WAL', lambda path: PooledStore(path, args.readers + args.writers)),
+        ):
+            path = os.path.join(tmp, f"{name.replace(' ', '_')}.db")
+            seed(path, args.rows)
+            result = run(make(path), args.rows, args.readers, args.writers, args.seconds)
+            print(f"{name:<20} {result['reads']:>10.0f} {result['writes']:>10.0f} {result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
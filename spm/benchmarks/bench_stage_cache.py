@@ -0,0 +1,109 @@
+"""
+Pipeline time for a repeat topic with the per-stage result cache.
+
+The gap, questions and methodology APIs are replaced by stubs that sleep
+for typical latencies (--gaps-ms / --questions-ms / --methodology-ms) and
+Gemini is off, so the blog stage is the instant fallback writer. Runs each
+topic cold, again from the cache, with a different capitalisation, reworded
+(matched by the semantic topic index) and with force_refresh, reporting how
+long the pipeline took to reach the blog stage. Then checks that topics
+differing from a cached one only in a number or short word ("type 1" /
+"type 2") are not matched to it.
+
+    python benchmarks/bench_stage_cache.py [--topics 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (cached topic, different topic that must not reuse its entries)
+NEAR_MISSES = [
+    ('type 1', 'type 2 diabetes management'),
+    ('type 1 diabetes management', 'type 2 diabetes management'),
+    ('industry 4.0', 'industry 5.0'),
+    ('world war 1 history', 'world war 2 history'),
+    ('5g network security', '6g network security'),
+    ('iot security in healthcare', 'ai security in healthcare'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--topics', type=int, default=5)
+    parser.add_argument('--gaps-ms', type=float, default=3000)
+    parser.add_argument('--questions-ms', type=float, default=2000)
+    parser.add_argument('--methodology-ms', type=float, default=8000)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ['BLOGS_DB'] = os.path.join(tmp.name, 'blogs.db')
+    os.environ['ARTIFACTS_DIR'] = os.path.join(tmp.name, 'artifacts')
+    import app as spm_app
+    spm_app.GEMINI_API_KEY = ''
+    calls = {'gaps': 0, 'questions': 0, 'methodology': 0}
+
+    def gaps_api(topic):
+        calls['gaps'] += 1
+        time.sleep(args.gaps_ms / 1000)
+        return {'gaps': [{'statement': f'{topic} gap {i}', 'reasoning': 'Understudied.'} for i in range(5)]}
+
+    def questions_api(topic, gaps):
+        calls['questions'] += 1
+        time.sleep(args.questions_ms / 1000)
+        return {'data': {'main_question': f'What about {topic}?', 'sub_questions': ['How?', 'Why?']}}
+
+    def methodology_api(questions):
+        calls['methodology'] += 1
+        time.sleep(args.methodology_ms / 1000)
+        return {'data': {'methodology': {'recommended_methodology': 'Mixed-methods approach'}}}
+
+    spm_app.call_research_gaps_api = gaps_api
+    spm_app.call_external_questions_api = questions_api
+    spm_app.call_methodology_api = methodology_api
+
+    def run(topic, force_refresh=False):
+        _, timings = spm_app.run_blog_pipeline(topic, force_refresh=force_refresh)
+        return timings['blog']['start_ms']
+
+    subjects = ['federated learning', 'digital twins', 'graph neural networks', 'edge computing',
+                'causal inference', 'knowledge graphs', 'blockchain', 'computer vision']
+    domains = ['healthcare', 'agriculture', 'finance', 'education', 'manufacturing', 'transportation']
+    topics = [f'{subjects[i % len(subjects)]} in {domains[i % len(domains)]}' for i in range(args.topics)]
+    rows = [
+        ('cold', lambda topic: run(topic)),
+        ('repeat (cached)', lambda topic: run(topic)),
+        ('repeat, other casing', lambda topic: run('  ' + topic.upper())),
+        ('paraphrase (semantic)', lambda topic: run('{1} and {0}'.format(*topic.split(' in ')))),
+        ('force_refresh', lambda topic: run(topic, force_refresh=True)),
+    ]
+    print(f"{args.topics} topics; stub APIs {args.gaps_ms:.0f} / {args.questions_ms:.0f} / "
+          f"{args.methodology_ms:.0f} ms\n")
+    print(f"{'run':<24} {'to blog stage p50 ms':>22} {'API calls':>10}")
+    for label, fn in rows:
+        before = sum(calls.values())
+        p50 = statistics.median(fn(topic) for topic in topics)
+        print(f"{label:<24} {p50:>22.1f} {sum(calls.values()) - before:>10}")
+
+    cache = spm_app.stage_cache
+    for cached, _ in NEAR_MISSES:
+        gaps = {'gaps': [{'statement': f'{cached} gap', 'reasoning': 'Understudied.'}]}
+        cache.put('gaps', cache.key(cached, {}), gaps, cached)
+    resolved = [(query, cache.resolve(query)) for _, query in NEAR_MISSES]
+    wrong = [(query, matched) for query, matched in resolved if matched != query]
+    print(f"\nnear-miss pairs: {len(wrong)} of {len(NEAR_MISSES)} wrongly matched")
+    for query, matched in wrong:
+        print(f"  '{query}' -> '{matched}'")
+
+    print(f"\nCache: {cache.stats()}")
+    spm_app.db.close()
+    tmp.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Circuit breakers for the upstream APIs the blog pipeline calls.
+
+A breaker starts closed and lets every call through. After
+failure_threshold consecutive failures (connection errors, timeouts, 429
+and 5xx responses) it opens: calls fail at once with CircuitOpenError
+instead of waiting out their timeout. Once reset_timeout seconds have
+passed, the next call half-opens it. If a health_url is set it is
+checked first with a short GET, and the circuit stays open for another
+reset_timeout if the check fails. Otherwise that call is the only one let
+through as a trial. Its success closes the circuit and its failure opens
+it again.
+"""
+
+import threading
+import time
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is unavailable (circuit open, retrying in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_failure(error):
+    """Whether an error from requests says the dependency itself is unhealthy"""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open state of one dependency, shared by all threads"""
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30, health_url=None, probe_timeout=2):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.health_url = health_url
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0, 'probes': 0, 'probe_failures': 0}
+
+    @property
+    def enabled(self):
+        return self.failure_threshold > 0
+
+    def request(self, method, url, **kwargs):
+        """requests.request through the breaker; raises for error statuses
+
+        Raises CircuitOpenError without calling url while the circuit is open.
+        """
+        self.before_call()
+        try:
+            response = requests.request(method, url, **kwargs)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                # A 4xx means the service is up and answering
+                self.record_success()
+            raise
+        self.record_success()
+        return response
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stats['calls'] += 1
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == HALF_OPEN or retry_in > 0:
+                self._stats['rejected'] += 1
+                raise CircuitOpenError(self.name, max(retry_in, 0))
+            # This call is the trial; others fail fast until it finishes
+            self.state = HALF_OPEN
+        if self.health_url and not self._probe():
+            with self._lock:
+                self._open()
+                self._stats['rejected'] += 1
+            raise CircuitOpenError(self.name, self.reset_timeout)
+
+    def _probe(self):
+        self._stats['probes'] += 1
+        try:
+            healthy = requests.get(self.health_url, timeout=self.probe_timeout).ok
+        except requests.exceptions.RequestException:
+            healthy = False
+        if not healthy:
+            self._stats['probe_failures'] += 1
+            print(f"Circuit {self.name}: health check {self.health_url} failed")
+        return healthy
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"Circuit {self.name}: closed")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._stats['failures'] += 1
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            self._stats['opened'] += 1
+            print(f"Circuit {self.name}: open for {self.reset_timeout}s after {self.failures} failure(s)")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            retry_in = self.opened_at + self.reset_timeout - time.monotonic() if self.state == OPEN else 0
+            return {
+                'state': self.state if self.enabled else 'disabled',
+                'consecutive_failures': self.failures,
+                'retry_in_s': round(max(retry_in, 0), 1),
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_s': self.reset_timeout,
+                'health_url': self.health_url,
+                **self._stats
+            }
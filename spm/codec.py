@@ -0,0 +1,122 @@
+"""
+Transparent compression for the large columns of blogs.db.
+
+Packed values are BLOBs: a two-byte marker, the id of the zlib preset
+dictionary they were compressed with (0 = none) and a raw deflate stream.
+Anything else, notably the TEXT written before compression existed, is
+returned unchanged by unpack(), so rows can be converted gradually.
+
+Dictionaries live in the compression_dicts table and are never deleted,
+because old rows keep referring to the one they were packed with.
+"""
+
+import re
+import struct
+import threading
+import zlib
+from collections import Counter
+
+MARKER = b'Z\x01'
+HEADER = struct.Struct('>2sH')
+
+
+def train_dictionary(samples, size=32 * 1024, max_words=6):
+    """Build a zlib preset dictionary from sample documents
+
+    Picks the word sequences that recur across the most documents (weighted
+    by length) until size bytes are used. The most valuable strings go last,
+    where deflate can reference them with the shortest distances.
+    """
+    document_counts = Counter()
+    for sample in samples:
+        # Tokens keep their trailing whitespace, so joined n-grams are exact substrings
+        tokens = re.findall(r'\S+\s*', sample)
+        seen = set()
+        for n in range(1, max_words + 1):
+            for i in range(len(tokens) - n + 1):
+                seen.add(''.join(tokens[i:i + n]))
+        document_counts.update(seen)
+
+    scored = sorted(
+        ((count - 1) * len(gram.encode('utf-8')), gram)
+        for gram, count in document_counts.items() if count > 1
+    )
+    chosen = []
+    used = 0
+    for score, gram in reversed(scored):
+        data = gram.encode('utf-8')
+        if used + len(data) > size:
+            continue
+        # Skip strings already contained in a more valuable one
+        if any(gram in longer for longer in chosen):
+            continue
+        chosen.append(gram)
+        used += len(data)
+    return ''.join(reversed(chosen)).encode('utf-8')
+
+
+class ColumnCodec:
+    """Packs text into compressed BLOBs and back, using the newest dictionary"""
+
+    def __init__(self, db, level=6, min_size=128):
+        self.db = db
+        self.level = level
+        self.min_size = min_size
+        self._dictionaries = {0: b''}
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _load(self, dict_id):
+        row = self.db.query_one('SELECT dictionary FROM compression_dicts WHERE id = ?', (dict_id,))
+        if row is None:
+            raise ValueError(f'Unknown compression dictionary {dict_id}')
+        return bytes(row[0])
+
+    def _dictionary(self, dict_id):
+        dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            with self._lock:
+                dictionary = self._dictionaries.get(dict_id)
+                if dictionary is None:
+                    dictionary = self._dictionaries[dict_id] = self._load(dict_id)
+        return dictionary
+
+    def current_dictionary_id(self):
+        if self._current is None:
+            row = self.db.query_one('SELECT max(id) FROM compression_dicts')
+            self._current = row[0] or 0
+        return self._current
+
+    def add_dictionary(self, dictionary):
+        """Store a new dictionary; later pack() calls use it. Returns its id"""
+        cursor = self.db.execute('INSERT INTO compression_dicts (dictionary) VALUES (?)', (dictionary,))
+        with self._lock:
+            self._dictionaries[cursor.lastrowid] = bytes(dictionary)
+            self._current = cursor.lastrowid
+        return cursor.lastrowid
+
+    def pack(self, text):
+        """Compress text for storage; short values and None stay as they are"""
+        if text is None or len(text) < self.min_size:
+            return text
+        dict_id = self.current_dictionary_id()
+        dictionary = self._dictionary(dict_id)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=dictionary) if dictionary \
+            else zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        data = compressor.compress(text.encode('utf-8')) + compressor.flush()
+        return HEADER.pack(MARKER, dict_id) + data
+
+    def unpack(self, value):
+        """Inverse of pack(); plain TEXT values are returned unchanged"""
+        if not isinstance(value, bytes) or value[:2] != MARKER:
+            return value
+        _, dict_id = HEADER.unpack_from(value)
+        dictionary = self._dictionary(dict_id)
+        decompressor = zlib.decompressobj(-15, zdict=dictionary) if dictionary else zlib.decompressobj(-15)
+        return (decompressor.decompress(value[HEADER.size:]) + decompressor.flush()).decode('utf-8')
+
+    def dictionary_id(self, value):
+        """Dictionary a stored value was packed with, or None if it is not packed"""
+        if not isinstance(value, bytes) or value[:2] != MARKER:
+            return None
+        return HEADER.unpack_from(value)[1]
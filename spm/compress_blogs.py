@@ -0,0 +1,105 @@
+"""
+Compress existing blogs in blogs.db.
+
+Trains a zlib dictionary on a sample of the stored blogs, then re-packs every
+blog content and artifact value that is still plain TEXT or was packed with
+an older dictionary. Safe to interrupt and re-run; the app keeps serving meanwhile.
+
+    python compress_blogs.py [--train] [--sample 500] [--dict-size 32768] [--batch 200] [--vacuum]
+"""
+
+import argparse
+import os
+
+from app import ARTIFACT_TABLES, codec, db
+from codec import train_dictionary
+
+# (table, key column, packed column)
+PACKED_COLUMNS = [('blogs', 'id', 'content')] + [
+    (table, 'blog_id', 'data') for table in ARTIFACT_TABLES.values()
+]
+
+
+def column_bytes():
+    return sum(
+        db.query_one(f'SELECT coalesce(sum(length(CAST({column} AS BLOB))), 0) FROM {table}')[0]
+        for table, _, column in PACKED_COLUMNS
+    )
+
+
+def sample_documents(limit):
+    """Unpacked values of every packed column for a random sample of blogs"""
+    ids = [row[0] for row in db.query_all('SELECT id FROM blogs ORDER BY random() LIMIT ?', (limit,))]
+    samples = []
+    for table, key, column in PACKED_COLUMNS:
+        for blog_id in ids:
+            row = db.query_one(f'SELECT {column} FROM {table} WHERE {key} = ?', (blog_id,))
+            if row and row[0]:
+                samples.append(codec.unpack(row[0]))
+    return samples
+
+
+def repack(batch):
+    """Re-pack values not using the current dictionary; returns how many changed"""
+    current = codec.current_dictionary_id()
+    changed = 0
+    for table, key, column in PACKED_COLUMNS:
+        last_id = 0
+        while True:
+            rows = db.query_all(
+                f'SELECT {key}, {column} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?',
+                (last_id, batch)
+            )
+            if not rows:
+                break
+            with db.transaction() as conn:
+                for row_id, value in rows:
+                    if value is None or codec.dictionary_id(value) == current:
+                        continue
+                    text = codec.unpack(value)
+                    if len(text) < codec.min_size:
+                        continue
+                    conn.execute(f'UPDATE {table} SET {column} = ? WHERE {key} = ?', (codec.pack(text), row_id))
+                    changed += 1
+            last_id = rows[-1][0]
+            print(f"  ...{table} up to blog {last_id}, {changed} values re-packed")
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compress the large columns of existing blogs')
+    parser.add_argument('--train', action='store_true', help='train a new dictionary even if one exists')
+    parser.add_argument('--sample', type=int, default=500, help='blogs sampled for dictionary training')
+    parser.add_argument('--dict-size', type=int, default=32 * 1024, help='dictionary size in bytes')
+    parser.add_argument('--batch', type=int, default=200, help='rows per transaction')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to shrink the file')
+    args = parser.parse_args()
+
+    before = column_bytes()
+    print(f"{db.path}: {before / 1e6:.2f} MB in blog content and artifacts")
+
+    if args.train or codec.current_dictionary_id() == 0:
+        samples = sample_documents(args.sample)
+        if len(samples) < 8:
+            print("Too few blogs to train a dictionary; compressing without one")
+        else:
+            dictionary = train_dictionary(samples, size=args.dict_size)
+            dict_id = codec.add_dictionary(dictionary)
+            print(f"Trained dictionary {dict_id} ({len(dictionary)} bytes) on {len(samples)} values")
+
+    changed = repack(args.batch)
+    after = column_bytes()
+    ratio = before / after if after else 1
+    print(f"Re-packed {changed} values: {after / 1e6:.2f} MB ({ratio:.2f}x smaller)")
+
+    if args.vacuum:
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size = os.path.getsize(db.path)
+        db.execute('VACUUM')
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        print(f"VACUUM: file {size / 1e6:.2f} MB -> {os.path.getsize(db.path) / 1e6:.2f} MB")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
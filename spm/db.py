@@ -0,0 +1,176 @@
+"""
+SQLite data-access layer for blogs.db.
+
+Connections are opened once and pooled instead of per request. Each one runs
+in WAL mode so readers are not blocked by a writer, with synchronous=NORMAL
+(no fsync per commit; the database stays consistent after a crash, only the
+latest commits can be lost on power failure) and a busy timeout so a second
+writer waits for the lock instead of failing. Statements are
+parameterised constants, so sqlite3's per-connection statement cache reuses
+the prepared statement on every call.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class Database:
+    """A bounded pool of configured SQLite connections.
+
+    A thread borrows one connection for the duration of connection() /
+    transaction(); nested use in the same thread reuses it, so helpers can
+    call each other inside a transaction.
+    """
+
+    def __init__(self, path, pool_size=8, busy_timeout=5.0, synchronous='NORMAL', cached_statements=128):
+        self.path = os.path.abspath(path)
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._functions = []
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open(self):
+        # isolation_level=None: autocommit unless transaction() opens one explicitly
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        conn.execute('PRAGMA foreign_keys=ON')
+        for name, num_params, fn in self._functions:
+            conn.create_function(name, num_params, fn, deterministic=True)
+        return conn
+
+    def create_function(self, name, num_params, fn):
+        """Register a deterministic SQL function on every pooled connection
+
+        Call at startup, before the function is used in a query, view or trigger.
+        """
+        self._functions.append((name, num_params, fn))
+        with self._lock:
+            idle = []
+            while not self._idle.empty():
+                idle.append(self._idle.get_nowait())
+            for conn in idle:
+                conn.create_function(name, num_params, fn, deterministic=True)
+                self._idle.put(conn)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._open()
+        try:
+            return self._idle.get(timeout=self.busy_timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f'No database connection available after {self.busy_timeout}s'
+            ) from None
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in one write transaction (joins an enclosing one)"""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            # IMMEDIATE takes the write lock up front, so a read-then-write
+            # block cannot fail halfway with SQLITE_BUSY on lock upgrade
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    def execute(self, sql, params=()):
+        """Execute one statement; returns the cursor (lastrowid, rowcount)"""
+        with self.connection() as conn:
+            return conn.execute(sql, params)
+
+    def query_one(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def query_all(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def executescript(self, script):
+        with self.connection() as conn:
+            conn.executescript(script)
+
+    def migrate(self, migrations):
+        """Apply pending schema migrations, tracked in PRAGMA user_version
+
+        migrations is a list where entry i is the list of SQL statements that
+        move the schema to version i + 1. Pending ones run in one transaction.
+        Returns the resulting schema version.
+        """
+        with self.transaction() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, statements in enumerate(migrations[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number}')
+                print(f"Migrated {os.path.basename(self.path)} to schema version {number}")
+            return max(version, len(migrations))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'pool_size': self.pool_size,
+                'connections_open': self._created,
+                'connections_idle': self._idle.qsize()
+            }
+
+    def close(self):
+        """Close the idle connections in the pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
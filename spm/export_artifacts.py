@@ -0,0 +1,55 @@
+"""
+Export the stored pipeline artifacts of a topic.
+
+Prints one JSON record per line (topic, kind, blog_id, created_at, data),
+oldest first. With --out, writes each record to its own indented JSON file
+instead, named like the old output/ files plus the blog id.
+
+    python export_artifacts.py "topic" [--kind gaps] [--out DIR]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from app import artifact_store, db
+
+
+def safe_name(topic):
+    """Filesystem-safe version of a topic (as the output/ files used)"""
+    safe = ''.join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe.replace(' ', '_')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a topic's stored pipeline artifacts")
+    parser.add_argument('topic', help='topic (matched ignoring case and extra spaces)')
+    parser.add_argument('--kind', choices=['gaps', 'questions', 'methodology'], help='only this kind')
+    parser.add_argument('--out', help='write one JSON file per artifact into this directory')
+    args = parser.parse_args()
+
+    entries = artifact_store.find(args.topic, args.kind)
+    if not entries:
+        print(f"No artifacts stored for '{args.topic}'", file=sys.stderr)
+        db.close()
+        sys.exit(1)
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    for entry in entries:
+        record = artifact_store.read(entry)
+        if args.out:
+            filename = os.path.join(
+                args.out, f"{safe_name(record['topic'])}_{record['kind']}_{record['blog_id'] or entry['id']}.json"
+            )
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(record['data'], f, indent=2, ensure_ascii=False)
+            print(filename)
+        else:
+            print(json.dumps(record, ensure_ascii=False))
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
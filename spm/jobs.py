@@ -0,0 +1,203 @@
+"""
+Background job queue for blog generation.
+
+Jobs are persisted in the `jobs` table of blogs.db so that queued, running
+and finished jobs survive a restart; a bounded thread pool executes them.
+
+Several processes may share blogs.db. Each job is owned by the process that
+queued or claimed it, which keeps its heartbeat fresh while the job is
+queued or running. A process only takes over unfinished jobs whose
+heartbeat is stale, i.e. whose owner died, and claims them in one
+transaction so no two processes run the same job.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobStore:
+    """SQLite persistence for jobs"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def init_db(self):
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                state TEXT NOT NULL,
+                current_stage TEXT,
+                partial_results TEXT NOT NULL DEFAULT '{}',
+                timings TEXT NOT NULL DEFAULT '{}',
+                blog_id INTEGER,
+                error TEXT,
+                force_refresh INTEGER NOT NULL DEFAULT 0,
+                degraded TEXT NOT NULL DEFAULT '{}',
+                owner TEXT,
+                heartbeat REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Tables created before force_refresh / degraded / owner and heartbeat existed;
+        # their unfinished jobs have no heartbeat and count as stale
+        columns = {row['name'] for row in self.db.query_all('PRAGMA table_info(jobs)')}
+        if 'force_refresh' not in columns:
+            self.db.execute('ALTER TABLE jobs ADD COLUMN force_refresh INTEGER NOT NULL DEFAULT 0')
+        if 'degraded' not in columns:
+            self.db.execute("ALTER TABLE jobs ADD COLUMN degraded TEXT NOT NULL DEFAULT '{}'")
+        if 'owner' not in columns:
+            self.db.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+        if 'heartbeat' not in columns:
+            self.db.execute('ALTER TABLE jobs ADD COLUMN heartbeat REAL')
+
+    def create(self, topic, force_refresh=False, owner=None):
+        job_id = uuid.uuid4().hex
+        self.db.execute(
+            'INSERT INTO jobs (id, topic, state, force_refresh, owner, heartbeat) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, topic, 'queued', int(force_refresh), owner, time.time())
+        )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        row = self.db.query_one('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        if not row:
+            return None
+        job = dict(row)
+        job['partial_results'] = json.loads(job['partial_results'])
+        job['timings'] = json.loads(job['timings'])
+        job['degraded'] = json.loads(job['degraded'])
+        return job
+
+    def update(self, job_id, **fields):
+        for key in ('partial_results', 'timings', 'degraded'):
+            if key in fields:
+                fields[key] = json.dumps(fields[key])
+        assignments = ', '.join(f"{key} = ?" for key in fields)
+        self.db.execute(
+            f'UPDATE jobs SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+            (*fields.values(), job_id)
+        )
+
+    def record_stage(self, job_id, stage, result, timing):
+        """Merge one finished stage into the job's partial results and timings"""
+        # One transaction, so stages finishing together cannot drop each other's update
+        with self.db.transaction():
+            job = self.get(job_id)
+            partial = job['partial_results']
+            timings = job['timings']
+            if result is not None:
+                partial[stage] = result
+            timings[stage] = timing
+            self.update(job_id, partial_results=partial, timings=timings)
+
+    def claim_stale(self, owner, stale_after):
+        """Take over unfinished jobs whose heartbeat is older than stale_after seconds
+
+        The jobs are reset to queued (an interrupted run restarts from the
+        first stage) and owned by owner; returns their ids, oldest first.
+        """
+        now = time.time()
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE state IN ('queued', 'running') "
+                'AND (heartbeat IS NULL OR heartbeat < ?) ORDER BY created_at',
+                (now - stale_after,)
+            ).fetchall()
+            job_ids = [row[0] for row in rows]
+            for job_id in job_ids:
+                conn.execute(
+                    "UPDATE jobs SET state = 'queued', owner = ?, heartbeat = ?, current_stage = NULL, "
+                    "partial_results = '{}', timings = '{}', degraded = '{}', updated_at = CURRENT_TIMESTAMP "
+                    'WHERE id = ?',
+                    (owner, now, job_id)
+                )
+        return job_ids
+
+    def start(self, job_id, owner):
+        """Mark a queued job of owner running; False if it is finished or owned elsewhere"""
+        cursor = self.db.execute(
+            "UPDATE jobs SET state = 'running', heartbeat = ?, updated_at = CURRENT_TIMESTAMP "
+            "WHERE id = ? AND owner = ? AND state IN ('queued', 'running')",
+            (time.time(), job_id, owner)
+        )
+        return cursor.rowcount == 1
+
+    def beat(self, owner):
+        """Refresh the heartbeat of owner's unfinished jobs"""
+        self.db.execute(
+            "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND state IN ('queued', 'running')",
+            (time.time(), owner)
+        )
+
+
+class JobQueue:
+    """Runs jobs on a bounded worker pool.
+
+    handler(job) performs the work and may update the store as it goes; when it
+    returns, the job is marked completed with the fields it returned. An
+    exception marks the job failed (its `timings` attribute, if any, is kept).
+
+    Once started, a background thread refreshes the heartbeat of this
+    queue's jobs every heartbeat_interval seconds and takes over jobs whose
+    heartbeat is more than stale_after seconds old.
+    """
+
+    def __init__(self, store, handler, max_workers=2, heartbeat_interval=10, stale_after=60):
+        self.store = store
+        self.handler = handler
+        self.max_workers = max_workers
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='blog-job')
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def submit(self, topic, force_refresh=False):
+        job = self.store.create(topic, force_refresh, owner=self.owner)
+        self._executor.submit(self._run, job['id'])
+        return job
+
+    def ensure_started(self):
+        """Resume stale jobs and start the heartbeat thread (runs once)"""
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            self._resume_stale()
+            threading.Thread(target=self._heartbeat, name='blog-job-heartbeat', daemon=True).start()
+
+    def _resume_stale(self):
+        for job_id in self.store.claim_stale(self.owner, self.stale_after):
+            print(f"Resuming blog job {job_id}")
+            self._executor.submit(self._run, job_id)
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self.store.beat(self.owner)
+                self._resume_stale()
+            except Exception as e:
+                print(f"Job heartbeat failed: {e}")
+
+    def _run(self, job_id):
+        if not self.store.start(job_id, self.owner):
+            return
+        job = self.store.get(job_id)
+        try:
+            fields = self.handler(job) or {}
+            self.store.update(job_id, state='completed', current_stage=None, error=None, **fields)
+        except Exception as e:
+            failed = {'state': 'failed', 'current_stage': None, 'error': str(e)}
+            if getattr(e, 'timings', None) is not None:
+                failed['timings'] = e.timings
+            self.store.update(job_id, **failed)
@@ -0,0 +1,151 @@
+"""
+Dependency-aware stage runner for the blog generation pipeline.
+
+Stages declare which earlier stages they depend on; every stage whose
+dependencies are satisfied runs concurrently in a thread pool. Each stage has
+its own timeout and the whole run shares a deadline.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class StageError(Exception):
+    """Raised by a stage function to fail with a user-facing message"""
+
+
+class PipelineError(Exception):
+    """Raised when a required stage fails or times out, or the deadline passes"""
+
+    def __init__(self, message, stage, timings):
+        super().__init__(message)
+        self.stage = stage
+        self.timings = timings
+
+
+class Stage:
+    """A unit of pipeline work.
+
+    fn is called with one keyword argument per dependency, holding that
+    dependency's result. When an optional (required=False) stage fails its
+    result is None and dependants still run.
+    """
+
+    def __init__(self, name, fn, deps=(), timeout=None, required=True):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.required = required
+
+
+class Pipeline:
+    """Runs a set of stages respecting their dependencies"""
+
+    def __init__(self, stages, deadline=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.deadline = deadline
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    def run(self, listener=None):
+        """Run every stage; returns (results, timings) or raises PipelineError
+
+        listener, if given, is called as listener(event, stage_name, info) with
+        event 'started' (info: {}) or 'completed' / 'failed' / 'timeout' /
+        'cancelled' (info: {'timing': ..., and 'result' for completed stages}).
+        Listener errors are reported and otherwise ignored.
+        """
+        run_start = time.monotonic()
+        results = {}
+        timings = {}
+        pending = dict(self.stages)
+        running = {}
+        started = {}
+
+        def notify(event, name, info):
+            if listener is None:
+                return
+            try:
+                listener(event, name, info)
+            except Exception as e:
+                print(f"Pipeline listener error ({event} {name}): {e}")
+
+        def finish(name, status, error=None, result=None):
+            elapsed = time.monotonic() - started[name]
+            timings[name] = {
+                'status': status,
+                'start_ms': round((started[name] - run_start) * 1000, 1),
+                'duration_ms': round(elapsed * 1000, 1)
+            }
+            if error:
+                timings[name]['error'] = error
+            info = {'timing': timings[name]}
+            if status == 'completed':
+                info['result'] = result
+            notify(status, name, info)
+
+        def abort(stage_name, message):
+            # Anything still running is abandoned; its thread finishes in the background
+            for other in running.values():
+                finish(other.name, 'cancelled')
+            for other in pending:
+                timings[other] = {'status': 'skipped'}
+            timings['total_ms'] = round((time.monotonic() - run_start) * 1000, 1)
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise PipelineError(message, stage_name, timings)
+
+        executor = ThreadPoolExecutor(max_workers=len(self.stages), thread_name_prefix='pipeline')
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.deps):
+                        kwargs = {dep: results[dep] for dep in stage.deps}
+                        started[name] = time.monotonic()
+                        notify('started', name, {})
+                        running[executor.submit(stage.fn, **kwargs)] = stage
+                        del pending[name]
+
+                if not running:
+                    abort(next(iter(pending)), 'Pipeline has unsatisfiable dependencies')
+
+                now = time.monotonic()
+                wait_for = [
+                    stage.timeout - (now - started[stage.name])
+                    for stage in running.values() if stage.timeout is not None
+                ]
+                if self.deadline is not None:
+                    wait_for.append(self.deadline - (now - run_start))
+                done, _ = wait(running, timeout=max(min(wait_for), 0) if wait_for else None,
+                               return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        results[stage.name] = future.result()
+                        finish(stage.name, 'completed', result=results[stage.name])
+                    except Exception as e:
+                        finish(stage.name, 'failed', str(e))
+                        if stage.required:
+                            abort(stage.name, str(e))
+                        results[stage.name] = None
+
+                now = time.monotonic()
+                for future, stage in list(running.items()):
+                    if stage.timeout is not None and now - started[stage.name] >= stage.timeout:
+                        del running[future]
+                        finish(stage.name, 'timeout', f"Timed out after {stage.timeout}s")
+                        if stage.required:
+                            abort(stage.name, f"Stage '{stage.name}' timed out")
+                        results[stage.name] = None
+
+                if self.deadline is not None and now - run_start >= self.deadline and (pending or running):
+                    stage_name = next(iter(running.values())).name if running else next(iter(pending))
+                    abort(stage_name, f"Pipeline exceeded its {self.deadline}s deadline")
+        finally:
+            executor.shutdown(wait=False)
+
+        timings['total_ms'] = round((time.monotonic() - run_start) * 1000, 1)
+        return results, timings
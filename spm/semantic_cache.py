@@ -0,0 +1,138 @@
+"""
+Nearest-neighbour lookup of previously run topics.
+
+Topics are embedded locally (no model, CPU only) as hashed term frequencies
+of their words and of each word's character n-grams, weighted by IDF over
+the indexed topics. Word order and stopwords are ignored and plurals folded,
+so "healthcare data engineering" lands on "data engineering in healthcare".
+Numbers and short words ("type 1", "industry 4.0", "iot") barely move the
+embedding but change the topic, so a match must have exactly the same ones.
+StageCache uses it to reuse a near-duplicate topic's cached stage results.
+"""
+
+import re
+import threading
+import zlib
+
+import numpy as np
+
+STOPWORDS = frozenset(
+    'a an and are as at by for from how in into is of on or the to using via what with within'.split()
+)
+
+
+def topic_words(topic):
+    """Words of a topic without stopwords, plurals folded"""
+    words = []
+    for word in re.findall(r'[a-z0-9]+', topic.lower()):
+        if word in STOPWORDS:
+            continue
+        # Plural folding only: "systems" -> "system"
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def key_words(topic):
+    """Numbers and words of up to three letters, which a matching topic must share"""
+    return frozenset(w for w in topic_words(topic) if len(w) <= 3 or any(c.isdigit() for c in w))
+
+
+def topic_terms(topic, char_ngrams=(3, 4)):
+    """Words and per-word character n-grams of a topic"""
+    words = topic_words(topic)
+    terms = [f'w:{word}' for word in words]
+    for word in words:
+        padded = f'#{word}#'
+        for n in char_ngrams:
+            terms.extend(f'c:{padded[i:i + n]}' for i in range(len(padded) - n + 1))
+    return terms
+
+
+def embed(topic, dim=1024):
+    """Sublinear hashed term frequencies of a topic"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for term in topic_terms(topic):
+        vector[zlib.crc32(term.encode('utf-8')) % dim] += 1.0
+    return np.log1p(vector)
+
+
+class TopicIndex:
+    """TF-IDF cosine nearest neighbour over up to max_entries topics (oldest dropped first)
+
+    The IDF-weighted, normalised matrix is rebuilt once the index has changed
+    by more than a tenth of its size, so a lookup is one matrix-vector product.
+    """
+
+    def __init__(self, max_entries=5000, dim=1024):
+        self.max_entries = max_entries
+        self.dim = dim
+        self._tf = np.zeros((max_entries, dim), dtype=np.float32)
+        self._weighted = np.zeros((max_entries, dim), dtype=np.float32)
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._idf = np.ones(dim, dtype=np.float32)
+        self._topics = [None] * max_entries
+        self._key_words = [None] * max_entries
+        self._slots = {}
+        self._next = 0
+        self._changes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, topic):
+        return topic in self._slots
+
+    def add(self, topic):
+        if topic in self._slots:
+            return
+        tf = embed(topic, self.dim)
+        with self._lock:
+            if topic in self._slots:
+                return
+            slot = self._next
+            self._next = (self._next + 1) % self.max_entries
+            old = self._topics[slot]
+            if old is not None:
+                del self._slots[old]
+                self._df -= self._tf[slot] > 0
+            self._slots[topic] = slot
+            self._topics[slot] = topic
+            self._key_words[slot] = key_words(topic)
+            self._tf[slot] = tf
+            self._df += tf > 0
+            weighted = tf * self._idf
+            norm = np.linalg.norm(weighted)
+            self._weighted[slot] = weighted / norm if norm > 0 else weighted
+            self._changes += 1
+
+    def nearest(self, topic, min_similarity=0.0):
+        """(indexed topic, cosine similarity) closest to topic with the same key words, or None"""
+        query = embed(topic, self.dim)
+        words = key_words(topic)
+        with self._lock:
+            if not self._slots:
+                return None
+            if self._changes > len(self._slots) / 10:
+                self._reweight()
+            query *= self._idf
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return None
+            similarities = self._weighted @ (query / norm)
+            candidates = np.flatnonzero(similarities >= min_similarity)
+            for best in candidates[np.argsort(-similarities[candidates])]:
+                if self._topics[best] is not None and self._key_words[best] == words:
+                    return self._topics[best], float(similarities[best])
+            return None
+
+    def _reweight(self):
+        n = len(self._slots)
+        self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+        weighted = self._tf * self._idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        np.divide(weighted, norms, out=weighted, where=norms > 0)
+        self._weighted = weighted
+        self._changes = 0
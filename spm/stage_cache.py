@@ -0,0 +1,185 @@
+"""
+Persistent memoization of pipeline stage results.
+
+A stage result is stored in the stage_cache table of blogs.db under a hash
+of the normalized topic and the stage's inputs (the results of the stages it
+depends on), so a stage is reused exactly when what it would be called with
+is unchanged: questions are reused while the gaps are, methodology while the
+questions are. Each stage has its own TTL in seconds; 0 disables caching.
+
+With a TopicIndex, resolve() maps a topic with no cached gaps onto the most
+similar topic that has them (above a similarity threshold), so paraphrases
+of an earlier topic reuse its whole chain of cached stages.
+
+Expired entries are kept for stale_ttl more seconds. get_stale() serves them
+while the API behind a stage is down.
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from artifacts import normalize_topic
+
+
+def is_cacheable(stage, value):
+    """Whether a stage result is a real answer rather than a failed call's empty shape
+
+    rg-backend answers {"gaps": []} when Gemini fails and the questions and
+    methodology APIs may answer without data; those are never cached.
+    """
+    if not isinstance(value, dict):
+        return False
+    if stage == 'gaps':
+        return isinstance(value.get('gaps'), list) and len(value['gaps']) > 0
+    if stage in ('questions', 'methodology'):
+        return bool(value.get('data'))
+    return bool(value)
+
+
+class StageCache:
+    """Stage results in SQLite, compressed with the blog column codec"""
+
+    def __init__(self, db, codec, ttls, topic_index=None, similarity=0.9, stale_ttl=0):
+        self.db = db
+        self.codec = codec
+        self.ttls = dict(ttls)
+        self.stale_ttl = stale_ttl
+        self.topic_index = topic_index
+        self.similarity = similarity
+        self._index_loaded = False
+        self._stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'semantic_hits': 0, 'semantic_misses': 0,
+                       'stale_hits': 0}
+        # Stages run on pipeline worker threads
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def key(topic, inputs):
+        payload = json.dumps([normalize_topic(topic), inputs], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, stage, key, stale=False):
+        """Cached result, or None when missing, older than the stage's TTL or invalid
+
+        With stale, entries up to stale_ttl seconds past the TTL count too.
+        Entries failing is_cacheable (written before it existed) count as missing.
+        """
+        ttl = self.ttls.get(stage, 0)
+        if ttl <= 0:
+            return None
+        if stale:
+            ttl += self.stale_ttl
+        row = self.db.query_one(
+            'SELECT value FROM stage_cache WHERE stage = ? AND key = ? AND created_at > ?',
+            (stage, key, time.time() - ttl)
+        )
+        if not row:
+            return None
+        value = json.loads(self.codec.unpack(row[0]))
+        return value if is_cacheable(stage, value) else None
+
+    def get_stale(self, stage, topic, inputs):
+        """Last result for topic and inputs, expired or not, for when the API is down"""
+        value = self.get(stage, self.key(topic, inputs), stale=True)
+        if value is not None:
+            self._count('stale_hits')
+        return value
+
+    def put(self, stage, key, value, topic=None):
+        if self.ttls.get(stage, 0) <= 0:
+            return
+        topic = normalize_topic(topic) if topic else None
+        self.db.execute(
+            'INSERT OR REPLACE INTO stage_cache (stage, key, value, created_at, topic) VALUES (?, ?, ?, ?, ?)',
+            (stage, key, self.codec.pack(json.dumps(value)), time.time(), topic)
+        )
+        if stage == 'gaps' and topic and self.topic_index is not None:
+            self.topic_index.add(topic)
+
+    def resolve(self, topic):
+        """Topic whose cache entries to use for topic: itself, or a near-duplicate
+
+        Only a topic with live, non-empty cached gaps is substituted; the gaps
+        stage has no inputs, so its key depends on the topic alone.
+        """
+        if self.topic_index is None or self.ttls.get('gaps', 0) <= 0:
+            return topic
+        self._load_index()
+        normalized = normalize_topic(topic)
+        if self.get('gaps', self.key(normalized, {})) is not None:
+            return topic
+        match = self.topic_index.nearest(normalized, self.similarity)
+        if match and self.get('gaps', self.key(match[0], {})) is not None:
+            self._count('semantic_hits')
+            print(f"Stage cache: '{topic}' matches cached topic '{match[0]}' ({match[1]:.2f})")
+            return match[0]
+        self._count('semantic_misses')
+        return topic
+
+    def _load_index(self):
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        rows = self.db.query_all(
+            "SELECT topic FROM stage_cache WHERE stage = 'gaps' AND topic IS NOT NULL AND created_at > ? "
+            'ORDER BY created_at DESC LIMIT ?',
+            (time.time() - self.ttls['gaps'], self.topic_index.max_entries)
+        )
+        for row in reversed(rows):
+            self.topic_index.add(row[0])
+
+    def wrap(self, stage, topic, fn, force_refresh=False):
+        """Stage function that consults the cache before calling fn(**inputs)
+
+        Results failing is_cacheable (failed upstream calls) are not stored. With
+        force_refresh the cache is not read but the fresh result replaces it.
+        """
+        def cached(**inputs):
+            key = self.key(topic, inputs)
+            if force_refresh:
+                self._count('refreshes')
+            else:
+                value = self.get(stage, key)
+                if value is not None:
+                    self._count('hits')
+                    return value
+                self._count('misses')
+            value = fn(**inputs)
+            if is_cacheable(stage, value):
+                try:
+                    self.put(stage, key, value, topic)
+                except Exception as e:
+                    print(f"Stage cache write failed ({stage}): {e}")
+            return value
+        return cached
+
+    def purge(self):
+        """Delete entries past their stage's TTL and the stale window; returns how many"""
+        now = time.time()
+        removed = 0
+        with self.db.transaction() as conn:
+            for stage in {row[0] for row in conn.execute('SELECT DISTINCT stage FROM stage_cache')}:
+                ttl = self.ttls.get(stage, 0)
+                cursor = conn.execute(
+                    'DELETE FROM stage_cache WHERE stage = ? AND created_at <= ?',
+                    (stage, now - ttl - self.stale_ttl if ttl > 0 else float('inf'))
+                )
+                removed += cursor.rowcount
+        return removed
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """Counters since startup; every hit is an upstream API call not made"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            **stats,
+            'hit_rate': round(stats['hits'] / lookups, 3) if lookups else 0.0,
+            'api_calls_saved': stats['hits'],
+            'indexed_topics': len(self.topic_index) if self.topic_index is not None else 0
+        }
@@ -50,6 +50,7 @@ const viewDetailsBtn = document.getElementById('viewDetailsBtn');
 const detailsModal = document.getElementById('detailsModal');
 const closeModal = document.getElementById('closeModal');
 const savedBlogs = document.getElementById('savedBlogs');
+const blogSearch = document.getElementById('blogSearch');
 const themeToggle = document.getElementById('themeToggle');
 const themeIcon = document.getElementById('themeIcon');
 const doneBtn = document.getElementById('doneBtn');
@@ -87,8 +88,8 @@ function toggleTheme() {
     setTheme(currentTheme === 'dark' ? 'light' : 'dark');
 }
 
-// Update step status
-function updateStepStatus(stepNum, status) {
+// Update step status (durationMs is shown on completed steps)
+function updateStepStatus(stepNum, status, durationMs) {
     const step = steps[stepNum];
     const badge = step.querySelector('.status-badge');
     
@@ -106,7 +107,9 @@ function updateStepStatus(stepNum, status) {
         case 'completed':
             step.classList.add('completed');
             badge.classList.add('status-completed');
-            badge.textContent = 'Completed';
+            badge.textContent = durationMs === undefined
+                ? 'Completed'
+                : `Completed (${(durationMs / 1000).toFixed(1)}s)`;
             break;
         case 'error':
             badge.classList.add('status-error');
@@ -137,101 +140,133 @@ function hideError() {
     errorSection.style.display = 'none';
 }
 
-// Generate blog
-async function generateBlog(topic) {
-    try {
-        // Reset UI
-        hideError();
-        blogSection.style.display = 'none';
-        progressSection.style.display = 'block';
-        resetSteps();
-        
-        // Disable button
-        generateBtn.disabled = true;
-        generateBtn.querySelector('.btn-text').style.display = 'none';
-        generateBtn.querySelector('.btn-loader').style.display = 'flex';
-        
-        // Simulate progress updates (since we're calling one endpoint)
-        const progressInterval = setInterval(() => {
-            // This is just visual feedback
-        }, 1000);
-        
-        // Step 1: Research Gaps
-        updateStepStatus(1, 'processing');
-        await new Promise(resolve => setTimeout(resolve, 500));
-        
-        // Step 2: Questions
-        updateStepStatus(1, 'completed');
-        updateStepStatus(2, 'processing');
-        await new Promise(resolve => setTimeout(resolve, 500));
-        
-        // Step 3: Methodology
-        updateStepStatus(2, 'completed');
-        updateStepStatus(3, 'processing');
-        await new Promise(resolve => setTimeout(resolve, 500));
-        
-        // Step 4: Blog Generation
-        updateStepStatus(3, 'completed');
-        updateStepStatus(4, 'processing');
-        
-        // Make actual API call
-        const response = await fetch('/api/generate-blog', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ topic })
-        });
-        
-        clearInterval(progressInterval);
-        
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.error || 'Failed to generate blog');
+// Pipeline stage -> progress step
+const STAGE_STEPS = {
+    gaps: 1,
+    questions: 2,
+    methodology: 3,
+    blog_opening: 4,
+    blog: 4
+};
+
+// Re-enable the generate button
+function resetGenerateButton() {
+    generateBtn.disabled = false;
+    generateBtn.querySelector('.btn-text').style.display = 'inline';
+    generateBtn.querySelector('.btn-loader').style.display = 'none';
+}
+
+// Mark whichever step is currently active as failed
+function markActiveStepError() {
+    for (let i = 1; i <= 4; i++) {
+        const step = steps[i];
+        if (step.classList.contains('active')) {
+            updateStepStatus(i, 'error');
         }
+    }
+}
+
+// Generate blog, following real pipeline progress over Server-Sent Events
+function generateBlog(topic) {
+    // Reset UI
+    hideError();
+    blogSection.style.display = 'none';
+    progressSection.style.display = 'block';
+    resetSteps();
+    
+    // Disable button
+    generateBtn.disabled = true;
+    generateBtn.querySelector('.btn-text').style.display = 'none';
+    generateBtn.querySelector('.btn-loader').style.display = 'flex';
+    
+    return new Promise(resolve => {
+        const source = new EventSource(`/api/generate-blog/stream?topic=${encodeURIComponent(topic)}`);
+        let finished = false;
+        
+        // Markdown streamed so far, per blog section
+        const streamed = { opening: '', body: '' };
+        let renderPending = false;
+        
+        const finish = () => {
+            finished = true;
+            source.close();
+            resetGenerateButton();
+            resolve();
+        };
         
-        const data = await response.json();
-        
-        // Step 4 complete
-        updateStepStatus(4, 'completed');
+        source.addEventListener('stage_started', (e) => {
+            const data = JSON.parse(e.data);
+            updateStepStatus(STAGE_STEPS[data.stage], 'processing');
+        });
         
-        // Store blog data
-        currentBlogId = data.blog_id;
-        currentBlogData = data;
+        source.addEventListener('stage_completed', (e) => {
+            const data = JSON.parse(e.data);
+            // Step 4 completes with the full blog, not with its opening section
+            if (data.stage === 'blog_opening') return;
+            
+            const stepNum = STAGE_STEPS[data.stage];
+            if (data.status === 'completed') {
+                updateStepStatus(stepNum, 'completed', data.timing.duration_ms);
+            } else {
+                updateStepStatus(stepNum, 'error');
+            }
+        });
         
-        // Display blog
-        displayBlog(data.content);
+        source.addEventListener('blog_chunk', (e) => {
+            const data = JSON.parse(e.data);
+            streamed[data.section] += data.text;
+            
+            // Show the blog as soon as the first words arrive
+            blogSection.style.display = 'block';
+            
+            // Re-render at most once per animation frame
+            if (!renderPending) {
+                renderPending = true;
+                requestAnimationFrame(() => {
+                    renderPending = false;
+                    if (finished) return;
+                    const text = streamed.body
+                        ? `${streamed.opening.trimEnd()}\n\n${streamed.body.trimStart()}`
+                        : streamed.opening;
+                    displayBlog(text);
+                });
+            }
+        });
         
-        // Hide progress, show blog
-        setTimeout(() => {
+        source.addEventListener('done', (e) => {
+            const data = JSON.parse(e.data);
+            
+            // Store blog data
+            currentBlogId = data.blog_id;
+            currentBlogData = data;
+            
+            // Display the saved blog (replaces the streamed preview), hide progress
+            displayBlog(data.content);
             progressSection.style.display = 'none';
             blogSection.style.display = 'block';
-            
-            // Scroll to blog
             blogSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
-        }, 1000);
+            
+            // Reload saved blogs
+            loadSavedBlogs();
+            finish();
+        });
         
-        // Reload saved blogs
-        loadSavedBlogs();
+        source.addEventListener('pipeline_error', (e) => {
+            const data = JSON.parse(e.data);
+            console.error('Pipeline error:', data);
+            markActiveStepError();
+            showError(data.error || 'Failed to generate blog');
+            finish();
+        });
         
-    } catch (error) {
-        console.error('Error:', error);
-        showError(error.message);
-        
-        // Mark current step as error
-        for (let i = 1; i <= 4; i++) {
-            const step = steps[i];
-            if (step.classList.contains('active')) {
-                updateStepStatus(i, 'error');
-                break;
-            }
-        }
-    } finally {
-        // Re-enable button
-        generateBtn.disabled = false;
-        generateBtn.querySelector('.btn-text').style.display = 'inline';
-        generateBtn.querySelector('.btn-loader').style.display = 'none';
-    }
+        // Connection-level failure (server down, network drop)
+        source.onerror = () => {
+            if (finished) return;
+            markActiveStepError();
+            showError('Lost connection to the server while generating the blog');
+            finish();
+        };
+    });
 }
 
 // Display blog content
@@ -265,9 +300,24 @@ async function downloadBlog() {
 }
 
 // View details
-function viewDetails() {
+async function viewDetails() {
     if (!currentBlogData) return;
     
+    // Blogs opened from the list are loaded without their research data; fetch it on first use
+    if (currentBlogData.gaps === undefined) {
+        try {
+            const response = await fetch(`/api/blogs/${currentBlogId}?fields=research_gaps,research_questions,methodology`);
+            const data = await response.json();
+            currentBlogData.gaps = data.research_gaps;
+            currentBlogData.questions = data.research_questions;
+            currentBlogData.methodology = data.methodology;
+        } catch (error) {
+            console.error('Error loading blog details:', error);
+            alert('Failed to load research details');
+            return;
+        }
+    }
+    
     // Populate modal
     document.getElementById('gapsData').textContent = 
         JSON.stringify(currentBlogData.gaps, null, 2);
@@ -283,7 +333,7 @@ function viewDetails() {
 // Edit blog
 async function editBlog(blogId) {
     try {
-        const response = await fetch(`/api/blogs/${blogId}`);
+        const response = await fetch(`/api/blogs/${blogId}?fields=content`);
         const data = await response.json();
         
         editingBlogId = blogId;
@@ -388,22 +438,32 @@ async function readBlog(blogId) {
     await loadBlog(blogId);
 }
 
-// Load saved blogs
-async function loadSavedBlogs() {
-    try {
-        const response = await fetch('/api/blogs');
-        const data = await response.json();
-        
-        if (data.blogs.length === 0) {
-            savedBlogs.innerHTML = '<p class="loading-text">No saved blogs yet</p>';
-            return;
-        }
-        
-        savedBlogs.innerHTML = data.blogs.map(blog => `
+// Saved blogs are fetched a page at a time; more are loaded as the end of the list scrolls into view
+let blogsCursor = null;
+let blogsLoading = false;
+let blogsListVersion = 0;
+const blogsSentinel = document.createElement('div');
+const blogsObserver = new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting) && blogsCursor) {
+        loadSavedBlogs(false);
+    }
+}, { rootMargin: '200px' });
+
+// Escape search snippet text, keeping only the <mark> highlights added by the server
+function renderSnippet(snippet) {
+    const div = document.createElement('div');
+    div.textContent = snippet;
+    return div.innerHTML.replace(/&lt;mark&gt;/g, '<mark>').replace(/&lt;\/mark&gt;/g, '</mark>');
+}
+
+function renderBlogItem(blog) {
+    const snippet = blog.snippet ? `<p class="blog-snippet">${renderSnippet(blog.snippet)}</p>` : '';
+    return `
             <div class="blog-item">
                 <div class="blog-item-info" data-blog-id="${blog.id}">
                     <h3>${blog.topic}</h3>
                     <p>Created: ${new Date(blog.created_at).toLocaleDateString()}</p>
+                    ${snippet}
                 </div>
                 <div class="blog-item-actions">
                     <button class="btn-icon btn-read" onclick="readBlog(${blog.id})" title="Read"><i class="fas fa-book-open"></i></button>
@@ -411,35 +471,121 @@ async function loadSavedBlogs() {
                     <button class="btn-icon btn-delete" onclick="showDeleteConfirm(${blog.id})" title="Delete"><i class="fas fa-trash-alt"></i></button>
                 </div>
             </div>
-        `).join('');
-        
-        // Add click handlers for blog info area only
-        document.querySelectorAll('.blog-item-info').forEach(item => {
-            item.addEventListener('click', async () => {
-                const blogId = item.dataset.blogId;
-                await loadBlog(blogId);
-            });
+        `;
+}
+
+function bindBlogItems() {
+    // Add click handlers for blog info area only
+    savedBlogs.querySelectorAll('.blog-item-info:not([data-bound])').forEach(item => {
+        item.dataset.bound = 'true';
+        item.addEventListener('click', async () => {
+            const blogId = item.dataset.blogId;
+            await loadBlog(blogId);
         });
+    });
+}
+
+// Load saved blogs (reset: start again from the newest; otherwise append the next page)
+async function loadSavedBlogs(reset = true) {
+    if (reset && blogSearch.value.trim()) {
+        return searchBlogs(blogSearch.value.trim());
+    }
+    if (reset) {
+        blogsListVersion++;
+        blogsCursor = null;
+    } else if (blogsLoading) {
+        return;
+    }
+    const version = blogsListVersion;
+    blogsLoading = true;
+    
+    try {
+        const url = blogsCursor ? `/api/blogs?cursor=${encodeURIComponent(blogsCursor)}` : '/api/blogs';
+        const response = await fetch(url);
+        const data = await response.json();
+        
+        // A newer reset started while this page was in flight
+        if (version !== blogsListVersion) return;
+        
+        if (reset && data.blogs.length === 0) {
+            savedBlogs.innerHTML = '<p class="loading-text">No saved blogs yet</p>';
+            blogsObserver.unobserve(blogsSentinel);
+            return;
+        }
+        
+        const html = data.blogs.map(renderBlogItem).join('');
+        if (reset) {
+            savedBlogs.innerHTML = html;
+        } else {
+            blogsSentinel.insertAdjacentHTML('beforebegin', html);
+        }
+        
+        bindBlogItems();
+        
+        blogsCursor = data.next_cursor;
+        if (blogsCursor) {
+            // Re-observing fires again if the sentinel is still in view, so short pages keep filling
+            savedBlogs.appendChild(blogsSentinel);
+            blogsObserver.unobserve(blogsSentinel);
+            blogsObserver.observe(blogsSentinel);
+        } else {
+            blogsObserver.unobserve(blogsSentinel);
+            blogsSentinel.remove();
+        }
         
     } catch (error) {
         console.error('Error loading blogs:', error);
-        savedBlogs.innerHTML = '<p class="loading-text">Failed to load blogs</p>';
+        if (reset) {
+            savedBlogs.innerHTML = '<p class="loading-text">Failed to load blogs</p>';
+        }
+    } finally {
+        if (version === blogsListVersion) {
+            blogsLoading = false;
+        }
+    }
+}
+
+// Search saved blogs; results replace the paged list until the search box is cleared
+async function searchBlogs(query) {
+    const version = ++blogsListVersion;
+    blogsCursor = null;
+    blogsObserver.unobserve(blogsSentinel);
+    
+    try {
+        const response = await fetch(`/api/blogs/search?q=${encodeURIComponent(query)}`);
+        const data = await response.json();
+        if (version !== blogsListVersion) return;
+        
+        if (!response.ok || data.results.length === 0) {
+            savedBlogs.innerHTML = '<p class="loading-text">No matching blogs</p>';
+            return;
+        }
+        savedBlogs.innerHTML = data.results.map(renderBlogItem).join('');
+        bindBlogItems();
+        
+    } catch (error) {
+        console.error('Error searching blogs:', error);
+        if (version === blogsListVersion) {
+            savedBlogs.innerHTML = '<p class="loading-text">Search failed</p>';
+        }
     }
 }
 
+let searchTimer = null;
+blogSearch.addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => loadSavedBlogs(), 250);
+});
+
 // Load specific blog
 async function loadBlog(blogId) {
     try {
-        const response = await fetch(`/api/blogs/${blogId}`);
+        const response = await fetch(`/api/blogs/${blogId}?fields=id,content`);
         const data = await response.json();
         
         currentBlogId = data.id;
-        currentBlogData = {
-            content: data.content,
-            gaps: data.research_gaps,
-            questions: data.research_questions,
-            methodology: data.methodology
-        };
+        // gaps / questions / methodology are fetched by viewDetails() when needed
+        currentBlogData = { content: data.content };
         
         displayBlog(data.content);
         blogSection.style.display = 'block';